@@ -0,0 +1,187 @@
+"""
+JWT issuing, verification cache and revocation for the mobile API.
+
+Verification: the mobile app sends the same 30-day token on every call.
+Tokens that verified once are kept in a bounded LRU keyed by the SHA-256 of
+the token (not the token itself), so repeat calls skip the HMAC check and
+claim parsing until the token's `exp`.
+
+Revocation: every token carries the generation (`gen`) of its user at issue
+time. Logging out or resetting a password bumps the user's generation in
+`auth_token_generation`, which invalidates every token issued before. Each
+worker process keeps the generations in a dict checked on every call (one
+lookup, no query); the caller applies the bump to it once its transaction
+has committed, and changes made by other processes are pulled every
+AUTH_REVOCATION_SYNC_INTERVAL seconds with one query on the rows changed
+since the previous pull. Tokens issued before
+generations existed count as generation 0.
+
+- issue_token(): sign a token stamped with the user's current generation
+- verify_token(): cached verification, raises the jwt errors or TokenRevokedError
+- revoke_user_tokens(): invalidate every token of a user, in the caller's transaction
+- apply_revocation(): make it effective in this process, after the commit
+- token_cache_stats(): cache and revocation counters
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import jwt
+
+from db_pool import get_connection
+
+
+TOKEN_LIFETIME = timedelta(days=30)
+ALGORITHM = 'HS256'
+
+# Rows changed in the last seconds are pulled again: a bump committed
+# late can carry an updated_at older than the previous pull
+SYNC_OVERLAP = 60
+
+
+class TokenRevokedError(jwt.InvalidTokenError):
+    """The token was issued before its user logged out or reset the password."""
+
+
+_settings = {
+    'SECRET_KEY': 'mobile_app_secret_key',
+    'AUTH_TOKEN_CACHE_SIZE': 10000,
+    'AUTH_REVOCATION_SYNC_INTERVAL': 5,
+}
+
+_verified = OrderedDict()  # token digest -> claims
+_verified_lock = threading.Lock()
+
+_generations = {}  # user_id -> generation
+_sync = {'at': None, 'since': None}
+_sync_lock = threading.Lock()
+
+_stats = {'hits': 0, 'misses': 0, 'revoked': 0, 'syncs': 0}
+
+
+def init_tokens(config):
+    """Read SECRET_KEY and the AUTH_* settings from a Flask/Config mapping."""
+    for key in _settings:
+        if config.get(key) is not None:
+            _settings[key] = config.get(key)
+
+
+def token_generation(cursor, user_id):
+    """Current generation of `user_id`, read from the database."""
+    cursor.execute("SELECT generation FROM auth_token_generation WHERE user_id = %s", (user_id,))
+    row = cursor.fetchone()
+    return row['generation'] if row else 0
+
+
+def issue_token(cursor, claims, lifetime=TOKEN_LIFETIME):
+    """Signed token with `claims`, an expiry and the generation of claims['user_id']."""
+    payload = dict(claims, exp=datetime.utcnow() + lifetime)
+    if claims.get('user_id') is not None:
+        payload['gen'] = token_generation(cursor, claims['user_id'])
+    return jwt.encode(payload, _settings['SECRET_KEY'], algorithm=ALGORITHM)
+
+
+def revoke_user_tokens(cursor, user_id):
+    """
+    Invalidate every token issued so far to `user_id`. Returns the new
+    generation, to pass to apply_revocation() once the caller has committed.
+    """
+    if user_id is None:
+        return None
+    cursor.execute("""
+        INSERT INTO auth_token_generation (user_id, generation) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE generation = generation + 1
+    """, (user_id,))
+    return token_generation(cursor, user_id)
+
+
+def apply_revocation(user_id, generation):
+    """Reject the revoked tokens in this process right away (the others sync)."""
+    # Only after the commit: a rolled back bump kept here would reject the
+    # tokens issued later with the generation still in the database
+    if user_id is not None and generation is not None and \
+            generation > _generations.get(user_id, 0):
+        _generations[user_id] = generation
+
+
+def _sync_generations():
+    now = time.monotonic()
+    if _sync['at'] is not None and now - _sync['at'] < _settings['AUTH_REVOCATION_SYNC_INTERVAL']:
+        return
+    # The first load is waited for; later pulls are done by one thread while
+    # the others go on with the table they have
+    if not _sync_lock.acquire(blocking=_sync['since'] is None):
+        return
+    try:
+        if _sync['at'] is not None and now - _sync['at'] < _settings['AUTH_REVOCATION_SYNC_INTERVAL']:
+            return
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT NOW() as now")
+                db_now = cursor.fetchone()['now']
+                if _sync['since'] is None:
+                    cursor.execute("SELECT user_id, generation FROM auth_token_generation")
+                else:
+                    cursor.execute("""
+                        SELECT user_id, generation FROM auth_token_generation
+                        WHERE updated_at >= %s - INTERVAL %s SECOND
+                    """, (_sync['since'], SYNC_OVERLAP))
+                rows = cursor.fetchall()
+        for row in rows:
+            if row['generation'] > _generations.get(row['user_id'], 0):
+                _generations[row['user_id']] = row['generation']
+        _sync['since'] = db_now
+        with _verified_lock:
+            _stats['syncs'] += 1
+    except Exception as e:
+        # Keep serving with the table we have; retried after the interval
+        print(f"Token revocation sync error: {e}")
+    finally:
+        _sync['at'] = now
+        _sync_lock.release()
+
+
+def verify_token(token):
+    """
+    Claims of a valid token. Raises jwt.ExpiredSignatureError,
+    TokenRevokedError or jwt.InvalidTokenError.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    with _verified_lock:
+        claims = _verified.get(key)
+        if claims is not None:
+            _verified.move_to_end(key)
+            _stats['hits'] += 1
+        else:
+            _stats['misses'] += 1
+
+    if claims is None:
+        claims = jwt.decode(token, _settings['SECRET_KEY'], algorithms=[ALGORITHM])
+        with _verified_lock:
+            _verified[key] = claims
+            while len(_verified) > _settings['AUTH_TOKEN_CACHE_SIZE']:
+                _verified.popitem(last=False)
+    elif claims.get('exp') is not None and claims['exp'] <= time.time():
+        with _verified_lock:
+            _verified.pop(key, None)
+        raise jwt.ExpiredSignatureError('Signature has expired')
+
+    _sync_generations()
+    user_id = claims.get('user_id')
+    if user_id is not None and claims.get('gen', 0) < _generations.get(user_id, 0):
+        with _verified_lock:
+            _stats['revoked'] += 1
+        raise TokenRevokedError('Token has been revoked')
+    return claims
+
+
+def token_cache_stats():
+    """Verification cache hits/misses, rejected revoked tokens and syncs."""
+    with _verified_lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_verified)
+    stats['revoked_users'] = len(_generations)
+    return stats
@@ -7,12 +7,8 @@ import os
 import uuid
 
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 import secrets
-import random
-import smtplib
-from email.mime.text import MIMEText
 from flask_cors import CORS
 
 
@@ -23,10 +19,6 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 app.config.from_object(Config)
 
 import jwt
-from datetime import timedelta
-
-# JWT Secret Key
-JWT_SECRET = app.config.get('SECRET_KEY', 'mobile_app_secret_key')
 
 def token_required(f):
     """Decorator to require valid JWT token for ONG API endpoints"""
@@ -42,10 +34,12 @@ def token_required(f):
             return jsonify({'error': 'Token is missing'}), 401
         
         try:
-            data = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+            data = verify_token(token)
             current_ong_id = data['ong_id']
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
+        except TokenRevokedError:
+            return jsonify({'error': 'Token has been revoked'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'error': 'Invalid token'}), 401
         
@@ -66,12 +60,14 @@ def admin_token_required(f):
             return jsonify({'success': False, 'message': 'Token is missing'}), 401
         
         try:
-            data = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+            data = verify_token(token)
             if data.get('role') != 'admin':
                 return jsonify({'success': False, 'message': 'Admin access required'}), 403
             current_user_id = data['user_id']
         except jwt.ExpiredSignatureError:
             return jsonify({'success': False, 'message': 'Token has expired'}), 401
+        except TokenRevokedError:
+            return jsonify({'success': False, 'message': 'Token has been revoked'}), 401
         except Exception as e:
             return jsonify({'success': False, 'message': 'Invalid token'}), 401
         
@@ -89,6 +85,48 @@ DB_USER = app.config['DB_USER']
 DB_PASSWORD = app.config['DB_PASSWORD']
 DB_NAME = app.config['DB_NAME']
 from locations_data import MAURITANIA_LOCATIONS
+from db_pool import init_pool, get_connection, pool_stats
+from migrations import run_migrations
+from case_media import insert_media, refresh_case_cover
+from media_renditions import store_upload
+from media_store import store_media, release_media
+from chunked_upload import (UploadError, init_uploads, create_upload, write_chunk, finalize_upload,
+                            get_upload, parse_upload_ids, attach_uploads, remove_staged_files)
+from mailer import init_mailer, mail_stats
+from jobs import enqueue, start_worker_thread
+from cascade_delete import delete_cases, delete_ongs
+from case_feed import DEFAULT_PAGE_SIZE, filters_from_args, decode_cursor, fetch_case_page, count_cases
+from response_cache import init_cache, cached, invalidate_cache, cache_stats
+from conditional_get import conditional
+from delta_sync import (record_deletion, server_watermark,
+                        parse_watermark, watermark_expired, fetch_case_changes)
+from stats_summary import (add_case_counts, remove_case_counts, add_ong_counts, remove_ong_counts,
+                           category_case_ids, category_ong_ids, case_overview,
+                           case_breakdown, ong_status_counts, ong_domain_counts)
+from beneficiaries import beneficiary_stats
+from ong_domains import parse_domains, set_ong_domains, domain_filter_sql
+from case_search import index_cases, search_condition, search_cases
+from case_geo import valid_point, clamp_radius, distance_sql, radius_filter
+from case_payload import full_cases, compact_cases
+from passwords import (PasswordHashBusyError, init_passwords, hash_password, verify_password,
+                       password_stats)
+from api_tokens import (TokenRevokedError, init_tokens, issue_token, verify_token,
+                        revoke_user_tokens, apply_revocation, token_cache_stats)
+from static_assets import init_assets
+from response_compression import init_compression
+from rate_limit import RateLimitExceeded, init_rate_limits, rate_limited, request_field, rate_limit_stats
+
+init_pool(app.config)
+init_cache(app.config)
+init_mailer(app.config)
+init_uploads(app.config)
+init_tokens(app.config)
+init_passwords(app.config)
+init_rate_limits(app.config)
+init_assets(app)
+init_compression(app)
+if app.config['JOB_WORKER_THREAD']:
+    start_worker_thread(app.config)
 
 from contextlib import contextmanager
 
@@ -96,51 +134,39 @@ from contextlib import contextmanager
 
 @contextmanager
 def get_db():
-    conn = pymysql.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    # Borrow a pooled connection; close() returns it to the pool
+    conn = get_connection()
     try:
         yield conn
     finally:
         conn.close()
 
-def check_and_migrate_password(conn, table, id_column, id_value, plain_password, db_password_value):
+def check_user_password(conn, user, plain_password):
     """
-    Checks password against DB value.
-    If DB value is plain text and matches, it generates a hash, updates DB, and returns True.
-    If DB value is a hash, it verifies it and returns result.
+    Checks a password against a `users` row (id, password_hash).
+    Plain-text and outdated hashes are upgraded on success (see passwords.py).
     """
-    # 1. Check if it looks like a hash (Werkzeug hashes start with method:)
-    if db_password_value.startswith('scrypt:') or db_password_value.startswith('pbkdf2:'):
-        return check_password_hash(db_password_value, plain_password)
-    
-    # 2. Fallback: Check as plaintext (Legacy)
-    if db_password_value == plain_password:
-        # Migrate to Hash
-        print(f"Migrating password for {table} {id_value}")
-        new_hash = generate_password_hash(plain_password)
+    valid, new_hash = verify_password(user['password_hash'], plain_password)
+    if new_hash:
         with conn.cursor() as cursor:
-            cursor.execute(f"UPDATE {table} SET mot_de_passe=%s WHERE {id_column}=%s", (new_hash, id_value))
+            cursor.execute("UPDATE users SET password_hash=%s WHERE id=%s", (new_hash, user['id']))
         conn.commit()
-        return True
-        
-    return False
+    return valid
+
+def check_account_password(conn, table, id_column, id_value, plain_password):
+    """Checks the password of the `users` account linked to a row of `table` (ong / administrateur)."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT u.id, u.password_hash FROM users u
+            JOIN {table} t ON t.user_id = u.id
+            WHERE t.{id_column} = %s
+        """, (id_value,))
+        user = cursor.fetchone()
+    return bool(user) and check_user_password(conn, user, plain_password)
 
 def get_db_connection():
-    # Legacy wrapper for parts not yet refactored or manual usage
-    return pymysql.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    # Legacy wrapper for parts not yet refactored or manual usage (pooled as well)
+    return get_connection()
 
 
 
@@ -175,8 +201,6 @@ def init_db():
                     id_admin INT AUTO_INCREMENT PRIMARY KEY,
                     nom VARCHAR(100) NOT NULL,
                     email VARCHAR(150) UNIQUE NOT NULL,
-                    mot_de_passe VARCHAR(255) NOT NULL,
-                    must_change_password BOOLEAN DEFAULT FALSE,
                     user_id INT,
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
                 )
@@ -195,8 +219,6 @@ def init_db():
                     update_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     logo_url VARCHAR(255),
                     verification_doc_url VARCHAR(255),
-                    mot_de_passe VARCHAR(255) NOT NULL,
-                    must_change_password BOOLEAN DEFAULT FALSE,
                     user_id INT,
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
                 )
@@ -317,17 +339,6 @@ def init_db():
                 except Exception as e:
                     print(f"Warning: Could not add location columns. Error: {e}")
 
-            # Add must_change_password column if not exists (legacy tables)
-            for table in ['ong', 'administrateur']:
-                try:
-                    cursor.execute(f"SELECT must_change_password FROM {table} LIMIT 1")
-                except Exception:
-                    try:
-                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN must_change_password BOOLEAN DEFAULT FALSE")
-                        print(f"Added must_change_password column to {table} table.")
-                    except Exception as e:
-                        print(f"Warning: Could not add must_change_password column to {table}. Error: {e}")
-            
             # --- NEW: Add category_id to cas_social ---
             try:
                 cursor.execute("SELECT category_id FROM cas_social LIMIT 1")
@@ -400,49 +411,8 @@ def init_db():
                     except Exception as e:
                         print(f"Warning: Could not add user_id column to {table}. Error: {e}")
 
-            # --- NEW: Migrate existing accounts to users table ---
-            # Migrate Admins
-            cursor.execute("SELECT id_admin, email, mot_de_passe, must_change_password FROM administrateur WHERE user_id IS NULL")
-            admins_to_migrate = cursor.fetchall()
-            for admin in admins_to_migrate:
-                try:
-                    # Check if email already exists in users
-                    cursor.execute("SELECT id FROM users WHERE email = %s", (admin['email'],))
-                    existing_user = cursor.fetchone()
-                    if existing_user:
-                        # Link to existing user
-                        cursor.execute("UPDATE administrateur SET user_id = %s WHERE id_admin = %s", (existing_user['id'], admin['id_admin']))
-                    else:
-                        # Create new user
-                        cursor.execute(
-                            "INSERT INTO users (email, password_hash, role, must_change_password) VALUES (%s, %s, 'admin', %s)",
-                            (admin['email'], admin['mot_de_passe'], admin.get('must_change_password', False))
-                        )
-                        new_user_id = cursor.lastrowid
-                        cursor.execute("UPDATE administrateur SET user_id = %s WHERE id_admin = %s", (new_user_id, admin['id_admin']))
-                    print(f"Migrated admin {admin['email']} to users table.")
-                except Exception as e:
-                    print(f"Warning: Could not migrate admin {admin['email']}. Error: {e}")
-
-            # Migrate ONGs
-            cursor.execute("SELECT id_ong, email, mot_de_passe, must_change_password FROM ong WHERE user_id IS NULL")
-            ongs_to_migrate = cursor.fetchall()
-            for ong in ongs_to_migrate:
-                try:
-                    cursor.execute("SELECT id FROM users WHERE email = %s", (ong['email'],))
-                    existing_user = cursor.fetchone()
-                    if existing_user:
-                        cursor.execute("UPDATE ong SET user_id = %s WHERE id_ong = %s", (existing_user['id'], ong['id_ong']))
-                    else:
-                        cursor.execute(
-                            "INSERT INTO users (email, password_hash, role, must_change_password) VALUES (%s, %s, 'ong', %s)",
-                            (ong['email'], ong['mot_de_passe'], ong.get('must_change_password', False))
-                        )
-                        new_user_id = cursor.lastrowid
-                        cursor.execute("UPDATE ong SET user_id = %s WHERE id_ong = %s", (new_user_id, ong['id_ong']))
-                    print(f"Migrated ONG {ong['email']} to users table.")
-                except Exception as e:
-                    print(f"Warning: Could not migrate ONG {ong['email']}. Error: {e}")
+            # Accounts still in the legacy ong / administrateur password
+            # columns are moved to `users` by migration 14 (migrations.py)
 
             # Seed Default Categories if empty
             cursor.execute("SELECT COUNT(*) as count FROM categorie")
@@ -458,6 +428,9 @@ def init_db():
                 print("Default categories seeded.")
 
         conn.commit()
+
+        # Versioned migrations (indexes, later schema changes)
+        run_migrations(conn)
     finally:
         conn.close()
 
@@ -608,6 +581,7 @@ TRANSLATIONS = {
         'clear_filters': 'مسح الفلاتر',
         'showing_results': 'عرض النتائج',
         'no_results_found': 'لم يتم العثور على نتائج',
+        'load_more': 'عرض المزيد',
         'change_password_title': 'تغيير كلمة المرور',
         'new_password': 'كلمة المرور الجديدة',
         'confirm_new_password': 'تأكيد كلمة المرور الجديدة',
@@ -767,6 +741,7 @@ TRANSLATIONS = {
         'clear_filters': 'Effacer les filtres',
         'showing_results': 'Affichage des résultats',
         'no_results_found': 'Aucun résultat trouvé',
+        'load_more': 'Voir plus',
         'change_password_title': 'Changer le mot de passe',
         'new_password': 'Nouveau mot de passe',
         'confirm_new_password': 'Confirmer le nouveau mot de passe',
@@ -823,6 +798,23 @@ def inject_conf_var():
         locations=MAURITANIA_LOCATIONS
     )
 
+@app.errorhandler(PasswordHashBusyError)
+def password_hash_busy(e):
+    # Login burst: every hashing slot is taken (see passwords.py)
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '2'}
+    flash("Serveur occupé, veuillez réessayer dans un instant.", "warning")
+    return redirect(request.path)
+
+@app.errorhandler(RateLimitExceeded)
+def rate_limit_exceeded(e):
+    # Too many login / reset attempts from this client or for this account (see rate_limit.py)
+    headers = {'Retry-After': str(e.retry_after)}
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'message': 'Trop de tentatives, veuillez réessayer plus tard.'}), 429, headers
+    flash("Trop de tentatives, veuillez réessayer plus tard.", "warning")
+    return redirect(request.path), 302, headers
+
 # --- Decorators ---
 
 def admin_required(f):
@@ -849,7 +841,7 @@ def create_default_admin():
                     flash("Accès refusé.", "danger")
                     return redirect(url_for('unified_login'))
                 
-                hashed = generate_password_hash('admin123')
+                hashed = hash_password('admin123')
                 # Create in users table first
                 cursor.execute(
                     "INSERT INTO users (email, password_hash, role) VALUES (%s, %s, 'admin')",
@@ -857,8 +849,8 @@ def create_default_admin():
                 )
                 new_user_id = cursor.lastrowid
                 cursor.execute(
-                    "INSERT INTO administrateur (nom, email, mot_de_passe, user_id) VALUES ('Admin', 'admin@ongconnect.com', %s, %s)",
-                    (hashed, new_user_id)
+                    "INSERT INTO administrateur (nom, email, user_id) VALUES ('Admin', 'admin@ongconnect.com', %s)",
+                    (new_user_id,)
                 )
                 conn.commit()
                 return "Default admin created: admin@ongconnect.com / admin123"
@@ -904,40 +896,17 @@ def get_pagination_iter(current_page, total_pages, left_edge=1, right_edge=1, le
 
 @app.route('/public/dashboard')
 def public_dashboard():
-    page = request.args.get('page', 1, type=int)
-    per_page = 3 # Adjusted to 3 so pagination is visible with few cases
-    offset = (page - 1) * per_page
-    
+    filters = filters_from_args(request.args)
+
     with get_db() as conn:
         with conn.cursor() as cursor:
             # Count total approved cases only
             cursor.execute("SELECT COUNT(*) as count FROM cas_social WHERE statut_approbation = 'approuvé'")
             total_cases = cursor.fetchone()['count']
-            total_pages = (total_cases + per_page - 1) // per_page
-            
-            # Ensure page is within bounds
-            if page < 1: page = 1
-            if total_pages > 0 and page > total_pages: page = total_pages
 
-            # Recalculate offset if page changed
-            offset = (page - 1) * per_page
-
-            # Fetch approved cases for current page
-            sql = """
-                SELECT c.*, o.nom_ong, o.logo_url, o.domaine_intervation, m.file_url 
-                FROM cas_social c 
-                LEFT JOIN ong o ON c.id_ong = o.id_ong
-                LEFT JOIN (
-                    SELECT id_cas_social, MIN(file_url) as file_url 
-                    FROM media 
-                    GROUP BY id_cas_social
-                ) m ON c.id_cas_social = m.id_cas_social
-                WHERE c.statut_approbation = 'approuvé'
-                ORDER BY c.date_publication DESC
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(sql, (per_page, offset))
-            cases = cursor.fetchall()
+            # First page of approved cases; the rest is fetched by search-filter.js
+            cases, next_cursor = fetch_case_page(cursor, filters)
+            filtered_total = count_cases(cursor, filters) if any(filters.values()) else total_cases
 
             # Fetch random/latest ONGs for the dashboard
             cursor.execute("SELECT * FROM ong ORDER BY update_at DESC LIMIT 6")
@@ -951,78 +920,70 @@ def public_dashboard():
             cursor.execute("SELECT * FROM categorie")
             categories = cursor.fetchall()
 
-            # Fetch ALL approved cases for client-side filtering
-            sql_all = """
-                SELECT c.*, o.nom_ong, o.logo_url, o.domaine_intervation, m.file_url 
-                FROM cas_social c 
-                LEFT JOIN ong o ON c.id_ong = o.id_ong
-                LEFT JOIN (
-                    SELECT id_cas_social, MIN(file_url) as file_url 
-                    FROM media 
-                    GROUP BY id_cas_social
-                ) m ON c.id_cas_social = m.id_cas_social
-                WHERE c.statut_approbation = 'approuvé'
-                ORDER BY c.date_publication DESC
-            """
-            cursor.execute(sql_all)
-            all_cases = cursor.fetchall()
-
-
-
             # Dashboard Statistics
             cursor.execute("SELECT COUNT(*) as count FROM ong")
             stats_nb_ongs = cursor.fetchone()['count']
 
             cursor.execute("SELECT COUNT(*) as count FROM cas_social WHERE statut='Résolu'")
             stats_resolved = cursor.fetchone()['count']
-    
-    pagination_iter = get_pagination_iter(page, total_pages)
 
     return render_template('public/dashboard.html', 
                          cases=cases,
-                         all_cases=all_cases,  # For client-side filtering
+                         next_cursor=next_cursor,
+                         filtered_total=filtered_total,
                          all_ongs=all_ongs,
                          categories=categories,
-                         page=page, 
-                         current_page=page, 
-                         total_pages=total_pages,
-                         pagination_iter=pagination_iter,
                          ongs=ongs,
                          stats_nb_ongs=stats_nb_ongs,
                          stats_resolved=stats_resolved,
                          stats_total_cases=total_cases)
 
+@app.route('/public/cases')
+def public_cases_feed():
+    """Filtered, keyset-paginated case cards for the public dashboard"""
+    filters = filters_from_args(request.args)
+    after = decode_cursor(request.args.get('cursor'))
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            cases, next_cursor = fetch_case_page(cursor, filters, after=after, limit=limit)
+            # The total only changes with the filters, so only the first page pays for it
+            total = None if after else count_cases(cursor, filters)
+
+    return jsonify({
+        'html': render_template('public/_case_cards.html', cases=cases),
+        'count': len(cases),
+        'total': total,
+        'next_cursor': next_cursor
+    })
+
 @app.route('/public/statistics')
 def public_statistics():
     with get_db() as conn:
         with conn.cursor() as cursor:
-            # Fetch ALL approved cases for statistics
-            sql = """
+            # Counters come from the materialized summary (see stats_summary.py)
+            overview = case_overview(cursor)
+            total_ongs = ong_status_counts(cursor).get('validé', 0)
+            wilaya_stats = [{'wilaya': w, 'count': n} for w, n in case_breakdown(cursor, 'case_wilaya')]
+
+            # Only the 20 most recent cases are listed
+            cursor.execute("""
                 SELECT c.*, o.nom_ong, o.logo_url
                 FROM cas_social c 
                 LEFT JOIN ong o ON c.id_ong = o.id_ong
                 WHERE c.statut_approbation = 'approuvé'
-                ORDER BY c.date_publication DESC
-            """
-            cursor.execute(sql)
-            cases = cursor.fetchall()
-            
-            # Calculate stats
-            total_cases = len(cases)
-            urgent_cases = sum(1 for case in cases if case['statut'] == 'Urgent')
-            resolved_cases = sum(1 for case in cases if case['statut'] == 'Résolu')
-            
-            # Statistics by ONG
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM ong WHERE statut_de_validation = 'validé'
+                ORDER BY c.date_publication DESC, c.id_cas_social DESC
+                LIMIT 20
             """)
-            total_ongs = cursor.fetchone()['count']
+            cases = cursor.fetchall()
     
     return render_template('public/statistics.html', 
                           cases=cases,
-                          total_cases=total_cases,
-                          urgent_cases=urgent_cases,
-                          resolved_cases=resolved_cases,
+                          wilaya_stats=wilaya_stats,
+                          total_cases=overview['total_cases'],
+                          urgent_cases=overview['urgent_cases'],
+                          resolved_cases=overview['resolved_cases'],
                           total_ongs=total_ongs)
 
 @app.route('/public/beneficiaries')
@@ -1030,18 +991,7 @@ def public_beneficiaries():
     with get_db() as conn:
         with conn.cursor() as cursor:
             # Fetch Statistics for initial render (Strict: Only Resolved Cases)
-            cursor.execute("""
-                SELECT 
-                    (SELECT COUNT(*) 
-                     FROM beneficier b 
-                     JOIN cas_social c ON b.id_cas_social = c.id_cas_social 
-                     WHERE c.statut = 'Résolu') + 
-                    (SELECT COUNT(*) FROM cas_social 
-                     WHERE statut = 'Résolu' 
-                     AND id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier)) 
-                as count
-            """)
-            total_beneficiaries = cursor.fetchone()['count']
+            total_beneficiaries = beneficiary_stats(cursor, breakdown=False)['total']
             
             # Fetch ONGs for filter
             cursor.execute("SELECT id_ong, nom_ong FROM ong ORDER BY nom_ong")
@@ -1071,72 +1021,17 @@ def api_beneficiary_stats():
     
     with get_db() as conn:
         with conn.cursor() as cursor:
-            # Base query using UNION for Strict Count (Only Resolved)
-            query = """
-                SELECT * FROM (
-                    SELECT b.id_beneficiaire, b.adresse as b_adresse, c.adresse as c_adresse, o.id_ong, o.nom_ong, o.domaine_intervation 
-                    FROM beneficier b
-                    JOIN cas_social c ON b.id_cas_social = c.id_cas_social
-                    JOIN ong o ON c.id_ong = o.id_ong
-                    WHERE c.statut = 'Résolu'
-                    
-                    UNION ALL
-                    
-                    SELECT NULL, c.adresse, c.adresse, o.id_ong, o.nom_ong, o.domaine_intervation
-                    FROM cas_social c
-                    JOIN ong o ON c.id_ong = o.id_ong
-                    WHERE c.statut = 'Résolu' 
-                    AND c.id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier)
-                ) as combined
-                WHERE 1=1
-            """
-            params = []
-            
-            if ong_id:
-                query += " AND id_ong = %s"
-                params.append(ong_id)
-            if location:
-                query += " AND (b_adresse LIKE %s OR c_adresse LIKE %s)"
-                params.append(f"%{location}%")
-                params.append(f"%{location}%")
-            if category:
-                query += " AND domaine_intervation LIKE %s"
-                params.append(f"%{category}%")
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Process results for stats
-            total = len(results)
-            by_ong = {}
-            by_category = {}
-            by_location = {}
-            
-            for row in results:
-                # By ONG
-                ong_name = row['nom_ong']
-                by_ong[ong_name] = by_ong.get(ong_name, 0) + 1
-                
-                # By Location (Simplistic: just use the address or first part)
-                loc = row['b_adresse'] or "Inconnu"
-                # If it's a long address, maybe try to extract city. For now, use as is.
-                by_location[loc] = by_location.get(loc, 0) + 1
-                
-                # By Category (Domain)
-                domains = [d.strip() for d in row['domaine_intervation'].split(',')]
-                for d in domains:
-                    if d:
-                        by_category[d] = by_category.get(d, 0) + 1
+            result = beneficiary_stats(cursor, ong_id=ong_id, category=category, location=location)
             
             lang_code = session.get('lang', 'ar')
             t = TRANSLATIONS[lang_code]
 
             # Convert to list for Chart.js
             stats = {
-                'total': total,
-                'by_ong': [{'label': k, 'value': v} for k, v in sorted(by_ong.items(), key=lambda x: x[1], reverse=True)[:10]],
-                'by_category': [{'label': t.get(k, k), 'value': v} for k, v in by_category.items()],
-                'by_location': [{'label': k, 'value': v} for k, v in sorted(by_location.items(), key=lambda x: x[1], reverse=True)[:10]]
+                'total': result['total'],
+                'by_ong': [{'label': k, 'value': v} for k, v in result['by_ong']],
+                'by_category': [{'label': t.get(k, k), 'value': v} for k, v in result['by_category'].items()],
+                'by_location': [{'label': k, 'value': v} for k, v in result['by_location']]
             }
             
             return jsonify(stats)
@@ -1191,6 +1086,7 @@ def admin_login():
     return redirect(url_for('unified_login'))
 
 @app.route('/forgot_password', methods=['GET', 'POST'])
+@rate_limited('reset', account=request_field('email'))
 def forgot_password():
     lang_code = session.get('lang', 'ar')
     t = TRANSLATIONS[lang_code]
@@ -1205,31 +1101,13 @@ def forgot_password():
                 user = cursor.fetchone()
                 
                 if user:
-                     # Generate random password (8-digit number)
-                    new_password = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-                    hashed_password = generate_password_hash(new_password)
-                    
-                    # 2. Update unified users table
-                    cursor.execute(
-                        "UPDATE users SET password_hash=%s, must_change_password=1 WHERE id=%s", 
-                        (hashed_password, user['id'])
-                    )
-                    
-                    # 3. Update legacy table for consistency
-                    if user['role'] == 'ong':
-                        cursor.execute("UPDATE ong SET mot_de_passe=%s, must_change_password=1 WHERE user_id=%s", (hashed_password, user['id']))
-                    elif user['role'] == 'admin':
-                        cursor.execute("UPDATE administrateur SET mot_de_passe=%s, must_change_password=1 WHERE user_id=%s", (hashed_password, user['id']))
-                    
+                    # 2. The worker generates, stores and mails the temporary
+                    # password: it is never written to the queue (see jobs.py)
+                    enqueue(cursor, 'reset_password', {'user_id': user['id'], 'to': email})
                     conn.commit()
                     
-                    # Send Email
-                    sent = send_reset_email(email, new_password)
-                    if sent:
-                        flash(t.get('password_reset_success'), "success")
-                        return redirect(url_for('unified_login'))
-                    else:
-                        flash("Erreur lors de l'envoi de l'email.", "danger")
+                    flash(t.get('password_reset_success'), "success")
+                    return redirect(url_for('unified_login'))
                 else:
                     flash(t.get('email_not_found'), "danger")
     
@@ -1257,8 +1135,7 @@ def ong_profile():
             
             # Fetch social cases for this ONG with first media image
             cursor.execute("""
-                SELECT c.*, 
-                       (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as first_image
+                SELECT c.*, COALESCE(c.cover_thumb_url, c.cover_url) as first_image
                 FROM cas_social c
                 WHERE c.id_ong=%s 
                 ORDER BY c.date_publication DESC
@@ -1299,8 +1176,7 @@ def ong_dashboard():
             
             # Fetch social cases for this ONG with first media image
             cursor.execute("""
-                SELECT c.*, 
-                       (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as first_image
+                SELECT c.*, COALESCE(c.cover_thumb_url, c.cover_url) as first_image
                 FROM cas_social c
                 WHERE c.id_ong=%s 
                 ORDER BY c.date_publication DESC
@@ -1368,24 +1244,9 @@ def admin_dashboard():
             cursor.execute("SELECT COUNT(*) as count FROM administrateur")
             admins_count = cursor.fetchone()['count']
             
-            cursor.execute("SELECT COUNT(*) as count FROM ong")
-            ngos_count = cursor.fetchone()['count']
-            
-            cursor.execute("SELECT COUNT(*) as count FROM cas_social")
-            cases_count = cursor.fetchone()['count']
-            
-            cursor.execute("""
-                SELECT 
-                    (SELECT COUNT(*) 
-                     FROM beneficier b 
-                     JOIN cas_social c ON b.id_cas_social = c.id_cas_social 
-                     WHERE c.statut = 'Résolu') + 
-                    (SELECT COUNT(*) FROM cas_social 
-                     WHERE statut = 'Résolu' 
-                     AND id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier)) 
-                as count
-            """)
-            beneficiaries_count = cursor.fetchone()['count']
+            ngos_count = sum(ong_status_counts(cursor).values())
+            cases_count = case_overview(cursor, status=None)['total_cases']
+            beneficiaries_count = beneficiary_stats(cursor, breakdown=False)['total']
             
             # Fetch pending social cases
             cursor.execute("""
@@ -1416,7 +1277,22 @@ def admin_dashboard():
     return render_template('index.html', counts=counts, pending_cases=pending_cases, pending_ongs=pending_ongs)
 
 
+# Account by email with its admin or ONG profile (users.email is unique,
+# ong.user_id / administrateur.user_id are indexed by their foreign keys)
+LOGIN_QUERY = """
+    SELECT u.id, u.email, u.password_hash, u.role, u.must_change_password,
+           a.id_admin, a.nom,
+           o.id_ong, o.nom_ong, o.email as ong_email, o.logo_url, o.statut_de_validation
+    FROM users u
+    LEFT JOIN administrateur a ON a.user_id = u.id
+    LEFT JOIN ong o ON o.user_id = u.id
+    WHERE u.email = %s
+    ORDER BY o.id_ong
+    LIMIT 1
+"""
+
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', account=request_field('email'))
 def unified_login():
     if request.method == 'POST':
         email = request.form['email']
@@ -1425,35 +1301,21 @@ def unified_login():
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Query the unified users table
-                cursor.execute("SELECT * FROM users WHERE email=%s", (email,))
+                # One lookup: the account with its admin or ONG profile
+                cursor.execute(LOGIN_QUERY, (email,))
                 user = cursor.fetchone()
                 
                 if user:
-                    # Verify password (supports both hashed and legacy plain-text migration)
-                    password_valid = False
-                    db_password = user['password_hash']
-                    
-                    if db_password.startswith('scrypt:') or db_password.startswith('pbkdf2:'):
-                        password_valid = check_password_hash(db_password, password)
-                    elif db_password == password:
-                        # Migrate plain-text password to hash
-                        new_hash = generate_password_hash(password)
-                        cursor.execute("UPDATE users SET password_hash=%s WHERE id=%s", (new_hash, user['id']))
-                        conn.commit()
-                        password_valid = True
+                    # Verify password (plain-text and outdated hashes are upgraded)
+                    password_valid = check_user_password(conn, user, password)
                     
                     if password_valid:
                         if user['role'] == 'admin':
-                            # Fetch admin profile
-                            cursor.execute("SELECT * FROM administrateur WHERE user_id=%s", (user['id'],))
-                            admin = cursor.fetchone()
-                            
-                            if admin:
+                            if user['id_admin']:
                                 session['user_type'] = 'admin'
-                                session['user_id'] = admin['id_admin']
+                                session['user_id'] = user['id_admin']
                                 session['auth_user_id'] = user['id']  # Store users table ID
-                                session['user_name'] = admin['nom']
+                                session['user_name'] = user['nom']
                                 
                                 if user.get('must_change_password', 0) == 1:
                                     return redirect(url_for('change_password'))
@@ -1465,18 +1327,14 @@ def unified_login():
                                 return redirect(url_for('unified_login'))
                         
                         elif user['role'] == 'ong':
-                            # Fetch ONG profile
-                            cursor.execute("SELECT * FROM ong WHERE user_id=%s", (user['id'],))
-                            ong = cursor.fetchone()
-                            
-                            if ong:
-                                status = ong.get('statut_de_validation', 'enattente')
+                            if user['id_ong']:
+                                status = user.get('statut_de_validation') or 'enattente'
                                 
                                 if status == 'validé':
                                     session['user_type'] = 'ong'
-                                    session['user_id'] = ong['id_ong']
+                                    session['user_id'] = user['id_ong']
                                     session['auth_user_id'] = user['id']
-                                    session['user_name'] = ong['nom_ong']
+                                    session['user_name'] = user['nom_ong']
                                     
                                     if user.get('must_change_password', 0) == 1:
                                          return redirect(url_for('change_password'))
@@ -1514,24 +1372,27 @@ def change_password():
             flash(TRANSLATIONS[session.get('lang', 'ar')]['passwords_do_not_match'], 'danger')
             return redirect(request.url)
             
-        hashed_pw = generate_password_hash(new_password)
+        hashed_pw = hash_password(new_password)
         auth_user_id = session.get('auth_user_id')  # Use the users table ID
         user_type = session.get('user_type')
         
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Update the unified users table
-                if auth_user_id:
-                    cursor.execute("UPDATE users SET password_hash=%s, must_change_password=0 WHERE id=%s", (hashed_pw, auth_user_id))
-                else:
-                    # Fallback for legacy sessions (before migration)
-                    user_id = session.get('user_id')
+                if not auth_user_id:
+                    # Sessions opened before auth_user_id was stored: find the account
                     if user_type == 'ong':
-                        cursor.execute("UPDATE ong SET mot_de_passe=%s, must_change_password=0 WHERE id_ong=%s", (hashed_pw, user_id))
-                    elif user_type == 'admin':
-                        cursor.execute("UPDATE administrateur SET mot_de_passe=%s, must_change_password=0 WHERE id_admin=%s", (hashed_pw, user_id))
+                        cursor.execute("SELECT user_id FROM ong WHERE id_ong=%s", (session.get('user_id'),))
+                    else:
+                        cursor.execute("SELECT user_id FROM administrateur WHERE id_admin=%s", (session.get('user_id'),))
+                    row = cursor.fetchone()
+                    auth_user_id = row['user_id'] if row else None
+                    session['auth_user_id'] = auth_user_id
+                # Update the unified users table (the only credential store)
+                cursor.execute("UPDATE users SET password_hash=%s, must_change_password=0 WHERE id=%s", (hashed_pw, auth_user_id))
+                generation = revoke_user_tokens(cursor, auth_user_id)
             conn.commit()
+            apply_revocation(auth_user_id, generation)
             
             flash(TRANSLATIONS[session.get('lang', 'ar')]['success_edit'], 'success')
             
@@ -1550,6 +1411,7 @@ def change_password():
 
 
 @app.route('/api/verify_ong_password', methods=['POST'])
+@rate_limited('login', account=request_field('ong_id'))
 def verify_ong_password():
     data = request.get_json()
     ong_id = data.get('ong_id')
@@ -1561,11 +1423,7 @@ def verify_ong_password():
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Note: storing passwords in plain text as per existing implementation
-            cursor.execute("SELECT id_ong, mot_de_passe FROM ong WHERE id_ong=%s", (ong_id,))
-            result = cursor.fetchone()
-            
-            if result and check_and_migrate_password(conn, 'ong', 'id_ong', result['id_ong'], password, result['mot_de_passe']):
+            if check_account_password(conn, 'ong', 'id_ong', ong_id, password):
                 # Set authorization in session for Edit actions
                 session['authorized_ong_id'] = int(ong_id)
                 return {'success': True}
@@ -1575,6 +1433,7 @@ def verify_ong_password():
         conn.close()
 
 @app.route('/api/verify_admin_credentials', methods=['POST'])
+@rate_limited('login', account=request_field('email'))
 def verify_admin_credentials():
     data = request.get_json()
     email = data.get('email')
@@ -1586,11 +1445,10 @@ def verify_admin_credentials():
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Todo: hash check in production
-            cursor.execute("SELECT * FROM administrateur WHERE email=%s", (email,))
+            cursor.execute("SELECT id, password_hash FROM users WHERE email=%s AND role='admin'", (email,))
             admin = cursor.fetchone()
             
-            if admin and check_and_migrate_password(conn, 'administrateur', 'id_admin', admin['id_admin'], password, admin['mot_de_passe']):
+            if admin and check_user_password(conn, admin, password):
                 return {'success': True}
             else:
                 return {'success': False, 'message': 'Invalid credentials'}, 401
@@ -1602,7 +1460,9 @@ def verify_admin_credentials():
 def approve_case(id):
     with get_db() as conn:
         with conn.cursor() as cursor:
+            remove_case_counts(cursor, [id])
             cursor.execute("UPDATE cas_social SET statut_approbation = 'approuvé' WHERE id_cas_social = %s", (id,))
+            add_case_counts(cursor, [id])
             
             # Trigger Notification
             cursor.execute("SELECT titre FROM cas_social WHERE id_cas_social = %s", (id,))
@@ -1615,6 +1475,7 @@ def approve_case(id):
                 """, (id, f"Nouveau cas social publié : {case_title}", f"تم نشر حالة اجتماعية جديدة: {case_title}"))
                 
         conn.commit()
+        invalidate_cache('case')
     flash(TRANSLATIONS[session.get('lang', 'ar')]['case_approved'], 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -1624,21 +1485,10 @@ def reject_case(id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # 1. Clean Media Files
-            cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (id,))
-            media_files = cursor.fetchall()
-            for media in media_files:
-                if media['file_url']:
-                    file_path = os.path.join('static', media['file_url'])
-                    if os.path.exists(file_path):
-                        try: os.remove(file_path)
-                        except: pass
-            
-            # 2. Delete Database Records (Order matters for FK)
-            cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (id,))
-            cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (id,))
-            cursor.execute("DELETE FROM cas_social WHERE id_cas_social = %s", (id,))
+            # Rows now, media files by the job worker once committed
+            delete_cases(cursor, [id])
         conn.commit()
+        invalidate_cache('case', 'media')
     finally:
         conn.close()
     flash('Cas social rejeté et supprimé avec succès.', 'success')
@@ -1690,8 +1540,7 @@ def api_admin_pending_cases(admin_user_id):
                 cursor.execute("""
                     SELECT c.id_cas_social, c.titre, c.description, c.wilaya, c.moughataa,
                            c.adresse, c.date_publication, c.statut, c.category_id,
-                           o.nom_ong, cat.nomCategorie,
-                           (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as first_image
+                           o.nom_ong, cat.nomCategorie, COALESCE(c.cover_thumb_url, c.cover_url) as first_image
                     FROM cas_social c
                     LEFT JOIN ong o ON c.id_ong = o.id_ong
                     LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
@@ -1727,8 +1576,11 @@ def api_admin_approve_ong(admin_user_id, id):
     try:
         with get_db() as conn:
             with conn.cursor() as cursor:
+                remove_ong_counts(cursor, [id])
                 cursor.execute("UPDATE ong SET statut_de_validation = 'validé' WHERE id_ong = %s", (id,))
+                add_ong_counts(cursor, [id])
             conn.commit()
+            invalidate_cache('ong')
         return jsonify({'success': True, 'message': 'ONG approved successfully'})
     except Exception as e:
         print(f"Error approving ONG: {e}")
@@ -1741,45 +1593,11 @@ def api_admin_reject_ong(admin_user_id, id):
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Same logic as web version - hard delete
-                # 1. Clean up cases and their media
-                cursor.execute("SELECT id_cas_social FROM cas_social WHERE id_ong=%s", (id,))
-                cases = cursor.fetchall()
-                
-                for case in cases:
-                    case_id = case['id_cas_social']
-                    
-                    # Delete media files
-                    cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (case_id,))
-                    media_files = cursor.fetchall()
-                    for media in media_files:
-                        if media['file_url']:
-                            file_path = os.path.join('static', media['file_url'])
-                            if os.path.exists(file_path):
-                                try: os.remove(file_path)
-                                except: pass
-                    cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (case_id,))
-                    cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (case_id,))
-                    cursor.execute("DELETE FROM cas_social WHERE id_cas_social=%s", (case_id,))
-                
-                # 2. Clean up ONG files
-                cursor.execute("SELECT logo_url, verification_doc_url FROM ong WHERE id_ong=%s", (id,))
-                ong_data = cursor.fetchone()
-                if ong_data:
-                    if ong_data.get('logo_url'):
-                        logo_path = os.path.join('static', ong_data['logo_url'])
-                        if os.path.exists(logo_path):
-                            try: os.remove(logo_path)
-                            except: pass
-                    if ong_data.get('verification_doc_url'):
-                        doc_path = os.path.join('static', ong_data['verification_doc_url'])
-                        if os.path.exists(doc_path):
-                            try: os.remove(doc_path)
-                            except: pass
-                
-                # 3. Delete ONG
-                cursor.execute("DELETE FROM ong WHERE id_ong=%s", (id,))
+                # Same logic as web version - hard delete of the ONG, its cases,
+                # media and account; files are removed by the job worker
+                delete_ongs(cursor, [id])
                 conn.commit()
+                invalidate_cache('ong', 'case', 'media')
             
             return jsonify({'success': True, 'message': 'ONG rejected and deleted'})
         finally:
@@ -1794,7 +1612,9 @@ def api_admin_approve_case(admin_user_id, id):
     try:
         with get_db() as conn:
             with conn.cursor() as cursor:
+                remove_case_counts(cursor, [id])
                 cursor.execute("UPDATE cas_social SET statut_approbation = 'approuvé' WHERE id_cas_social = %s", (id,))
+                add_case_counts(cursor, [id])
                 
                 # Trigger Notification
                 cursor.execute("SELECT titre FROM cas_social WHERE id_cas_social = %s", (id,))
@@ -1807,6 +1627,7 @@ def api_admin_approve_case(admin_user_id, id):
                     """, (id, f"Nouveau cas social publié : {case_title}", f"تم نشر حالة اجتماعية جديدة: {case_title}"))
                     
             conn.commit()
+            invalidate_cache('case')
         return jsonify({'success': True, 'message': 'Case approved successfully'})
     except Exception as e:
         print(f"Error approving case: {e}")
@@ -1819,21 +1640,10 @@ def api_admin_reject_case(admin_user_id, id):
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Clean media files
-                cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (id,))
-                media_files = cursor.fetchall()
-                for media in media_files:
-                    if media['file_url']:
-                        file_path = os.path.join('static', media['file_url'])
-                        if os.path.exists(file_path):
-                            try: os.remove(file_path)
-                            except: pass
-                
-                # Delete records
-                cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (id,))
-                cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (id,))
-                cursor.execute("DELETE FROM cas_social WHERE id_cas_social = %s", (id,))
+                # Rows now, media files by the job worker once committed
+                delete_cases(cursor, [id])
                 conn.commit()
+                invalidate_cache('case', 'media')
             
             return jsonify({'success': True, 'message': 'Case rejected and deleted'})
         finally:
@@ -1842,6 +1652,42 @@ def api_admin_reject_case(admin_user_id, id):
         print(f"Error rejecting case: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/admin/db-pool', methods=['GET'])
+@admin_token_required
+def api_admin_db_pool(admin_user_id):
+    """Connection pool metrics for this worker process"""
+    return jsonify({'success': True, 'data': pool_stats()})
+
+@app.route('/api/admin/cache', methods=['GET'])
+@admin_token_required
+def api_admin_cache(admin_user_id):
+    """Response cache hit/miss counters for this worker process"""
+    return jsonify({'success': True, 'data': cache_stats()})
+
+@app.route('/api/admin/auth-cache', methods=['GET'])
+@admin_token_required
+def api_admin_auth_cache(admin_user_id):
+    """Token verification cache and revocation counters for this worker process"""
+    return jsonify({'success': True, 'data': token_cache_stats()})
+
+@app.route('/api/admin/password-hashing', methods=['GET'])
+@admin_token_required
+def api_admin_password_hashing(admin_user_id):
+    """Password hashing pool counters and login hash timings for this worker process"""
+    return jsonify({'success': True, 'data': password_stats()})
+
+@app.route('/api/admin/rate-limits', methods=['GET'])
+@admin_token_required
+def api_admin_rate_limits(admin_user_id):
+    """Allowed / rate-limited login and reset calls for this worker process"""
+    return jsonify({'success': True, 'data': rate_limit_stats()})
+
+@app.route('/api/admin/mail', methods=['GET'])
+@admin_token_required
+def api_admin_mail(admin_user_id):
+    """Mail sent / failed and SMTP connection counters for this worker process"""
+    return jsonify({'success': True, 'data': mail_stats()})
+
 
 # --- CRUD Routes ---
 
@@ -1862,7 +1708,7 @@ def add_admin():
         with get_db() as conn:
             with conn.cursor() as cursor:
                 email = request.form['email']
-                hashed_pw = generate_password_hash(request.form['mot_de_passe'])
+                hashed_pw = hash_password(request.form['mot_de_passe'])
                 
                 # 1. Insert into users table first
                 cursor.execute(
@@ -1872,8 +1718,8 @@ def add_admin():
                 new_user_id = cursor.lastrowid
                 
                 # 2. Insert into administrateur with user_id link
-                sql = "INSERT INTO administrateur (nom, email, mot_de_passe, user_id) VALUES (%s, %s, %s, %s)"
-                cursor.execute(sql, (request.form['nom'], email, hashed_pw, new_user_id))
+                sql = "INSERT INTO administrateur (nom, email, user_id) VALUES (%s, %s, %s)"
+                cursor.execute(sql, (request.form['nom'], email, new_user_id))
             conn.commit()
             flash(TRANSLATIONS[session.get('lang', 'ar')]['success_add'], 'success')
         return redirect(url_for('list_admins'))
@@ -1888,20 +1734,23 @@ def edit_admin(id):
         if request.method == 'POST':
             with conn.cursor() as cursor:
                 email = request.form['email']
-                hashed_pw = generate_password_hash(request.form['mot_de_passe'])
+                hashed_pw = hash_password(request.form['mot_de_passe'])
                 
-                sql = "UPDATE administrateur SET nom=%s, email=%s, mot_de_passe=%s WHERE id_admin=%s"
-                cursor.execute(sql, (request.form['nom'], email, hashed_pw, id))
+                sql = "UPDATE administrateur SET nom=%s, email=%s WHERE id_admin=%s"
+                cursor.execute(sql, (request.form['nom'], email, id))
                 
-                # Sync to unified users table
+                # Login email and password live in the users table
                 cursor.execute("SELECT user_id FROM administrateur WHERE id_admin=%s", (id,))
-                admin_row = cursor.fetchone()
-                if admin_row and admin_row['user_id']:
-                    cursor.execute(
-                        "UPDATE users SET email=%s, password_hash=%s WHERE id=%s",
-                        (email, hashed_pw, admin_row['user_id'])
-                    )
+                admin = cursor.fetchone()
+                user_id = admin['user_id'] if admin else None
+                generation = None
+                if user_id:
+                    cursor.execute("UPDATE users SET email=%s, password_hash=%s WHERE id=%s",
+                                   (email, hashed_pw, user_id))
+                    # Log out the mobile sessions opened with the old password
+                    generation = revoke_user_tokens(cursor, user_id)
             conn.commit()
+            apply_revocation(user_id, generation)
             flash(TRANSLATIONS[session.get('lang', 'ar')]['success_edit'], 'success')
             return redirect(url_for('list_admins'))
         else:
@@ -1953,10 +1802,10 @@ def admin_ong_action(action, id):
             conn = get_db_connection()
             try:
                 with conn.cursor() as cursor:
-                     cursor.execute("SELECT * FROM administrateur WHERE email=%s", (email,))
+                     cursor.execute("SELECT id, password_hash FROM users WHERE email=%s AND role='admin'", (email,))
                      admin = cursor.fetchone()
                      
-                     if not admin or not check_and_migrate_password(conn, 'administrateur', 'id_admin', admin['id_admin'], password, admin['mot_de_passe']):
+                     if not admin or not check_user_password(conn, admin, password):
                           flash("Identifiants administrateur incorrects.", "danger")
                           return redirect(url_for('list_ngos'))
             finally:
@@ -1968,54 +1817,19 @@ def admin_ong_action(action, id):
             with conn.cursor() as cursor:
                 if action == 'validate':
                     new_status = 'validé'
+                    remove_ong_counts(cursor, [id])
                     cursor.execute("UPDATE ong SET statut_de_validation=%s WHERE id_ong=%s", (new_status, id))
+                    add_ong_counts(cursor, [id])
                     conn.commit()
+                    invalidate_cache('ong')
                     flash(f"Statut de l'ONG mis à jour: {new_status}", 'success')
                 
                 elif action == 'reject':
-                    # Logique de suppression (Hard Delete)
-                    # 1. Nettoyer les fichiers et enregistrements dépendants
-                    cursor.execute("SELECT id_cas_social FROM cas_social WHERE id_ong=%s", (id,))
-                    cases = cursor.fetchall()
-                    
-                    for case in cases:
-                        case_id = case['id_cas_social']
-                        
-                        # A. Supprimer fichiers et enregistrements MEDIA
-                        cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (case_id,))
-                        media_files = cursor.fetchall()
-                        for media in media_files:
-                            if media['file_url']:
-                                file_path = os.path.join('static', media['file_url'])
-                                if os.path.exists(file_path):
-                                    try: os.remove(file_path)
-                                    except: pass
-                        cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (case_id,))
-
-                        # B. Supprimer enregistrements BENEFICIER
-                        cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (case_id,))
-
-                        # C. Supprimer le CAS SOCIAL
-                        cursor.execute("DELETE FROM cas_social WHERE id_cas_social=%s", (case_id,))
-
-                    # 2. Nettoyer les fichiers de l'ONG elle-même (Logo, Doc Verif)
-                    cursor.execute("SELECT logo_url, verification_doc_url FROM ong WHERE id_ong=%s", (id,))
-                    ong_data = cursor.fetchone()
-                    if ong_data:
-                        if ong_data.get('logo_url'):
-                            logo_path = os.path.join('static', ong_data['logo_url'])
-                            if os.path.exists(logo_path):
-                                try: os.remove(logo_path)
-                                except: pass
-                        if ong_data.get('verification_doc_url'):
-                            doc_path = os.path.join('static', ong_data['verification_doc_url'])
-                            if os.path.exists(doc_path):
-                                try: os.remove(doc_path)
-                                except: pass
-
-                    # 3. Supprimer l'ONG (Maintenant que les enfants sont supprimés)
-                    cursor.execute("DELETE FROM ong WHERE id_ong=%s", (id,))
+                    # Logique de suppression (Hard Delete) : ONG, cas, médias et compte,
+                    # fichiers supprimés par le worker après le commit
+                    delete_ongs(cursor, [id])
                     conn.commit()
+                    invalidate_cache('ong', 'case', 'media')
                     flash("ONG rejetée et supprimée avec succès.", 'success')
                 
                 else:
@@ -2051,30 +1865,43 @@ def api_ong_stats():
     
     with get_db() as conn:
         with conn.cursor() as cursor:
-            query = "SELECT * FROM ong WHERE 1=1"
-            params = []
-            
             if category:
-                query += " AND domaine_intervation LIKE %s"
-                params.append(f"%{category}%")
-            if status:
-                query += " AND statut_de_validation = %s"
-                params.append(status)
-                
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            total = len(results)
-            valid = sum(1 for r in results if r['statut_de_validation'] == 'validé')
-            pending = sum(1 for r in results if r['statut_de_validation'] == 'enattente')
-            rejected = sum(1 for r in results if r['statut_de_validation'] == 'rejetée')
+                # Cross-domain breakdown of the ONGs working in `category`:
+                # computed live over the ong_domain join table
+                where = [domain_filter_sql('o')]
+                params = [category]
+                if status:
+                    where.append("o.statut_de_validation = %s")
+                    params.append(status)
+                where = ' AND '.join(where)
+
+                cursor.execute(f"""
+                    SELECT o.statut_de_validation, COUNT(*) as count
+                    FROM ong o WHERE {where}
+                    GROUP BY o.statut_de_validation
+                """, params)
+                by_status = {r['statut_de_validation']: r['count'] for r in cursor.fetchall()}
+
+                cursor.execute(f"""
+                    SELECT cat.nomCategorie, COUNT(*) as count
+                    FROM ong o
+                    JOIN ong_domain od ON od.id_ong = o.id_ong
+                    JOIN categorie cat ON cat.idCategorie = od.idCategorie
+                    WHERE {where}
+                    GROUP BY cat.idCategorie, cat.nomCategorie
+                """, params)
+                by_category = {r['nomCategorie']: r['count'] for r in cursor.fetchall()}
+            else:
+                # Materialized counters (see stats_summary.py)
+                by_status = ong_status_counts(cursor)
+                if status:
+                    by_status = {status: by_status.get(status, 0)}
+                by_category = ong_domain_counts(cursor, status or None)
             
-            by_category = {}
-            for r in results:
-                domains = [d.strip() for d in r['domaine_intervation'].split(',')]
-                for d in domains:
-                    if d:
-                        by_category[d] = by_category.get(d, 0) + 1
+            total = sum(by_status.values())
+            valid = by_status.get('validé', 0)
+            pending = by_status.get('enattente', 0)
+            rejected = by_status.get('rejetée', 0)
             
             lang_code = session.get('lang', 'ar')
             t = TRANSLATIONS[lang_code]
@@ -2113,7 +1940,7 @@ def api_register_ong():
                 if cursor.fetchone():
                     return jsonify({'success': False, 'message': 'Email already exists'}), 400
                 
-                hashed_password = generate_password_hash(password)
+                hashed_password = hash_password(password)
                 
                 # 1. Insert into users table first
                 cursor.execute(
@@ -2124,8 +1951,8 @@ def api_register_ong():
                 
                 # 2. Insert into ong table with user_id link
                 sql = """
-                    INSERT INTO ong (nom_ong, adresse, telephone, email, domaine_intervation, mot_de_passe, statut_de_validation, user_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    INSERT INTO ong (nom_ong, adresse, telephone, email, domaine_intervation, statut_de_validation, user_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """
                 cursor.execute(sql, (
                     request.form['nom_ong'],
@@ -2133,32 +1960,29 @@ def api_register_ong():
                     request.form['telephone'],
                     email,
                     domains,
-                    hashed_password,  # Keep for legacy/fallback
                     'enattente',
                     new_user_id
                 ))
                 ong_id = cursor.lastrowid
+                set_ong_domains(cursor, ong_id, parse_domains(domains))
+                add_ong_counts(cursor, [ong_id])
                 
                 # Handle Logo Upload
                 if 'logo' in request.files:
                     file = request.files['logo']
                     if file and file.filename != '':
                         filename = secure_filename(file.filename)
-                        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                        unique_filename = f"logo_{timestamp}_{filename}"
-                        file_path = os.path.join(app.config['LOGO_FOLDER'], unique_filename)
-                        file.save(file_path)
-                        
-                        web_path = f"uploads/logos/{unique_filename}"
-                        cursor.execute("UPDATE ong SET logo_url=%s WHERE id_ong=%s", (web_path, ong_id))
+                        unique_filename = f"logo_{uuid.uuid4().hex}_{filename}"
+                        logo_url = store_upload(file, app.config['LOGO_FOLDER'], 'uploads/logos', unique_filename)
+                        cursor.execute("UPDATE ong SET logo_url=%s WHERE id_ong=%s", (logo_url, ong_id))
+                        enqueue(cursor, 'process_logo', {'ong_id': ong_id, 'logo_url': logo_url})
 
                 # Handle Verification Doc Upload
                 if 'verification_doc' in request.files:
                     file = request.files['verification_doc']
                     if file and file.filename != '':
                         filename = secure_filename(file.filename)
-                        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                        unique_filename = f"doc_{timestamp}_{filename}"
+                        unique_filename = f"doc_{uuid.uuid4().hex}_{filename}"
                         file_path = os.path.join(app.config['DOCS_FOLDER'], unique_filename)
                         file.save(file_path)
                         
@@ -2166,6 +1990,7 @@ def api_register_ong():
                         cursor.execute("UPDATE ong SET verification_doc_url=%s WHERE id_ong=%s", (web_path, ong_id))
 
             conn.commit()
+            invalidate_cache('ong')
             
             return jsonify({'success': True, 'message': 'Account created successfully', 'ong_id': ong_id})
             
@@ -2189,7 +2014,7 @@ def add_ong():
                     domains_str = ','.join(domains) if domains else ''
                     
                     email = request.form['email']
-                    hashed_password = generate_password_hash(request.form['mot_de_passe'])
+                    hashed_password = hash_password(request.form['mot_de_passe'])
                     
                     # 1. Insert into users table first
                     cursor.execute(
@@ -2200,8 +2025,8 @@ def add_ong():
                     
                     # 2. Insert into ong table with user_id link
                     sql = """
-                        INSERT INTO ong (nom_ong, adresse, telephone, email, domaine_intervation, mot_de_passe, statut_de_validation, user_id)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                        INSERT INTO ong (nom_ong, adresse, telephone, email, domaine_intervation, statut_de_validation, user_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
                     """
                     cursor.execute(sql, (
                         request.form['nom_ong'],
@@ -2209,32 +2034,29 @@ def add_ong():
                         request.form['telephone'],
                         email,
                         domains_str,
-                        hashed_password,  # Keep for legacy/fallback
                         'enattente',
                         new_user_id
                     ))
                     ong_id = cursor.lastrowid
+                    set_ong_domains(cursor, ong_id, domains)
+                    add_ong_counts(cursor, [ong_id])
                     
                     # Handle Logo Upload
                     if 'logo' in request.files:
                         file = request.files['logo']
                         if file and file.filename != '':
                             filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                            unique_filename = f"logo_{timestamp}_{filename}"
-                            file_path = os.path.join(app.config['LOGO_FOLDER'], unique_filename)
-                            file.save(file_path)
-                            
-                            web_path = f"uploads/logos/{unique_filename}"
-                            cursor.execute("UPDATE ong SET logo_url=%s WHERE id_ong=%s", (web_path, ong_id))
+                            unique_filename = f"logo_{uuid.uuid4().hex}_{filename}"
+                            logo_url = store_upload(file, app.config['LOGO_FOLDER'], 'uploads/logos', unique_filename)
+                            cursor.execute("UPDATE ong SET logo_url=%s WHERE id_ong=%s", (logo_url, ong_id))
+                            enqueue(cursor, 'process_logo', {'ong_id': ong_id, 'logo_url': logo_url})
 
                     # Handle Verification Doc Upload
                     if 'verification_doc' in request.files:
                         file = request.files['verification_doc']
                         if file and file.filename != '':
                             filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                            unique_filename = f"doc_{timestamp}_{filename}"
+                            unique_filename = f"doc_{uuid.uuid4().hex}_{filename}"
                             file_path = os.path.join(app.config['DOCS_FOLDER'], unique_filename)
                             file.save(file_path)
                             
@@ -2242,6 +2064,7 @@ def add_ong():
                             cursor.execute("UPDATE ong SET verification_doc_url=%s WHERE id_ong=%s", (web_path, ong_id))
 
                 conn.commit()
+                invalidate_cache('ong')
                 
                 flash('Compte créé avec succès! Votre compte est en attente de validation par un administrateur.', 'info')
                 return redirect(url_for('ong_login'))
@@ -2281,51 +2104,51 @@ def edit_ong(id):
                     domains_str = ','.join(domains) if domains else ''
                     
                     # Hash the password before storing
-                    hashed_pw = generate_password_hash(request.form['mot_de_passe'])
+                    hashed_pw = hash_password(request.form['mot_de_passe'])
                     
                     sql = """
-                        UPDATE ong SET nom_ong=%s, adresse=%s, telephone=%s, email=%s, domaine_intervation=%s, mot_de_passe=%s
+                        UPDATE ong SET nom_ong=%s, adresse=%s, telephone=%s, email=%s, domaine_intervation=%s
                         WHERE id_ong=%s
                     """
+                    remove_ong_counts(cursor, [id])
                     cursor.execute(sql, (
                         request.form['nom_ong'],
                         request.form['adresse'],
                         request.form['telephone'],
                         request.form['email'],
                         domains_str,
-                        hashed_pw,
                         id
                     ))
+                    set_ong_domains(cursor, id, domains)
+                    add_ong_counts(cursor, [id])
                     
-                    # Sync password and email to unified users table
+                    # Login email and password live in the users table
                     cursor.execute("SELECT user_id FROM ong WHERE id_ong=%s", (id,))
-                    ong_row = cursor.fetchone()
-                    if ong_row and ong_row.get('user_id'):
-                        cursor.execute(
-                            "UPDATE users SET email=%s, password_hash=%s WHERE id=%s",
-                            (request.form['email'], hashed_pw, ong_row['user_id'])
-                        )
+                    row = cursor.fetchone()
+                    user_id = row['user_id'] if row else None
+                    generation = None
+                    if user_id:
+                        cursor.execute("UPDATE users SET email=%s, password_hash=%s WHERE id=%s",
+                                       (request.form['email'], hashed_pw, user_id))
+                        # Log out the mobile sessions opened with the old password
+                        generation = revoke_user_tokens(cursor, user_id)
                 
                     # Handle Logo Upload Update
                     if 'logo' in request.files:
                         file = request.files['logo']
                         if file and file.filename != '':
                             filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                            unique_filename = f"logo_{timestamp}_{filename}"
-                            file_path = os.path.join(app.config['LOGO_FOLDER'], unique_filename)
-                            file.save(file_path)
-                            
-                            web_path = f"uploads/logos/{unique_filename}"
-                            cursor.execute("UPDATE ong SET logo_url=%s WHERE id_ong=%s", (web_path, id))
+                            unique_filename = f"logo_{uuid.uuid4().hex}_{filename}"
+                            logo_url = store_upload(file, app.config['LOGO_FOLDER'], 'uploads/logos', unique_filename)
+                            cursor.execute("UPDATE ong SET logo_url=%s WHERE id_ong=%s", (logo_url, id))
+                            enqueue(cursor, 'process_logo', {'ong_id': id, 'logo_url': logo_url})
 
                     # Handle Verification Doc Upload (Edit)
                     if 'verification_doc' in request.files:
                         file = request.files['verification_doc']
                         if file and file.filename != '':
                             filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                            unique_filename = f"doc_{timestamp}_{filename}"
+                            unique_filename = f"doc_{uuid.uuid4().hex}_{filename}"
                             file_path = os.path.join(app.config['DOCS_FOLDER'], unique_filename)
                             file.save(file_path)
                             
@@ -2333,6 +2156,8 @@ def edit_ong(id):
                             cursor.execute("UPDATE ong SET verification_doc_url=%s WHERE id_ong=%s", (web_path, id))
 
                 conn.commit()
+                apply_revocation(user_id, generation)
+                invalidate_cache('ong')
                 flash(TRANSLATIONS[session.get('lang', 'ar')]['success_edit'], 'success')
                 return redirect(url_for('list_ngos'))
             else:
@@ -2351,73 +2176,10 @@ def edit_ong(id):
             flash(f"Error: {e}", "danger")
             return redirect(url_for('list_ngos'))
 
-# --- EMAIL HELPER ---
-
-def send_reset_email(to_email, new_password):
-    """
-    Sends a password reset email via SMTP (HTML format).
-    """
-    subject = "Renouvellement de mot de passe / إعادة تعيين كلمة المرور - ONG Connect"
-    
-    # HTML Body with French and Arabic
-    html_body = f"""
-    <html>
-    <body>
-        <div style="font-family: Arial, sans-serif; direction: ltr;">
-            <p>Bonjour,</p>
-            <p>Votre mot de passe a été réinitialisé par un administrateur.</p>
-            <p>Voici votre nouveau mot de passe temporaire : <b style="font-size: 16px;">{new_password}</b></p>
-            <p>Veuillez vous connecter et changer ce mot de passe dès que possible.</p>
-            <p>Cordialement,<br>Équipe ONG Connect</p>
-        </div>
-        <hr>
-        <div style="font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; direction: rtl; text-align: right;">
-            <p>مرحباً،</p>
-            <p>تم إعادة تعيين كلمة المرور الخاصة بك بنجاح.</p>
-            <p>كلمة المرور المؤقتة الجديدة هي: <b style="font-size: 16px;">{new_password}</b></p>
-            <p>يرجى تسجيل الدخول وتغيير كلمة المرور في أقرب وقت ممكن.</p>
-            <p>مع تحيات،<br>فريق ONG Connect</p>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Real SMTP Implementation
-    try:
-        smtp_server = app.config['MAIL_SERVER']
-        smtp_port = app.config['MAIL_PORT']
-        sender_email = app.config['MAIL_USERNAME']
-        password = app.config['MAIL_PASSWORD']
-        
-        # Guard clause for placeholder password
-        if password == 'YOUR_APP_PASSWORD_HERE' or not password:
-            print("❌ Error: Email password not configured in config.py")
-            return False
-
-        msg = MIMEText(html_body, 'html', 'utf-8')
-        msg['Subject'] = subject
-        msg['From'] = sender_email
-        msg['To'] = to_email
-
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, password)
-            server.send_message(msg)
-            
-        print(f"✅ Email sent successfully to {to_email}")
-        return True
-    except Exception as e:
-        print(f"❌ Email Error: {e}")
-        return False
-
 @app.route('/admin/ong/<int:id>/reset-password', methods=['POST'])
 @admin_required
 def admin_reset_password(id):
     # Check handled by decorator
-        
-    # Generate random password (8-digit number)
-    new_password = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-    hashed_password = generate_password_hash(new_password)
     
     with get_db() as conn:
         with conn.cursor() as cursor:
@@ -2429,20 +2191,14 @@ def admin_reset_password(id):
                 flash("ONG introuvable.", "danger")
                 return redirect(url_for('list_ngos'))
                 
-            # 1. Update Legacy Table
-            cursor.execute("UPDATE ong SET mot_de_passe=%s, must_change_password=1 WHERE id_ong=%s", (hashed_password, id))
-            
-            # 2. Update Unified Users Table
-            if ong['user_id']:
-                cursor.execute(
-                    "UPDATE users SET password_hash=%s, must_change_password=1 WHERE id=%s", 
-                    (hashed_password, ong['user_id'])
-                )
-                
+            if not ong['user_id']:
+                flash("Cette ONG n'a pas de compte de connexion.", "danger")
+                return redirect(url_for('list_ngos'))
+
+            # The worker generates, stores and mails the temporary password:
+            # it is never written to the queue (see jobs.py)
+            enqueue(cursor, 'reset_password', {'user_id': ong['user_id'], 'to': ong['email']})
             conn.commit()
-        
-    # Send Email
-    send_reset_email(ong['email'], new_password)
     
     flash(f"Mot de passe réinitialisé pour {ong['nom_ong']}. Le nouveau mot de passe a été envoyé par email.", "success")
     return redirect(url_for('list_ngos'))
@@ -2467,10 +2223,7 @@ def delete_ong(id):
          conn = get_db_connection()
          try:
              with conn.cursor() as cursor:
-                 cursor.execute("SELECT id_ong, mot_de_passe FROM ong WHERE id_ong=%s", (id,))
-                 ong = cursor.fetchone()
-                 
-                 if not ong or not check_and_migrate_password(conn, 'ong', 'id_ong', ong['id_ong'], password, ong['mot_de_passe']):
+                 if not check_account_password(conn, 'ong', 'id_ong', id, password):
                      flash("Mot de passe incorrect.", "danger")
                      return redirect(url_for('list_ngos'))
          finally:
@@ -2478,38 +2231,10 @@ def delete_ong(id):
 
     with get_db() as conn:
         with conn.cursor() as cursor:
-            # 1. Fetch all cases for this ONG to clean up their media files
-            cursor.execute("SELECT id_cas_social FROM cas_social WHERE id_ong=%s", (id,))
-            cases = cursor.fetchall()
-            
-            for case in cases:
-                case_id = case['id_cas_social']
-                # Fetch media for each case
-                cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (case_id,))
-                media_files = cursor.fetchall()
-                for media in media_files:
-                    if media['file_url']:
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(media['file_url']))
-                        # Since file_url might be "uploads/media/...", basename ensures we target the right file in UPLOAD_FOLDER
-                        # Or safer:
-                        full_path = os.path.join('static', media['file_url'])
-                        if os.path.exists(full_path):
-                            try:
-                                os.remove(full_path)
-                            except Exception as e:
-                                print(f"Error deleting file {full_path}: {e}")
-
-            # 2. Fetch user_id before deleting ONG to clean up users table
-            cursor.execute("SELECT user_id FROM ong WHERE id_ong=%s", (id,))
-            ong_row = cursor.fetchone()
-            
-            # 3. Delete ONG (Cascade will remove cases and media DB records, but we cleaned files first)
-            cursor.execute("DELETE FROM ong WHERE id_ong=%s", (id,))
-            
-            # 4. Clean up unified users table
-            if ong_row and ong_row.get('user_id'):
-                cursor.execute("DELETE FROM users WHERE id=%s", (ong_row['user_id'],))
+            # ONG, cases, media and users row; files removed after commit
+            delete_ongs(cursor, [id])
             conn.commit()
+            invalidate_cache('ong', 'case', 'media')
             
     flash(TRANSLATIONS[session.get('lang', 'ar')]['success_delete'], 'success')
     return redirect(url_for('list_ngos'))
@@ -2528,8 +2253,7 @@ def detail_ong(id):
                 
             # Fetch associated social cases with their first image (Only Approved)
             cursor.execute("""
-                SELECT c.*, 
-                       (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as first_image
+                SELECT c.*, COALESCE(c.cover_thumb_url, c.cover_url) as first_image
                 FROM cas_social c
                 WHERE c.id_ong=%s AND c.statut_approbation = 'approuvé'
             """, (id,))
@@ -2600,25 +2324,19 @@ def add_case():
                         request.form['category_id']
                     ))
                     case_id = cursor.lastrowid
+                    add_case_counts(cursor, [case_id])
+                    index_cases(cursor, [case_id])
 
                     # Handle Media Uploads
                     if 'media' in request.files:
                         files = request.files.getlist('media')
                         for file in files:
                             if file and file.filename != '':
-                                filename = secure_filename(file.filename)
-                                # Create unique filename to prevent overwrites
-                                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                                unique_filename = f"{timestamp}_{filename}"
-                                file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                                file.save(file_path)
-
-                                # Save to media table
-                                # URL path relative to static folder
-                                web_path = f"uploads/media/{unique_filename}"
-                                media_sql = "INSERT INTO media (id_cas_social, file_url, description_media) VALUES (%s, %s, %s)"
-                                cursor.execute(media_sql, (case_id, web_path, "Media for case " + str(case_id)))
+                                # Stored once per content (SHA-256 name), see media_store.py
+                                file_url = store_media(cursor, file, app.config['UPLOAD_FOLDER'], 'uploads/media')
+                                insert_media(cursor, case_id, file_url, "Media for case " + str(case_id))
                 conn.commit()
+                invalidate_cache('case', 'media')
                 
                 # Get the ONG ID to redirect to their profile
                 # ong_id variable is effectively id_ong
@@ -2698,6 +2416,7 @@ def edit_case(id):
                         WHERE id_cas_social=%s
                     """
                     
+                    remove_case_counts(cursor, [id])
                     cursor.execute(sql, (
                         request.form['titre'],
                         request.form['description'],
@@ -2710,23 +2429,20 @@ def edit_case(id):
                         request.form['category_id'],
                         id
                     ))
+                    add_case_counts(cursor, [id])
+                    index_cases(cursor, [id])
 
                     # Handle New Media Uploads
                     if 'media' in request.files:
                         files = request.files.getlist('media')
                         for file in files:
                             if file and file.filename != '':
-                                filename = secure_filename(file.filename)
-                                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                                unique_filename = f"{timestamp}_{filename}"
-                                file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                                file.save(file_path)
-
-                                web_path = f"uploads/media/{unique_filename}"
-                                media_sql = "INSERT INTO media (id_cas_social, file_url, description_media) VALUES (%s, %s, %s)"
-                                cursor.execute(media_sql, (id, web_path, "Media for case " + str(id)))
+                                # Stored once per content (SHA-256 name), see media_store.py
+                                file_url = store_media(cursor, file, app.config['UPLOAD_FOLDER'], 'uploads/media')
+                                insert_media(cursor, id, file_url, "Media for case " + str(id))
 
                 conn.commit()
+                invalidate_cache('case', 'media')
                 flash(TRANSLATIONS[session.get('lang', 'ar')]['success_edit'], 'success')
                 return redirect(url_for('list_cases'))
             else:
@@ -2781,11 +2497,14 @@ def update_case_status(id):
                     if not case or case['id_ong'] != session.get('user_id'):
                         return {'success': False, 'message': 'Unauthorized'}, 403
                 
+                remove_case_counts(cursor, [id])
                 cursor.execute(
                     "UPDATE cas_social SET statut=%s WHERE id_cas_social=%s",
                     (new_status, id)
                 )
+                add_case_counts(cursor, [id])
             conn.commit()
+            invalidate_cache('case')
         
         return {'success': True, 'message': 'Status updated successfully'}
     except Exception as e:
@@ -2815,34 +2534,14 @@ def delete_case(id):
                     flash("Mot de passe requis.", "danger")
                     return redirect(request.referrer or url_for('public_dashboard'))
                     
-                cursor.execute("SELECT id_ong, mot_de_passe FROM ong WHERE id_ong=%s", (ong_id,))
-                ong = cursor.fetchone()
-                
-                if not ong or not check_and_migrate_password(conn, 'ong', 'id_ong', ong['id_ong'], password, ong['mot_de_passe']):
+                if not check_account_password(conn, 'ong', 'id_ong', ong_id, password):
                     flash("Mot de passe incorrect.", "danger")
                     return redirect(request.referrer or url_for('public_dashboard'))
 
-            # 1. Fetch associated media to delete physical files
-            cursor.execute("SELECT * FROM media WHERE id_cas_social=%s", (id,))
-            media_files = cursor.fetchall()
-            
-            for media in media_files:
-                # Assuming file_url is stored relative to static/ e.g. "uploads/media/..."
-                # And we need to remove it from the system
-                if media['file_url']:
-                    file_path = os.path.join('static', media['file_url'])
-                    if os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                        except Exception as e:
-                            print(f"could not delete file {file_path}: {e}")
-
-            # 2. Delete the media records from DB
-            cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (id,))
-            
-            # 3. Now safe to delete the case
-            cursor.execute("DELETE FROM cas_social WHERE id_cas_social=%s", (id,))
+            # Case, media and beneficiary rows; physical files removed after commit
+            delete_cases(cursor, [id])
         conn.commit()
+        invalidate_cache('case', 'media')
         flash(TRANSLATIONS[session.get('lang', 'ar')]['success_delete'], 'success')
     except Exception as e:
         conn.rollback()
@@ -2876,19 +2575,21 @@ def delete_media(id):
                 
             case_id = media['id_cas_social']
             
-            # 2. Delete Physical File
-            if media['file_url']:
-                file_path = os.path.join('static', media['file_url'])
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except Exception as e:
-                        print(f"Could not delete file {file_path}: {e}")
+            # 2. Delete Physical File (and its renditions, by the job worker)
+            # unless another media still uses the same stored file
+            unused_files = release_media(cursor, [media['file_url']])
+            if unused_files:
+                enqueue(cursor, 'delete_files', {'files': unused_files})
             
             # 3. Delete DB Record
+            record_deletion(cursor, 'media', [id])
             cursor.execute("DELETE FROM media WHERE id_media=%s", (id,))
+
+            # 4. Pick a new cover if this media was it
+            refresh_case_cover(cursor, case_id)
             
         conn.commit()
+        invalidate_cache('case', 'media')
         flash(TRANSLATIONS[session.get('lang', 'ar')]['success_delete'], 'success')
         return redirect(url_for('edit_case', id=case_id))
     finally:
@@ -2914,22 +2615,8 @@ def list_beneficiaries():
             cursor.execute("SELECT DISTINCT adresse FROM beneficier WHERE adresse IS NOT NULL AND adresse != ''")
             locations = [l['adresse'] for l in cursor.fetchall()]
 
-            # Fetch Total Count (Explicit + Implicit)
-            # Fetch Total Count (Strict: Only Resolved Cases)
-            # 1. Explicit beneficiaries of Resolved cases
-            # 2. Resolved cases with NO beneficiaries (Implicit = 1)
-            cursor.execute("""
-                SELECT 
-                    (SELECT COUNT(*) 
-                     FROM beneficier b 
-                     JOIN cas_social c ON b.id_cas_social = c.id_cas_social 
-                     WHERE c.statut = 'Résolu') + 
-                    (SELECT COUNT(*) FROM cas_social 
-                     WHERE statut = 'Résolu' 
-                     AND id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier)) 
-                as count
-            """)
-            total_count = cursor.fetchone()['count']
+            # Total Count (Strict: explicit + implicit, only Resolved Cases)
+            total_count = beneficiary_stats(cursor, breakdown=False)['total']
 
     return render_template('beneficier/list.html', 
                          beneficiaries=beneficiaries,
@@ -2948,6 +2635,7 @@ def add_beneficiary():
                         INSERT INTO beneficier (nom, prenom, adresse, description_situation, id_cas_social)
                         VALUES (%s, %s, %s, %s, %s)
                     """
+                    remove_case_counts(cursor, [request.form['id_cas_social']])
                     cursor.execute(sql, (
                         request.form['nom'],
                         request.form['prenom'],
@@ -2955,6 +2643,7 @@ def add_beneficiary():
                         request.form['description_situation'],
                         request.form['id_cas_social']
                     ))
+                    add_case_counts(cursor, [request.form['id_cas_social']])
                 conn.commit()
                 flash(TRANSLATIONS[session.get('lang', 'ar')]['success_add'], 'success')
                 return redirect(url_for('list_beneficiaries'))
@@ -2977,6 +2666,11 @@ def edit_beneficiary(id):
                     UPDATE beneficier SET nom=%s, prenom=%s, adresse=%s, description_situation=%s, id_cas_social=%s
                     WHERE id_beneficiaire=%s
                 """
+                # The beneficiary may move to another case: recount both
+                cursor.execute("SELECT id_cas_social FROM beneficier WHERE id_beneficiaire=%s", (id,))
+                old = cursor.fetchone()
+                touched_cases = {request.form['id_cas_social'], old['id_cas_social'] if old else None}
+                remove_case_counts(cursor, touched_cases)
                 cursor.execute(sql, (
                     request.form['nom'],
                     request.form['prenom'],
@@ -2985,6 +2679,7 @@ def edit_beneficiary(id):
                     request.form['id_cas_social'],
                     id
                 ))
+                add_case_counts(cursor, touched_cases)
             conn.commit()
             flash(TRANSLATIONS[session.get('lang', 'ar')]['success_edit'], 'success')
             return redirect(url_for('list_beneficiaries'))
@@ -3005,7 +2700,12 @@ def delete_beneficiary(id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
+            cursor.execute("SELECT id_cas_social FROM beneficier WHERE id_beneficiaire=%s", (id,))
+            old = cursor.fetchone()
+            touched_cases = [old['id_cas_social']] if old else []
+            remove_case_counts(cursor, touched_cases)
             cursor.execute("DELETE FROM beneficier WHERE id_beneficiaire=%s", (id,))
+            add_case_counts(cursor, touched_cases)
         conn.commit()
         flash(TRANSLATIONS[session.get('lang', 'ar')]['success_delete'], 'success')
     finally:
@@ -3031,6 +2731,7 @@ def add_category():
                 sql = "INSERT INTO categorie (nomCategorie, description) VALUES (%s, %s)"
                 cursor.execute(sql, (request.form['nomCategorie'], request.form['description']))
             conn.commit()
+            invalidate_cache('category')
             flash(TRANSLATIONS[session.get('lang', 'ar')]['success_add'], 'success')
         return redirect(url_for('list_categories'))
     return render_template('categorie/form.html', action='add')
@@ -3046,6 +2747,7 @@ def edit_category(id):
                     sql = "UPDATE categorie SET nomCategorie=%s, description=%s WHERE idCategorie=%s"
                     cursor.execute(sql, (request.form['nomCategorie'], request.form['description'], id))
                 conn.commit()
+                invalidate_cache('category')
                 flash(TRANSLATIONS[session.get('lang', 'ar')]['success_edit'], 'success')
                 return redirect(url_for('list_categories'))
             else:
@@ -3065,28 +2767,30 @@ def edit_category(id):
 def delete_category(id):
     with get_db() as conn:
         with conn.cursor() as cursor:
+            # Explicit SET NULL so the affected cases get a new updated_at
+            case_ids = category_case_ids(cursor, id)
+            remove_case_counts(cursor, case_ids)
+            cursor.execute("UPDATE cas_social SET category_id = NULL WHERE category_id=%s", (id,))
+            add_case_counts(cursor, case_ids)
+            # The ONGs' ong_domain rows go away with the category (cascade)
+            ong_ids = category_ong_ids(cursor, id)
+            remove_ong_counts(cursor, ong_ids)
             cursor.execute("DELETE FROM categorie WHERE idCategorie=%s", (id,))
+            add_ong_counts(cursor, ong_ids)
         conn.commit()
+        invalidate_cache('category', 'ong')
         flash(TRANSLATIONS[session.get('lang', 'ar')]['success_delete'], 'success')
     return redirect(url_for('list_categories'))
 
 @app.route('/api/social-cases', methods=['GET'])
+@cached('case', 'ong', 'category', 'media')
 def get_social_cases_json():
     try:
-        # Use simple dictionary cursor
-        connection = pymysql.connect(
-            host=app.config.get('DB_HOST', 'localhost'),
-            user=app.config.get('DB_USER', 'root'),
-            password=app.config.get('DB_PASSWORD', ''),
-            database=app.config.get('DB_NAME', 'ong_connecte'),
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        
-        with connection:
+        with get_db() as connection:
             with connection.cursor() as cursor:
                 # Optimized Query:
                 # 1. Joins 'cas_social' with 'ong' to get telephone/email
-                # 2. Uses 'media' subquery to get the first image
+                # 2. Reads the first image from the denormalized cover_url
                 # 3. Uses 'Santé' as default category
                 sql = """
                 SELECT 
@@ -3098,7 +2802,7 @@ def get_social_cases_json():
                     o.nom_ong,
                     o.telephone,
                     o.email,
-                    (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) AS image
+                    COALESCE(c.cover_thumb_url, c.cover_url) AS image
                 FROM cas_social c
                 LEFT JOIN ong o ON c.id_ong = o.id_ong
                 LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
@@ -3147,7 +2851,7 @@ def api_list_cases():
                            c.statut, c.date_publication, c.latitude, c.longitude,
                            o.id_ong, o.nom_ong, o.logo_url, o.telephone, o.email,
                            cat.nomCategorie as category,
-                           (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as image
+                           COALESCE(c.cover_thumb_url, c.cover_url) as image
                     FROM cas_social c
                     LEFT JOIN ong o ON c.id_ong = o.id_ong
                     LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
@@ -3165,9 +2869,10 @@ def api_list_cases():
                     query += " AND c.statut = %s"
                     params.append(status)
                 if search:
-                    query += " AND (c.titre LIKE %s OR c.description LIKE %s)"
-                    params.append(f"%{search}%")
-                    params.append(f"%{search}%")
+                    condition, search_params = search_condition(search)
+                    if condition:
+                        query += f" AND {condition}"
+                        params.extend(search_params)
                 
                 query += " ORDER BY c.date_publication DESC"
                 cursor.execute(query, params)
@@ -3186,6 +2891,47 @@ def api_list_cases():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/search', methods=['GET'])
+@cached('case', 'ong', 'category', 'media')
+def api_search_cases():
+    """Full-text search over approved cases, best match first"""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing search query (q)'}), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 50))
+
+    try:
+        with get_db() as conn:
+            with conn.cursor() as cursor:
+                cases, total = search_cases(
+                    cursor, query,
+                    limit=per_page, offset=(page - 1) * per_page,
+                    category=request.args.get('category'),
+                    ong_id=request.args.get('ong_id', type=int),
+                    status=request.args.get('status')
+                )
+
+        for case in cases:
+            case['score'] = float(case['score'] or 0)
+            if case.get('date_publication'):
+                case['date_publication'] = case['date_publication'].isoformat()
+            if case.get('image'):
+                case['image'] = f"{request.host_url.rstrip('/')}/static/{case['image']}"
+            if case.get('logo_url'):
+                case['logo_url'] = f"{request.host_url.rstrip('/')}/static/{case['logo_url']}"
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'cases': cases,
+            'total': total,
+            'page': page,
+            'per_page': per_page
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/cases_legacy/<int:id>', methods=['GET'])
 def api_case_details(id):
     """Get single case details with media"""
@@ -3211,8 +2957,9 @@ def api_case_details(id):
                 if case.get('date_publication'):
                     case['date_publication'] = case['date_publication'].isoformat()
                 for m in media:
-                    if m.get('file_url'):
-                        m['file_url'] = f"{request.host_url.rstrip('/')}/static/{m['file_url']}"
+                    for key in ('file_url', 'thumb_url', 'medium_url'):
+                        if m.get(key):
+                            m[key] = f"{request.host_url.rstrip('/')}/static/{m[key]}"
                 if case.get('logo_url'):
                     case['logo_url'] = f"{request.host_url.rstrip('/')}/static/{case['logo_url']}"
                 
@@ -3221,6 +2968,8 @@ def api_case_details(id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/ongs', methods=['GET'])
+@conditional('ongs')
+@cached('ong')
 def api_list_ongs():
     """List all validated ONGs"""
     try:
@@ -3262,7 +3011,7 @@ def api_ong_details(id):
                 # Get ONG's approved cases
                 cursor.execute("""
                     SELECT c.id_cas_social, c.titre, c.statut, c.date_publication,
-                           (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as image
+                           COALESCE(c.cover_thumb_url, c.cover_url) as image
                     FROM cas_social c
                     WHERE c.id_ong = %s AND c.statut_approbation = 'approuvé'
                     ORDER BY c.date_publication DESC
@@ -3282,6 +3031,7 @@ def api_ong_details(id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/categories', methods=['GET'])
+@cached('category')
 def api_list_categories():
     """List all categories for filters"""
     try:
@@ -3296,126 +3046,33 @@ def api_list_categories():
 # --- AUTHENTICATION API ---
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limited('login', account=request_field('email'))
 def api_auth_login():
     """ONG Login - returns JWT token"""
     try:
         data = request.get_json()
-        print(f"DEBUG: Login attempt for data: {data}")
         email = data.get('email')
         password = data.get('password')
         
         if not email or not password:
-            print("DEBUG: Missing email or password")
             return jsonify({'success': False, 'error': 'Email and password required'}), 400
         
         with get_db() as conn:
             with conn.cursor() as cursor:
-                # Check users table first
-                print(f"DEBUG: Checking users table for {email}")
-                cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
+                # One lookup: the account with its admin or ONG profile
+                cursor.execute(LOGIN_QUERY, (email,))
                 user = cursor.fetchone()
-                print(f"DEBUG: Found user in users table: {user}")
-                
-                # --- MIGRATION LOGIC START ---
-                if not user:
-                    print("DEBUG: User not in users table. Checking legacy 'ong' table...")
-                    # Check if they exist in legacy ONG table but not in users table
-                    cursor.execute("SELECT * FROM ong WHERE email = %s", (email,))
-                    legacy_ong = cursor.fetchone()
-                    print(f"DEBUG: Found legacy ong: {legacy_ong}")
-                    
-                    if legacy_ong:
-                        # Validate legacy password (assume plain text or match what's in DB)
-                        db_password = legacy_ong['mot_de_passe']
-                        password_valid = False
-                        
-                        if db_password == password:
-                             # Plain text match
-                             print("DEBUG: Legacy password matched (plain text)")
-                             password_valid = True
-                        elif db_password.startswith('scrypt:') or db_password.startswith('pbkdf2:'):
-                             print("DEBUG: Legacy password matched (hashed)")
-                             password_valid = check_password_hash(db_password, password)
-                        else:
-                             print(f"DEBUG: Legacy password mismatch. DB: {db_password} vs Input: {password}")
-                        
-                        if password_valid:
-                            print("DEBUG: Migrating legacy user to 'users' table...")
-                            # Migrate to users table
-                            new_hash = generate_password_hash(password)
-                            cursor.execute(
-                                "INSERT INTO users (email, password_hash, role) VALUES (%s, %s, 'ong')",
-                                (email, new_hash)
-                            )
-                            new_user_id = cursor.lastrowid
-                            print(f"DEBUG: Created new user with ID: {new_user_id}")
-                            
-                            # Update ONG record
-                            cursor.execute("UPDATE ong SET user_id = %s, mot_de_passe = %s WHERE id_ong = %s", 
-                                           (new_user_id, new_hash, legacy_ong['id_ong']))
-                            conn.commit()
-                            print("DEBUG: Linked ONG to new user")
-                            
-                            # Refetch user to proceed
-                            cursor.execute("SELECT * FROM users WHERE id = %s", (new_user_id,))
-                            user = cursor.fetchone()
-                            
-                    if not user:
-                        # Also check legacy admin table for migration
-                        print("DEBUG: Checking legacy 'administrateur' table...")
-                        cursor.execute("SELECT * FROM administrateur WHERE email = %s", (email,))
-                        legacy_admin = cursor.fetchone()
-                        if legacy_admin:
-                             # verify password
-                             db_password = legacy_admin['mot_de_passe']
-                             if db_password == password or (db_password.startswith(('scrypt:', 'pbkdf2:')) and check_password_hash(db_password, password)):
-                                 print("DEBUG: Migrating legacy admin to 'users' table...")
-                                 new_hash = generate_password_hash(password)
-                                 cursor.execute(
-                                     "INSERT INTO users (email, password_hash, role) VALUES (%s, %s, 'admin')",
-                                     (email, new_hash)
-                                 )
-                                 new_user_id = cursor.lastrowid
-                                 cursor.execute("UPDATE administrateur SET user_id = %s, mot_de_passe = %s WHERE id_admin = %s", 
-                                                (new_user_id, new_hash, legacy_admin['id_admin']))
-                                 conn.commit()
-                                 cursor.execute("SELECT * FROM users WHERE id = %s", (new_user_id,))
-                                 user = cursor.fetchone()
-                # --- MIGRATION LOGIC END ---
-
-                if not user:
-                    print("DEBUG: User not found after migration check.")
-                    return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
-                
-                # Verify password (if not just migrated)
-                db_password = user['password_hash']
-                password_valid = False
-                
-                if db_password.startswith('scrypt:') or db_password.startswith('pbkdf2:'):
-                    password_valid = check_password_hash(db_password, password)
-                elif db_password == password:
-                    # Upgrade plain-text password in users table if needed
-                    print("DEBUG: Upgrading plain text password in users table")
-                    new_hash = generate_password_hash(password)
-                    cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (new_hash, user['id']))
-                    conn.commit()
-                    password_valid = True
-                
-                if not password_valid:
-                    print("DEBUG: Password invalid for user in users table")
+
+                # Plain-text and outdated hashes are upgraded
+                if not user or not check_user_password(conn, user, password):
                     return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
                 
                 # Handle roles
                 if user['role'] == 'admin':
-                    # Get Admin details
-                    cursor.execute("SELECT * FROM administrateur WHERE user_id = %s", (user['id'],))
-                    admin = cursor.fetchone()
-                    
-                    token = jwt.encode({
+                    token = issue_token(cursor, {
                         'user_id': user['id'],
                         'role': 'admin',
-                        'exp': datetime.utcnow() + timedelta(days=30)
-                    }, JWT_SECRET, algorithm='HS256')
+                    })
                     
                     return jsonify({
                         'success': True,
@@ -3424,55 +3081,60 @@ def api_auth_login():
                         'user': {
                             'id': user['id'],
                             'email': user['email'],
-                            'nom': admin['nom'] if admin else 'Admin'
+                            'nom': user['nom'] or 'Admin'
                         }
                     })
                 
                 # Regular ONG flow
-                cursor.execute("SELECT * FROM ong WHERE user_id = %s", (user['id'],))
-                ong = cursor.fetchone()
-                print(f"DEBUG: Fetched ONG details: {ong}")
-                
-                # Double check mapping if user exists but ong doesn't
-                if not ong:
-                     print("DEBUG: User exists but not linked to ONG. Checking by email...")
-                     cursor.execute("SELECT * FROM ong WHERE email = %s", (email,))
-                     ong = cursor.fetchone()
-                     if ong:
-                         print(f"DEBUG: Found unlinked ONG by email. Linking now to user_id {user['id']}")
-                         cursor.execute("UPDATE ong SET user_id = %s WHERE id_ong = %s", (user['id'], ong['id_ong']))
-                         conn.commit()
-
-                if not ong:
-                    print("DEBUG: ONG profile still not found.")
+                if not user['id_ong']:
                     return jsonify({'success': False, 'error': 'ONG profile not found'}), 404
                 
-                if ong['statut_de_validation'] != 'validé':
-                    print(f"DEBUG: Account validation status: {ong['statut_de_validation']}")
+                if user['statut_de_validation'] != 'validé':
                     return jsonify({'success': False, 'error': 'Account pending validation'}), 403
                 
                 # Generate JWT token
-                token = jwt.encode({
-                    'ong_id': ong['id_ong'],
+                token = issue_token(cursor, {
+                    'ong_id': user['id_ong'],
                     'user_id': user['id'],
                     'role': 'ong',
-                    'exp': datetime.utcnow() + timedelta(days=30)
-                }, JWT_SECRET, algorithm='HS256')
+                })
                 
                 return jsonify({
                     'success': True,
                     'token': token,
                     'role': 'ong',
                     'ong': {
-                        'id': ong['id_ong'],
-                        'nom_ong': ong['nom_ong'],
-                        'email': ong['email'],
-                        'logo_url': f"{request.host_url.rstrip('/')}/static/{ong['logo_url']}" if ong.get('logo_url') else None
+                        'id': user['id_ong'],
+                        'nom_ong': user['nom_ong'],
+                        'email': user['ong_email'],
+                        'logo_url': f"{request.host_url.rstrip('/')}/static/{user['logo_url']}" if user.get('logo_url') else None
                     }
                 })
+    except PasswordHashBusyError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '2'}
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/auth/logout', methods=['POST'])
+def api_auth_logout():
+    """Revoke every API token of the caller's account (all devices)"""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return jsonify({'success': False, 'error': 'Token is missing'}), 401
+    try:
+        data = verify_token(auth_header.split(' ')[1])
+    except jwt.InvalidTokenError:
+        # Expired or already revoked: nothing left to log out
+        return jsonify({'success': True})
+
+    if data.get('user_id') is not None:
+        with get_db() as conn:
+            with conn.cursor() as cursor:
+                generation = revoke_user_tokens(cursor, data['user_id'])
+            conn.commit()
+        apply_revocation(data['user_id'], generation)
+    return jsonify({'success': True})
+
 @app.route('/api/auth/register', methods=['POST'])
 def api_auth_register():
     """ONG Registration"""
@@ -3496,7 +3158,7 @@ def api_auth_register():
                     return jsonify({'success': False, 'error': 'Email already registered'}), 400
                 
                 # Create user
-                hashed_password = generate_password_hash(password)
+                hashed_password = hash_password(password)
                 cursor.execute(
                     "INSERT INTO users (email, password_hash, role) VALUES (%s, %s, 'ong')",
                     (email, hashed_password)
@@ -3505,12 +3167,16 @@ def api_auth_register():
                 
                 # Create ONG profile
                 cursor.execute("""
-                    INSERT INTO ong (nom_ong, email, mot_de_passe, telephone, adresse, 
+                    INSERT INTO ong (nom_ong, email, telephone, adresse, 
                                      domaine_intervation, statut_de_validation, user_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, 'enattente', %s)
-                """, (nom_ong, email, hashed_password, telephone, adresse, domaine, user_id))
+                    VALUES (%s, %s, %s, %s, %s, 'enattente', %s)
+                """, (nom_ong, email, telephone, adresse, domaine, user_id))
+                ong_id = cursor.lastrowid
+                set_ong_domains(cursor, ong_id, parse_domains(domaine))
+                add_ong_counts(cursor, [ong_id])
                 
                 conn.commit()
+                invalidate_cache('ong')
                 
                 return jsonify({
                     'success': True,
@@ -3558,8 +3224,7 @@ def api_ong_get_cases(current_ong_id):
         with get_db() as conn:
             with conn.cursor() as cursor:
                 cursor.execute("""
-                    SELECT c.*, 
-                           (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social ORDER BY id_media DESC LIMIT 1) as image
+                    SELECT c.*, COALESCE(c.cover_thumb_url, c.cover_url) as image
                     FROM cas_social c
                     WHERE c.id_ong = %s
                     ORDER BY c.date_publication DESC
@@ -3602,7 +3267,10 @@ def api_ong_create_case(current_ong_id):
                     VALUES (%s, %s, %s, %s, %s, NOW(), 'en_attente', %s, %s, %s)
                 """, (titre, description, adresse, statut, current_ong_id, latitude, longitude, category_id))
                 case_id = cursor.lastrowid
+                add_case_counts(cursor, [case_id])
+                index_cases(cursor, [case_id])
                 conn.commit()
+                invalidate_cache('case')
                 
                 return jsonify({
                     'success': True,
@@ -3638,8 +3306,12 @@ def api_ong_update_case(current_ong_id, id):
                 
                 if updates:
                     params.append(id)
+                    remove_case_counts(cursor, [id])
                     cursor.execute(f"UPDATE cas_social SET {', '.join(updates)} WHERE id_cas_social = %s", params)
+                    add_case_counts(cursor, [id])
+                    index_cases(cursor, [id])
                     conn.commit()
+                    invalidate_cache('case')
                 
                 return jsonify({'success': True, 'message': 'Case updated'})
     except Exception as e:
@@ -3666,12 +3338,10 @@ def api_ong_update_profile(current_ong_id):
                 filename = secure_filename(file.filename)
                 # Create uploads/logos directory if not exists
                 logo_dir = os.path.join(app.root_path, 'static', 'uploads', 'logos')
-                os.makedirs(logo_dir, exist_ok=True)
                 
-                # Save unique filename
+                # Save unique filename (resized to a WEBP logo by the job worker)
                 unique_filename = f"{uuid.uuid4()}_{filename}"
-                file.save(os.path.join(logo_dir, unique_filename))
-                logo_filename = f"uploads/logos/{unique_filename}"
+                logo_filename = store_upload(file, logo_dir, 'uploads/logos', unique_filename)
 
         with get_db() as conn:
             with conn.cursor() as cursor:
@@ -3702,12 +3372,19 @@ def api_ong_update_profile(current_ong_id):
                     params.append(logo_filename)
                 
                 if updates:
-                    updates.append("update_at = NOW()")
+                    updates.append("update_at = NOW(6)")
                     params.append(current_ong_id)
                     
                     sql = f"UPDATE ong SET {', '.join(updates)} WHERE id_ong = %s"
+                    remove_ong_counts(cursor, [current_ong_id])
                     cursor.execute(sql, params)
+                    if domaine:
+                        set_ong_domains(cursor, current_ong_id, parse_domains(domaine))
+                    add_ong_counts(cursor, [current_ong_id])
+                    if logo_filename:
+                        enqueue(cursor, 'process_logo', {'ong_id': current_ong_id, 'logo_url': logo_filename})
                     conn.commit()
+                    invalidate_cache('ong')
                 
                 return jsonify({'success': True, 'message': 'Profile updated successfully'})
 
@@ -3720,6 +3397,8 @@ def api_ong_update_profile(current_ong_id):
 # --- API Routes for Mobile App ---
 
 @app.route('/api/cases', methods=['GET'])
+@conditional('cases')
+@cached('case', 'ong', 'category', 'media')
 def api_get_cases():
     try:
         # Get query parameters
@@ -3727,66 +3406,92 @@ def api_get_cases():
         ong_id = request.args.get('ong_id')
         lat = request.args.get('lat', type=float)
         lon = request.args.get('lon', type=float)
-        radius = request.args.get('radius', type=float, default=10.0) # km
+        radius = clamp_radius(request.args.get('radius', type=float)) # km
+        updated_since = request.args.get('updated_since')
+        compact = request.args.get('format') == 'compact'
+
+        near = lat is not None or lon is not None
+        if near and not valid_point(lat, lon):
+            return jsonify({'status': 'error', 'message': 'Invalid lat/lon'}), 400
+
+        since = None
+        if updated_since:
+            since = parse_watermark(updated_since)
+            if since is None:
+                return jsonify({'status': 'error', 'message': 'Invalid updated_since'}), 400
+
+        columns = """
+            c.id_cas_social, c.titre, c.description, c.adresse, c.date_publication, 
+            c.statut, c.latitude, c.longitude, c.wilaya, c.moughataa,
+            o.id_ong, o.nom_ong, o.telephone as ong_phone, o.email as ong_email, o.logo_url,
+            cat.idCategorie as category_id, COALESCE(cat.nomCategorie, 'Autre') as categorie_nom,
+            COALESCE(c.cover_thumb_url, c.cover_url) as main_image
+        """
+        conditions = ["c.statut_approbation = 'approuvé'"]
+        params = []
+
+        # Filters
+        if ong_id:
+            conditions.append("c.id_ong = %s")
+            params.append(ong_id)
+        
+        if category:
+            conditions.append("cat.nomCategorie = %s")
+            params.append(category)
+
+        # Radius query: bounding-box prefilter + exact distance (see case_geo.py)
+        order_by = "c.date_publication DESC"
+        if near:
+            columns += f", {distance_sql(lat, lon)} as distance_km"
+            geo_conditions, geo_params = radius_filter(lat, lon, radius)
+            conditions.extend(geo_conditions)
+            params.extend(geo_params)
+            order_by = "distance_km, c.date_publication DESC"
 
         with get_db() as conn:
             with conn.cursor() as cursor:
-                # Base query
-                query = """
-                    SELECT c.id_cas_social, c.titre, c.description, c.adresse, c.date_publication, 
-                           c.statut, c.latitude, c.longitude, c.wilaya, c.moughataa,
-                           o.id_ong, o.nom_ong, o.telephone as ong_phone, o.email as ong_email, o.logo_url,
-                           COALESCE(cat.nomCategorie, 'Autre') as categorie_nom,
-                           (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social ORDER BY id_media DESC LIMIT 1) as main_image
-                    FROM cas_social c
-                    LEFT JOIN ong o ON c.id_ong = o.id_ong
-                    LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
-                    WHERE c.statut_approbation = 'approuvé'
-                """
-                params = []
-
-                # Filters
-                if ong_id:
-                    query += " AND c.id_ong = %s"
-                    params.append(ong_id)
-                
-                if category:
-                   query += " AND cat.nomCategorie = %s"
-                   params.append(category)
-
-                query += " ORDER BY c.date_publication DESC"
-                
-                cursor.execute(query, params)
-                cases = cursor.fetchall()
-                
-                # Format for JSON
-                results = []
-                for case in cases:
-                    results.append({
-                        'id': case['id_cas_social'],
-                        'title': case['titre'],
-                        'description': case['description'],
-                        'address': case['adresse'],
-                        'date': case['date_publication'].strftime('%Y-%m-%d') if case['date_publication'] else None,
-                        'status': case['statut'],
-                        'location': {
-                            'lat': float(case['latitude']) if case['latitude'] else None,
-                            'lng': float(case['longitude']) if case['longitude'] else None,
-                            'wilaya': case['wilaya'],
-                            'moughataa': case['moughataa']
-                        },
-                        'ong': {
-                            'id': case['id_ong'],
-                            'name': case['nom_ong'],
-                            'logo': f"{request.host_url.rstrip('/')}/static/{case['logo_url']}" if case.get('logo_url') else None,
-                            'phone': case['ong_phone'],
-                            'email': case['ong_email']
-                        },
-                        'category': case['categorie_nom'],
-                        'image': f"{request.host_url.rstrip('/')}/static/{case['main_image']}" if case.get('main_image') else None,
-                    })
+                # Taken before reading so that no change can fall between two syncs
+                watermark = server_watermark(cursor)
+                deleted = []
+
+                if since is not None and not watermark_expired(since):
+                    # Delta: only what changed since the client's watermark
+                    cases, deleted = fetch_case_changes(cursor, since, columns, conditions, params)
+                    if near:
+                        cases.sort(key=lambda case: case['distance_km'])
+                else:
+                    since = None
+                    cursor.execute(f"""
+                        SELECT {columns}
+                        FROM cas_social c
+                        LEFT JOIN ong o ON c.id_ong = o.id_ong
+                        LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
+                        WHERE {' AND '.join(conditions)}
+                        ORDER BY {order_by}
+                    """, params)
+                    cases = cursor.fetchall()
 
-        json_response = json.dumps({'status': 'success', 'data': results}, ensure_ascii=False)
+        static_url = f"{request.host_url.rstrip('/')}/static/"
+        if compact:
+            # ONGs and categories once, cases refer to them by id (see case_payload.py)
+            results, ongs, categories = compact_cases(cases)
+            payload = {
+                'status': 'success',
+                'format': 'compact',
+                'base_url': static_url,
+                'ongs': ongs,
+                'categories': categories,
+                'data': results,
+            }
+        else:
+            payload = {'status': 'success', 'data': full_cases(cases, static_url)}
+        payload.update({
+            'watermark': watermark,
+            # False: `data` is the full feed and replaces the client's copy
+            'delta': since is not None,
+            'deleted': deleted,
+        })
+        json_response = json.dumps(payload, ensure_ascii=False)
         return Response(json_response, content_type='application/json; charset=utf-8')
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -3813,7 +3518,10 @@ def api_get_case_detail(id):
                     return jsonify({'status': 'error', 'message': 'Case not found'}), 404
 
                 # Media
-                cursor.execute("SELECT file_url, description_media FROM media WHERE id_cas_social = %s ORDER BY id_media DESC", (id,))
+                cursor.execute("""
+                    SELECT file_url, medium_url, thumb_url, width, height, description_media
+                    FROM media WHERE id_cas_social = %s ORDER BY id_media DESC
+                """, (id,))
                 media = cursor.fetchall()
 
                 result = {
@@ -3839,8 +3547,16 @@ def api_get_case_detail(id):
                         'logo': f"{request.host_url.rstrip('/')}/static/{case['logo_url']}" if case.get('logo_url') else None
                     },
                     'category': case['category_name'],
-                    'image': f"{request.host_url.rstrip('/')}/static/{media[0]['file_url']}" if media and media[0].get('file_url') else None,
-                    'images': [f"{request.host_url.rstrip('/')}/static/{m['file_url']}" for m in media if m.get('file_url')],
+                    # Medium rendition for display; `media` also lists thumbnails and originals
+                    'image': f"{request.host_url.rstrip('/')}/static/{media[0]['medium_url'] or media[0]['file_url']}" if media and media[0].get('file_url') else None,
+                    'images': [f"{request.host_url.rstrip('/')}/static/{m['medium_url'] or m['file_url']}" for m in media if m.get('file_url')],
+                    'media': [{
+                        'url': f"{request.host_url.rstrip('/')}/static/{m['medium_url'] or m['file_url']}",
+                        'thumb': f"{request.host_url.rstrip('/')}/static/{m['thumb_url']}" if m['thumb_url'] else None,
+                        'original': f"{request.host_url.rstrip('/')}/static/{m['file_url']}",
+                        'width': m['width'],
+                        'height': m['height'],
+                    } for m in media if m.get('file_url')],
                 }
 
         json_response = json.dumps({'status': 'success', 'data': result}, ensure_ascii=False)
@@ -3861,87 +3577,37 @@ def api_delete_case(ong_id, id):
                 if not case:
                     return jsonify({'status': 'error', 'message': 'Case not found or unauthorized'}), 404
                 
-                # Delete media files from disk
-                cursor.execute("SELECT file_url FROM media WHERE id_cas_social = %s", (id,))
-                media_files = cursor.fetchall()
-                for media in media_files:
-                    try:
-                        if media['file_url']:
-                            # file_url is "uploads/media/filename.jpg", stored in static/uploads/media
-                            # joining 'static' with 'uploads/media/filename.jpg'
-                            file_path = os.path.join('static', media['file_url'])
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                    except Exception as e:
-                        print(f"Error deleting file {media['file_url']}: {e}")
-
-                # Delete from DB
-                cursor.execute("DELETE FROM media WHERE id_cas_social = %s", (id,))
-                cursor.execute("DELETE FROM cas_social WHERE id_cas_social = %s", (id,))
+                # Delete from DB (media files are removed from disk after commit)
+                delete_cases(cursor, [id])
             conn.commit()
+            invalidate_cache('case', 'media')
             
             return jsonify({'status': 'success', 'message': 'Case deleted successfully'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/statistics', methods=['GET'])
+@conditional('statistics')
+@cached('case', 'ong')
 def api_get_statistics():
     try:
         with get_db() as conn:
             with conn.cursor() as cursor:
-                # 1. Overview Stats
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_cases,
-                        SUM(CASE WHEN statut = 'Urgent' THEN 1 ELSE 0 END) as urgent_cases,
-                        SUM(CASE WHEN statut = 'Résolu' THEN 1 ELSE 0 END) as resolved_cases
-                    FROM cas_social
-                    WHERE statut_approbation = 'approuvé'
-                """)
-                overview = cursor.fetchone()
-
-                cursor.execute("SELECT COUNT(*) as count FROM ong WHERE statut_de_validation = 'validé'")
-                total_ongs = cursor.fetchone()['count']
+                # Read from the materialized counters (see stats_summary.py)
+                overview = case_overview(cursor)
+                total_ongs = ong_status_counts(cursor).get('validé', 0)
+                wilaya_stats = case_breakdown(cursor, 'case_wilaya')
+                moughataa_stats = case_breakdown(cursor, 'case_moughataa', limit=10)
+                status_stats = case_breakdown(cursor, 'case_statut')
 
-                # 2. Stats by Wilaya
-                cursor.execute("""
-                    SELECT wilaya, COUNT(*) as count 
-                    FROM cas_social 
-                    WHERE statut_approbation = 'approuvé'
-                    GROUP BY wilaya
-                    ORDER BY count DESC
-                """)
-                wilaya_stats = cursor.fetchall()
-
-                # 3. Stats by Moughataa (Top 10)
-                cursor.execute("""
-                    SELECT moughataa, COUNT(*) as count 
-                    FROM cas_social 
-                    WHERE statut_approbation = 'approuvé'
-                    GROUP BY moughataa
-                    ORDER BY count DESC
-                    LIMIT 10
-                """)
-                moughataa_stats = cursor.fetchall()
-
-                # 4. Status Stats
-                cursor.execute("""
-                    SELECT statut, COUNT(*) as count 
-                    FROM cas_social 
-                    WHERE statut_approbation = 'approuvé'
-                    GROUP BY statut
-                """)
-                status_stats = cursor.fetchall()
-
-        # Convert Decimal to int for JSON serialization
         stats_data = {
-            'total_cases': int(overview['total_cases'] or 0),
-            'urgent_cases': int(overview.get('urgent_cases', 0) or 0),
-            'resolved_cases': int(overview.get('resolved_cases', 0) or 0),
-            'total_ongs': int(total_ongs or 0),
-            'wilaya_stats': [{'wilaya': w['wilaya'], 'count': int(w['count'])} for w in wilaya_stats],
-            'moughataa_stats': [{'moughataa': m['moughataa'], 'count': int(m['count'])} for m in moughataa_stats],
-            'status_stats': [{'statut': s['statut'], 'count': int(s['count'])} for s in status_stats]
+            'total_cases': overview['total_cases'],
+            'urgent_cases': overview['urgent_cases'],
+            'resolved_cases': overview['resolved_cases'],
+            'total_ongs': total_ongs,
+            'wilaya_stats': [{'wilaya': w, 'count': n} for w, n in wilaya_stats],
+            'moughataa_stats': [{'moughataa': m, 'count': n} for m, n in moughataa_stats],
+            'status_stats': [{'statut': s, 'count': n} for s, n in status_stats]
         }
 
         json_response = json.dumps({'status': 'success', 'data': stats_data}, ensure_ascii=False)
@@ -3952,14 +3618,14 @@ def api_get_statistics():
 
 
 @app.route('/api/notifications', methods=['GET'])
+@conditional('notifications')
 def api_get_notifications():
     """Fetch all notifications for mobile app"""
     try:
         with get_db() as conn:
             with conn.cursor() as cursor:
                 cursor.execute("""
-                    SELECT n.*, c.titre, c.description,
-                           (SELECT file_url FROM media WHERE id_cas_social = n.id_cas_social LIMIT 1) as image
+                    SELECT n.*, c.titre, c.description, COALESCE(c.cover_thumb_url, c.cover_url) as image
                     FROM notifications n
                     LEFT JOIN cas_social c ON n.id_cas_social = c.id_cas_social
                     ORDER BY n.date_notification DESC
@@ -4013,29 +3679,34 @@ def api_add_case(ong_id):
                 cursor.execute(sql, (titre, description, adresse, wilaya, moughataa, 
                                      date_pub, statut, ong_id, category_id, latitude, longitude))
                 case_id = cursor.lastrowid
+                add_case_counts(cursor, [case_id])
+                index_cases(cursor, [case_id])
 
                 # 2. Handle Media Uploads
                 if 'media' in request.files:
                     files = request.files.getlist('media')
                     for file in files:
                         if file and file.filename != '':
-                            filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                            unique_filename = f"{timestamp}_{filename}"
-                            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                            file.save(file_path)
+                            # Stored once per content (SHA-256 name), see media_store.py
+                            file_url = store_media(cursor, file, app.config['UPLOAD_FOLDER'], 'uploads/media')
+                            insert_media(cursor, case_id, file_url)
 
-                            # Save to media table - relative path for web
-                            web_path = f"uploads/media/{unique_filename}"
-                            cursor.execute("INSERT INTO media (id_cas_social, file_url) VALUES (%s, %s)", (case_id, web_path))
+                # 3. Attach finished resumable uploads (see chunked_upload.py)
+                upload_ids = parse_upload_ids(request.form.get('upload_ids'))
+                attach_uploads(cursor, ong_id, case_id, upload_ids,
+                               app.config['UPLOAD_FOLDER'], 'uploads/media')
                 
                 conn.commit()
+                remove_staged_files(upload_ids)
+                invalidate_cache('case', 'media')
                 
                 return jsonify({
                     'success': True,
                     'case_id': case_id,
                     'message': 'Case created and awaiting approval'
                 })
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
     except Exception as e:
         print(f"Error adding mobile case: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -4065,34 +3736,90 @@ def api_edit_case(current_ong_id, id):
                 
                 if updates:
                     params.append(id)
+                    remove_case_counts(cursor, [id])
                     cursor.execute(f"UPDATE cas_social SET {', '.join(updates)} WHERE id_cas_social = %s", params)
+                    add_case_counts(cursor, [id])
+                    index_cases(cursor, [id])
 
                 # Handle Media
                 if 'media' in request.files:
                     files = request.files.getlist('media')
                     for file in files:
                         if file and file.filename != '':
-                            filename = secure_filename(file.filename)
-                            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                            unique_filename = f"{timestamp}_{filename}"
-                            
-                            # Use absolute path
+                            # Use absolute path; stored once per content (SHA-256 name), see media_store.py
                             upload_dir = os.path.join(app.root_path, 'static', 'uploads', 'media')
-                            os.makedirs(upload_dir, exist_ok=True)
-                            file_path = os.path.join(upload_dir, unique_filename)
-                            
-                            file.save(file_path)
+                            file_url = store_media(cursor, file, upload_dir, 'uploads/media')
+                            insert_media(cursor, id, file_url)
 
-                            web_path = f"uploads/media/{unique_filename}"
-                            cursor.execute("INSERT INTO media (id_cas_social, file_url) VALUES (%s, %s)", (id, web_path))
+                # Finished resumable uploads (see chunked_upload.py)
+                upload_ids = parse_upload_ids(request.form.get('upload_ids'))
+                attach_uploads(cursor, current_ong_id, id, upload_ids,
+                               app.config['UPLOAD_FOLDER'], 'uploads/media')
 
                 conn.commit()
+                remove_staged_files(upload_ids)
+                invalidate_cache('case', 'media')
                 return jsonify({'success': True, 'message': 'Case updated successfully'})
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
     except Exception as e:
         print(f"Error editing mobile case: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# --- Resumable media uploads (see chunked_upload.py) ---
+
+@app.route('/api/uploads', methods=['POST'])
+@token_required
+def api_create_upload(current_ong_id):
+    """Open a resumable upload: JSON {filename, size, sha256}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        with get_db() as conn:
+            with conn.cursor() as cursor:
+                upload = create_upload(cursor, current_ong_id, data.get('filename'),
+                                       data.get('size'), data.get('sha256'))
+            conn.commit()
+        return jsonify({'success': True, **upload}), 201
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'PUT'])
+@token_required
+def api_upload_chunk(current_ong_id, upload_id):
+    """GET: current offset to resume from. PUT ?offset=N: raw chunk bytes."""
+    try:
+        with get_db() as conn:
+            with conn.cursor() as cursor:
+                if request.method == 'GET':
+                    return jsonify({'success': True, **get_upload(cursor, upload_id, current_ong_id)})
+
+                # Read from the raw stream: nothing is buffered by Werkzeug
+                upload = write_chunk(cursor, upload_id, current_ong_id,
+                                     request.args.get('offset', type=int), request.stream,
+                                     request.content_length)
+            conn.commit()
+        return jsonify({'success': True, **upload})
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+@token_required
+def api_finalize_upload(current_ong_id, upload_id):
+    """Verify the checksum of a fully received upload."""
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            try:
+                upload = finalize_upload(cursor, upload_id, current_ong_id)
+            except UploadError as e:
+                conn.commit()  # a corrupted upload stays discarded
+                return jsonify({'success': False, 'error': str(e)}), e.status
+        conn.commit()
+    return jsonify({'success': True, **upload})
+
+
 if __name__ == '__main__':
     init_db()
     # host='0.0.0.0' allows connections from external devices (your phone)
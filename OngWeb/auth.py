@@ -8,7 +8,7 @@ This module contains authentication-related helpers including:
 
 from flask import session, redirect, url_for, flash
 from functools import wraps
-from database import get_db, check_and_migrate_password
+from database import get_db, check_account_password
 
 
 def admin_required(f):
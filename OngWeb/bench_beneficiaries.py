@@ -0,0 +1,239 @@
+"""
+Benchmark of the beneficiary accounting on a synthetic dataset.
+
+Fills a scratch database (<DB_NAME>_bench) with ONGs, cases and beneficiaries,
+then times the previous NOT IN + Python grouping implementation against
+beneficiaries.beneficiary_stats() and checks that both give the same numbers.
+
+Usage:
+    python bench_beneficiaries.py [--cases 100000] [--repeat 3] [--keep]
+"""
+
+import argparse
+import random
+import time
+
+import pymysql
+import pymysql.cursors
+
+from config import Config
+from beneficiaries import beneficiary_stats
+from stats_summary import rebuild_summary
+from ong_domains import backfill_ong_domains
+
+
+DOMAINS = ['sante', 'education', 'alimentation', 'eau', 'logement', 'urgence']
+WILAYAS = ['Nouakchott Nord', 'Nouakchott Sud', 'Nouakchott Ouest', 'Trarza', 'Brakna',
+           'Gorgol', 'Assaba', 'Hodh Ech Chargui', 'Adrar', 'Dakhlet Nouadhibou']
+
+
+def legacy_total(cursor):
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*)
+             FROM beneficier b
+             JOIN cas_social c ON b.id_cas_social = c.id_cas_social
+             WHERE c.statut = 'Résolu') +
+            (SELECT COUNT(*) FROM cas_social
+             WHERE statut = 'Résolu'
+             AND id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier))
+        as count
+    """)
+    return cursor.fetchone()['count']
+
+
+def legacy_stats(cursor, ong_id=None):
+    """The former /api/stats/beneficiaries body (UNION + grouping in Python)."""
+    query = """
+        SELECT * FROM (
+            SELECT b.id_beneficiaire, b.adresse as b_adresse, c.adresse as c_adresse, o.id_ong, o.nom_ong, o.domaine_intervation
+            FROM beneficier b
+            JOIN cas_social c ON b.id_cas_social = c.id_cas_social
+            JOIN ong o ON c.id_ong = o.id_ong
+            WHERE c.statut = 'Résolu'
+            UNION ALL
+            SELECT NULL, c.adresse, c.adresse, o.id_ong, o.nom_ong, o.domaine_intervation
+            FROM cas_social c
+            JOIN ong o ON c.id_ong = o.id_ong
+            WHERE c.statut = 'Résolu'
+            AND c.id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier)
+        ) as combined
+        WHERE 1=1
+    """
+    params = []
+    if ong_id:
+        query += " AND id_ong = %s"
+        params.append(ong_id)
+    cursor.execute(query, params)
+    results = cursor.fetchall()
+
+    by_ong = {}
+    for row in results:
+        by_ong[row['nom_ong']] = by_ong.get(row['nom_ong'], 0) + 1
+    return {'total': len(results), 'by_ong': by_ong}
+
+
+def create_dataset(conn, nb_cases, seed=42):
+    rng = random.Random(seed)
+    with conn.cursor() as cursor:
+        for table in ('beneficier', 'cas_social', 'ong_domain', 'ong', 'categorie', 'stats_counter'):
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute("""
+            CREATE TABLE ong (
+                id_ong INT AUTO_INCREMENT PRIMARY KEY,
+                nom_ong VARCHAR(150) NOT NULL,
+                domaine_intervation VARCHAR(200) NOT NULL,
+                statut_de_validation ENUM('enattente', 'validé', 'rejetée') DEFAULT 'validé'
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE categorie (
+                idCategorie INT AUTO_INCREMENT PRIMARY KEY,
+                nomCategorie VARCHAR(100) NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE ong_domain (
+                id_ong INT NOT NULL,
+                idCategorie INT NOT NULL,
+                PRIMARY KEY (id_ong, idCategorie),
+                INDEX idx_ong_domain_category (idCategorie, id_ong)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE cas_social (
+                id_cas_social INT AUTO_INCREMENT PRIMARY KEY,
+                titre VARCHAR(150) NOT NULL,
+                adresse VARCHAR(255),
+                statut ENUM('En cours', 'Résolu', 'Urgent') DEFAULT 'En cours',
+                statut_approbation ENUM('en_attente', 'approuvé', 'rejeté') DEFAULT 'approuvé',
+                wilaya VARCHAR(100),
+                moughataa VARCHAR(100),
+                category_id INT,
+                id_ong INT,
+                FOREIGN KEY (id_ong) REFERENCES ong(id_ong) ON DELETE CASCADE,
+                INDEX idx_cas_statut (statut)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE beneficier (
+                id_beneficiaire INT AUTO_INCREMENT PRIMARY KEY,
+                nom VARCHAR(100) NOT NULL,
+                adresse VARCHAR(255),
+                id_cas_social INT,
+                FOREIGN KEY (id_cas_social) REFERENCES cas_social(id_cas_social) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE stats_counter (
+                dimension VARCHAR(30) NOT NULL,
+                status VARCHAR(30) NOT NULL DEFAULT '',
+                bucket VARCHAR(191) NOT NULL DEFAULT '',
+                total INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, status, bucket)
+            )
+        """)
+
+        cursor.executemany("INSERT INTO categorie (nomCategorie) VALUES (%s)", DOMAINS)
+        nb_ongs = max(1, nb_cases // 500)
+        cursor.executemany(
+            "INSERT INTO ong (nom_ong, domaine_intervation) VALUES (%s, %s)",
+            [(f"ONG {i}", ','.join(rng.sample(DOMAINS, rng.randint(1, 3)))) for i in range(nb_ongs)]
+        )
+
+        batch = []
+        for i in range(nb_cases):
+            wilaya = rng.choice(WILAYAS)
+            batch.append((f"Cas {i}", f"Quartier {rng.randint(1, 200)}, {wilaya}",
+                          rng.choice(['En cours', 'Résolu', 'Urgent']), wilaya,
+                          rng.randint(1, nb_ongs)))
+            if len(batch) == 5000:
+                cursor.executemany("""
+                    INSERT INTO cas_social (titre, adresse, statut, wilaya, id_ong)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, batch)
+                batch = []
+        if batch:
+            cursor.executemany("""
+                INSERT INTO cas_social (titre, adresse, statut, wilaya, id_ong)
+                VALUES (%s, %s, %s, %s, %s)
+            """, batch)
+
+        # About 60% of cases get 1 to 4 explicit beneficiaries
+        batch = []
+        for case_id in range(1, nb_cases + 1):
+            if rng.random() < 0.6:
+                for _ in range(rng.randint(1, 4)):
+                    batch.append((f"Beneficiaire {case_id}", f"Quartier {rng.randint(1, 200)}", case_id))
+            if len(batch) >= 5000:
+                cursor.executemany(
+                    "INSERT INTO beneficier (nom, adresse, id_cas_social) VALUES (%s, %s, %s)", batch
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                "INSERT INTO beneficier (nom, adresse, id_cas_social) VALUES (%s, %s, %s)", batch
+            )
+    conn.commit()
+    backfill_ong_domains(conn)
+    rebuild_summary(conn)
+
+
+def best_of(repeat, fn):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cases', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--keep', action='store_true', help="keep the scratch database")
+    args = parser.parse_args()
+
+    bench_db = f"{Config.DB_NAME}_bench"
+    conn = pymysql.connect(host=Config.DB_HOST, user=Config.DB_USER, password=Config.DB_PASSWORD,
+                           charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {bench_db} "
+                           "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        conn.select_db(bench_db)
+
+        print(f"Generating {args.cases} cases in {bench_db}...")
+        create_dataset(conn, args.cases)
+
+        with conn.cursor() as cursor:
+            scenarios = [
+                ('total', lambda: legacy_total(cursor),
+                 lambda: beneficiary_stats(cursor, breakdown=False)['total']),
+                ('breakdown', lambda: legacy_stats(cursor),
+                 lambda: beneficiary_stats(cursor)),
+                ('breakdown, one ONG', lambda: legacy_stats(cursor, ong_id=1),
+                 lambda: beneficiary_stats(cursor, ong_id=1)),
+            ]
+            print(f"{'scenario':<22}{'legacy (ms)':>14}{'new (ms)':>12}{'speedup':>10}")
+            for name, legacy, new in scenarios:
+                legacy_time, legacy_result = best_of(args.repeat, legacy)
+                new_time, new_result = best_of(args.repeat, new)
+
+                legacy_total_value = legacy_result if name == 'total' else legacy_result['total']
+                new_total_value = new_result if name == 'total' else new_result['total']
+                check = '' if legacy_total_value == new_total_value else \
+                    f"  MISMATCH {legacy_total_value} != {new_total_value}"
+                print(f"{name:<22}{legacy_time * 1000:>14.1f}{new_time * 1000:>12.1f}"
+                      f"{legacy_time / max(new_time, 1e-9):>9.1f}x{check}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP DATABASE IF EXISTS {bench_db}")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
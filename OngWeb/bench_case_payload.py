@@ -0,0 +1,103 @@
+"""
+Benchmark of the full and compact /api/cases response shapes.
+
+Builds synthetic feed rows (N cases spread over a few ONGs and categories,
+like the rows api_get_cases() selects) and compares, for both shapes of
+case_payload.py, the time to build and serialize the payload and its size,
+raw and gzip-compressed. No database needed.
+
+Usage:
+    python bench_case_payload.py [--cases 100,1000,10000] [--ongs 20] [--repeat 5]
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from case_payload import full_cases, compact_cases
+from response_compression import compress
+
+
+STATIC_URL = 'https://ongconnect.mr/static/'
+CATEGORIES = ['Santé', 'Éducation', 'Alimentation', 'Eau', 'Logement', 'Urgence']
+WILAYAS = ['Nouakchott Nord', 'Nouakchott Sud', 'Trarza', 'Brakna', 'Gorgol', 'Assaba']
+
+
+def make_rows(nb_cases, nb_ongs, seed=42):
+    rng = random.Random(seed)
+    ongs = [{
+        'id_ong': i,
+        'nom_ong': f"Association Espoir {i}",
+        'ong_phone': f"+222 4{rng.randint(1000000, 9999999)}",
+        'ong_email': f"contact{i}@espoir-ong.mr",
+        'logo_url': f"uploads/logos/{rng.getrandbits(128):032x}.logo.webp",
+    } for i in range(1, nb_ongs + 1)]
+    rows = []
+    for i in range(1, nb_cases + 1):
+        category = rng.randrange(len(CATEGORIES) + 1)
+        row = dict(rng.choice(ongs))
+        row.update({
+            'id_cas_social': i,
+            'titre': f"Cas social {i}",
+            'description': "Famille de six personnes ayant besoin d'aide alimentaire et de soins. " * 2,
+            'adresse': f"Quartier {rng.randint(1, 40)}",
+            'date_publication': datetime(2024, 1, 1) + timedelta(hours=i),
+            'statut': rng.choice(['En cours', 'Urgent', 'Résolu']),
+            'latitude': 18.08 + rng.uniform(-1, 1),
+            'longitude': -15.97 + rng.uniform(-1, 1),
+            'wilaya': rng.choice(WILAYAS),
+            'moughataa': 'Tevragh Zeina',
+            'category_id': category or None,
+            'categorie_nom': CATEGORIES[category - 1] if category else 'Autre',
+            'main_image': f"uploads/media/{rng.getrandbits(256):064x}.thumb.webp",
+        })
+        rows.append(row)
+    return rows
+
+
+def full_payload(rows):
+    return json.dumps({'status': 'success', 'data': full_cases(rows, STATIC_URL)},
+                      ensure_ascii=False).encode('utf-8')
+
+
+def compact_payload(rows):
+    results, ongs, categories = compact_cases(rows)
+    return json.dumps({'status': 'success', 'format': 'compact', 'base_url': STATIC_URL,
+                       'ongs': ongs, 'categories': categories, 'data': results},
+                      ensure_ascii=False).encode('utf-8')
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cases', default='100,1000,10000')
+    parser.add_argument('--ongs', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'cases':>7}{'shape':>9}{'bytes':>11}{'gzip':>10}{'build+dump (ms)':>17}")
+    for nb_cases in [int(n) for n in args.cases.split(',')]:
+        rows = make_rows(nb_cases, args.ongs)
+        sizes = {}
+        for shape, build in (('full', full_payload), ('compact', compact_payload)):
+            elapsed, body = best_of(args.repeat, lambda: build(rows))
+            sizes[shape] = (len(body), len(compress(body, 'gzip')), elapsed)
+            print(f"{nb_cases:>7}{shape:>9}{len(body):>11}{sizes[shape][1]:>10}{elapsed * 1000:>17.2f}")
+        full, compact = sizes['full'], sizes['compact']
+        print(f"{'':>7}{'saved':>9}{1 - compact[0] / full[0]:>11.0%}{1 - compact[1] / full[1]:>10.0%}"
+              f"{1 - compact[2] / full[2]:>17.0%}")
+
+
+if __name__ == '__main__':
+    main()
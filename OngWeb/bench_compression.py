@@ -0,0 +1,64 @@
+"""
+Benchmark of response compression on the heaviest endpoints.
+
+Fetches each endpoint uncompressed through the Flask test client (against the
+configured database, read-only), then compresses the body with gzip and
+brotli at several levels and reports the bytes on the wire and the CPU time
+spent per response, to pick COMPRESSION_LEVEL / COMPRESSION_BROTLI_QUALITY.
+
+Usage:
+    python bench_compression.py [--repeat 5] [--endpoints /api/cases,/public/dashboard]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('JOB_WORKER_THREAD', 'false')
+
+from app import app
+from response_compression import brotli, compress
+
+
+ENDPOINTS = ['/api/cases', '/api/social-cases', '/api/cases_legacy', '/public/dashboard']
+CODECS = [('gzip', 1), ('gzip', 6), ('gzip', 9)]
+if brotli is not None:
+    CODECS += [('br', 1), ('br', 4), ('br', 11)]
+
+
+def cpu_time(repeat, fn):
+    """Lowest CPU time of `repeat` runs, and the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    args = parser.parse_args()
+    if brotli is None:
+        print("brotli not installed: gzip only.")
+
+    client = app.test_client()
+    print(f"{'endpoint':<22}{'codec':<9}{'bytes':>11}{'ratio':>8}{'cpu (ms)':>10}")
+    for endpoint in args.endpoints.split(','):
+        response = client.get(endpoint, headers={'Accept-Encoding': 'identity'})
+        if response.status_code != 200:
+            print(f"{endpoint:<22}HTTP {response.status_code}, skipped")
+            continue
+        data = response.get_data()
+        print(f"{endpoint:<22}{'none':<9}{len(data):>11}{1:>8.2f}{0:>10.2f}")
+        for encoding, level in CODECS:
+            elapsed, body = cpu_time(args.repeat, lambda: compress(data, encoding, level))
+            print(f"{'':<22}{f'{encoding}-{level}':<9}{len(body):>11}"
+                  f"{len(data) / max(len(body), 1):>8.2f}{elapsed * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
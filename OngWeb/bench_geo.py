@@ -0,0 +1,141 @@
+"""
+Benchmark of the case radius query on synthetic datasets.
+
+Fills a scratch database (<DB_NAME>_bench) with cases spread over Mauritania,
+then times a linear haversine scan over every approved case against the
+bounding-box + index path of case_geo.radius_filter(), and checks that both
+return the same cases.
+
+Usage:
+    python bench_geo.py [--sizes 10000,100000,1000000] [--radius 10] [--repeat 3] [--keep]
+"""
+
+import argparse
+import random
+import time
+
+import pymysql
+import pymysql.cursors
+
+from config import Config
+from case_geo import distance_sql, radius_filter
+
+
+# Populated places (lat, lon): cases cluster around them like real data
+CITIES = [(18.0858, -15.9785), (20.9310, -17.0347), (16.6200, -7.2600), (16.5138, -15.8050),
+          (20.5169, -13.0499), (17.0600, -12.0400), (15.1600, -12.1800), (22.6800, -12.7100)]
+QUERY_POINTS = [(18.0858, -15.9785), (16.6200, -7.2600), (19.0000, -11.0000)]
+
+
+def linear_scan(cursor, lat, lon, radius_km):
+    cursor.execute(f"""
+        SELECT id_cas_social FROM (
+            SELECT id_cas_social, {distance_sql(lat, lon, 'c')} as distance_km
+            FROM cas_social c IGNORE INDEX (idx_cas_approbation_geo)
+            WHERE c.statut_approbation = 'approuvé' AND c.latitude IS NOT NULL
+        ) scanned
+        WHERE distance_km <= %s
+        ORDER BY distance_km
+    """, (radius_km,))
+    return [row['id_cas_social'] for row in cursor.fetchall()]
+
+
+def indexed_query(cursor, lat, lon, radius_km):
+    conditions, params = radius_filter(lat, lon, radius_km)
+    cursor.execute(f"""
+        SELECT c.id_cas_social, {distance_sql(lat, lon)} as distance_km
+        FROM cas_social c
+        WHERE c.statut_approbation = 'approuvé' AND {' AND '.join(conditions)}
+        ORDER BY distance_km
+    """, params)
+    return [row['id_cas_social'] for row in cursor.fetchall()]
+
+
+def create_dataset(conn, nb_cases, seed=42):
+    rng = random.Random(seed)
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS cas_social")
+        cursor.execute("""
+            CREATE TABLE cas_social (
+                id_cas_social INT AUTO_INCREMENT PRIMARY KEY,
+                titre VARCHAR(150) NOT NULL,
+                statut_approbation ENUM('en_attente', 'approuvé', 'rejeté') DEFAULT 'approuvé',
+                latitude DECIMAL(9,6) NULL,
+                longitude DECIMAL(9,6) NULL,
+                INDEX idx_cas_approbation_geo (statut_approbation, latitude, longitude)
+            )
+        """)
+
+        batch = []
+        for i in range(nb_cases):
+            if rng.random() < 0.1:
+                lat = lon = None  # cases without coordinates
+            elif rng.random() < 0.7:
+                city_lat, city_lon = rng.choice(CITIES)
+                lat, lon = rng.gauss(city_lat, 0.15), rng.gauss(city_lon, 0.15)
+            else:
+                lat, lon = rng.uniform(14.7, 27.3), rng.uniform(-17.1, -4.8)
+            approbation = 'approuvé' if rng.random() < 0.8 else 'en_attente'
+            batch.append((f"Cas {i}", approbation, lat, lon))
+            if len(batch) == 10000:
+                cursor.executemany(
+                    "INSERT INTO cas_social (titre, statut_approbation, latitude, longitude) VALUES (%s, %s, %s, %s)",
+                    batch
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                "INSERT INTO cas_social (titre, statut_approbation, latitude, longitude) VALUES (%s, %s, %s, %s)",
+                batch
+            )
+        cursor.execute("ANALYZE TABLE cas_social")
+    conn.commit()
+
+
+def best_of(repeat, fn):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--radius', type=float, default=10.0, help="km")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--keep', action='store_true', help="keep the scratch database")
+    args = parser.parse_args()
+
+    bench_db = f"{Config.DB_NAME}_bench"
+    conn = pymysql.connect(host=Config.DB_HOST, user=Config.DB_USER, password=Config.DB_PASSWORD,
+                           charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {bench_db} "
+                           "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        conn.select_db(bench_db)
+
+        print(f"{'cases':>9}{'point':>22}{'hits':>7}{'linear (ms)':>13}{'indexed (ms)':>14}{'speedup':>10}")
+        for size in (int(s) for s in args.sizes.split(',')):
+            create_dataset(conn, size)
+            with conn.cursor() as cursor:
+                for lat, lon in QUERY_POINTS:
+                    linear_time, linear_ids = best_of(args.repeat, lambda: linear_scan(cursor, lat, lon, args.radius))
+                    indexed_time, indexed_ids = best_of(args.repeat, lambda: indexed_query(cursor, lat, lon, args.radius))
+                    check = '' if sorted(linear_ids) == sorted(indexed_ids) else "  MISMATCH"
+                    print(f"{size:>9}{f'({lat:.2f}, {lon:.2f})':>22}{len(indexed_ids):>7}"
+                          f"{linear_time * 1000:>13.1f}{indexed_time * 1000:>14.1f}"
+                          f"{linear_time / max(indexed_time, 1e-9):>9.1f}x{check}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP DATABASE IF EXISTS {bench_db}")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Beneficiary accounting for ONG Connect.
+
+Strict count: only resolved cases ('Résolu') count, each explicit
+beneficiary (row of `beneficier`) counts once, and a resolved case without
+any explicit beneficiary counts as one implicit beneficiary.
+
+beneficiary_stats() is the single entry point used by the dashboards and
+/api/stats/beneficiaries. Implicit beneficiaries are found with an anti-join
+(LEFT JOIN beneficier ... IS NULL) and every breakdown is a SQL GROUP BY, so
+the work is proportional to the number of groups returned, not of cases.
+The unfiltered total is read from the materialized counters.
+"""
+
+from stats_summary import beneficiary_total
+from ong_domains import domain_filter_sql, ong_domain_names
+
+
+def _filter_sql(ong_id=None, category=None, location=None):
+    """Conditions shared by the explicit and implicit parts ('b' may be NULL)."""
+    where = ["c.statut = 'Résolu'"]
+    params = []
+    if ong_id:
+        where.append("c.id_ong = %s")
+        params.append(ong_id)
+    if category:
+        where.append(domain_filter_sql('c'))
+        params.append(category)
+    if location:
+        where.append("(b.adresse LIKE %s OR c.adresse LIKE %s)")
+        params.extend([f"%{location}%"] * 2)
+    return ' AND '.join(where), params
+
+
+def _grouped(cursor, key_sql, filters, order_limit=''):
+    """
+    SUM of beneficiaries grouped by `key_sql` (an expression over c, o and a
+    `loc` column), explicit and implicit parts combined.
+    """
+    where, params = _filter_sql(**filters)
+    cursor.execute(f"""
+        SELECT grp, SUM(n) as total FROM (
+            SELECT {key_sql.format(loc='b.adresse')} as grp, COUNT(*) as n
+            FROM beneficier b
+            JOIN cas_social c ON b.id_cas_social = c.id_cas_social
+            LEFT JOIN ong o ON c.id_ong = o.id_ong
+            WHERE {where}
+            GROUP BY grp
+
+            UNION ALL
+
+            SELECT {key_sql.format(loc='c.adresse')} as grp, COUNT(*) as n
+            FROM cas_social c
+            LEFT JOIN beneficier b ON b.id_cas_social = c.id_cas_social
+            LEFT JOIN ong o ON c.id_ong = o.id_ong
+            WHERE b.id_beneficiaire IS NULL AND {where}
+            GROUP BY grp
+        ) parts
+        GROUP BY grp
+        {order_limit}
+    """, params + params)
+    return [(row['grp'], int(row['total'])) for row in cursor.fetchall()]
+
+
+def beneficiary_stats(cursor, ong_id=None, category=None, location=None,
+                      breakdown=True, top=10):
+    """
+    Strict beneficiary statistics, optionally filtered by ONG, ONG domain
+    (category name) and address (LIKE).
+
+    Returns {'total': int} and, with `breakdown`, 'by_ong' and 'by_location'
+    as [(label, count)] (top `top`, largest first) and 'by_category' as
+    {domain: count}.
+    """
+    filters = {'ong_id': ong_id, 'category': category, 'location': location}
+    if not breakdown and not any(filters.values()):
+        return {'total': beneficiary_total(cursor)}
+
+    # One row per ONG: gives the total, the ONG ranking and, through each
+    # ONG's domain list, the per-domain counts
+    per_ong = _grouped(cursor, "c.id_ong", filters)
+    total = sum(n for _, n in per_ong)
+    if not breakdown:
+        return {'total': total}
+
+    ong_ids = [ong for ong, _ in per_ong if ong is not None]
+    names = {}
+    if ong_ids:
+        placeholders = ', '.join(['%s'] * len(ong_ids))
+        cursor.execute(
+            f"SELECT id_ong, nom_ong FROM ong WHERE id_ong IN ({placeholders})", ong_ids
+        )
+        names = {row['id_ong']: row['nom_ong'] for row in cursor.fetchall()}
+    domains = ong_domain_names(cursor, ong_ids)
+
+    by_ong = {}
+    by_category = {}
+    for ong_id_value, n in per_ong:
+        if ong_id_value not in names:
+            continue
+        name = names[ong_id_value]
+        by_ong[name] = by_ong.get(name, 0) + n
+        for domain in domains.get(ong_id_value, []):
+            by_category[domain] = by_category.get(domain, 0) + n
+
+    by_location = _grouped(
+        cursor, "COALESCE(NULLIF({loc}, ''), 'Inconnu')", filters,
+        order_limit=f"ORDER BY total DESC LIMIT {int(top)}"
+    )
+
+    return {
+        'total': total,
+        'by_ong': sorted(by_ong.items(), key=lambda item: item[1], reverse=True)[:top],
+        'by_category': by_category,
+        'by_location': by_location,
+    }
@@ -0,0 +1,110 @@
+"""
+Set-based deletion of social cases and ONGs for ONG Connect.
+
+Rejecting or deleting an ONG used to loop over its cases (one SELECT and three
+DELETEs per case, plus the file removals). These helpers run a fixed number of
+statements whatever the number of cases, in the caller's transaction:
+- the files to remove are collected with a single join, media files are
+  released (media_store.py: shared files stay while referenced), and the rest
+  is handed to the job worker ('delete_files') to remove once committed
+- the rows are deleted with set-based DELETE ... JOIN / IN statements
+- the delta-sync tombstones and statistics counters are updated first
+
+- delete_cases(): cases with their media and beneficiary links
+- delete_ongs(): ONGs with their cases and login accounts
+
+notifications and ong_domain rows go with their case / ONG (ON DELETE CASCADE).
+The caller commits and invalidates the response cache.
+"""
+
+from delta_sync import record_deletion
+from stats_summary import remove_case_counts, remove_ong_counts
+from jobs import enqueue
+from media_store import release_media
+
+
+def _in_list(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+def _queue_file_removal(cursor, media_rows, other_files=()):
+    # Media files are shared (media_store.py): only the unreferenced ones go
+    files = release_media(cursor, [row['file_url'] for row in media_rows])
+    files += [url for url in other_files if url]
+    if files:
+        enqueue(cursor, 'delete_files', {'files': files})
+
+
+def delete_cases(cursor, case_ids):
+    """Delete cases, their media and beneficiary links. Returns the number of cases deleted."""
+    case_ids = [i for i in case_ids if i is not None]
+    if not case_ids:
+        return 0
+    in_cases = _in_list(case_ids)
+
+    cursor.execute(f"SELECT file_url FROM media WHERE id_cas_social IN ({in_cases})", case_ids)
+    files = cursor.fetchall()
+
+    record_deletion(cursor, 'case', case_ids)
+    remove_case_counts(cursor, case_ids)
+    cursor.execute(f"DELETE FROM media WHERE id_cas_social IN ({in_cases})", case_ids)
+    cursor.execute(f"DELETE FROM beneficier WHERE id_cas_social IN ({in_cases})", case_ids)
+    cursor.execute(f"DELETE FROM cas_social WHERE id_cas_social IN ({in_cases})", case_ids)
+    deleted = cursor.rowcount
+
+    _queue_file_removal(cursor, files)
+    return deleted
+
+
+def delete_ongs(cursor, ong_ids):
+    """
+    Delete ONGs with all their cases, media, beneficiary links and their
+    `users` login rows. Returns the number of ONGs deleted.
+    """
+    ong_ids = [i for i in ong_ids if i is not None]
+    if not ong_ids:
+        return 0
+    in_ongs = _in_list(ong_ids)
+
+    # Every file to remove: case media, logos and verification documents
+    cursor.execute(f"""
+        SELECT 'media' as kind, m.file_url FROM media m
+        JOIN cas_social c ON c.id_cas_social = m.id_cas_social
+        WHERE c.id_ong IN ({in_ongs})
+        UNION ALL
+        SELECT 'ong', logo_url FROM ong WHERE id_ong IN ({in_ongs})
+        UNION ALL
+        SELECT 'ong', verification_doc_url FROM ong WHERE id_ong IN ({in_ongs})
+    """, ong_ids * 3)
+    files = cursor.fetchall()
+
+    cursor.execute(f"SELECT id_cas_social FROM cas_social WHERE id_ong IN ({in_ongs})", ong_ids)
+    case_ids = [row['id_cas_social'] for row in cursor.fetchall()]
+
+    record_deletion(cursor, 'case', case_ids)
+    record_deletion(cursor, 'ong', ong_ids)
+    remove_case_counts(cursor, case_ids)
+    remove_ong_counts(cursor, ong_ids)
+
+    cursor.execute(f"""
+        DELETE m FROM media m
+        JOIN cas_social c ON c.id_cas_social = m.id_cas_social
+        WHERE c.id_ong IN ({in_ongs})
+    """, ong_ids)
+    cursor.execute(f"""
+        DELETE b FROM beneficier b
+        JOIN cas_social c ON c.id_cas_social = b.id_cas_social
+        WHERE c.id_ong IN ({in_ongs})
+    """, ong_ids)
+    cursor.execute(f"DELETE FROM cas_social WHERE id_ong IN ({in_ongs})", ong_ids)
+    cursor.execute(f"""
+        DELETE u FROM users u
+        JOIN ong o ON o.user_id = u.id
+        WHERE o.id_ong IN ({in_ongs})
+    """, ong_ids)
+    cursor.execute(f"DELETE FROM ong WHERE id_ong IN ({in_ongs})", ong_ids)
+    deleted = cursor.rowcount
+
+    _queue_file_removal(cursor, [row for row in files if row['kind'] == 'media'],
+                        [row['file_url'] for row in files if row['kind'] == 'ong'])
+    return deleted
@@ -0,0 +1,119 @@
+"""
+Public case feed queries for ONG Connect.
+
+Server-side filtering and keyset pagination for the public dashboard:
+- Filters on search text (full-text index), status, ONG and domain are
+  applied in SQL
+- Pages are addressed by a (date_publication, id_cas_social) cursor instead of
+  OFFSET, so fetching page N costs the same as fetching page 1
+"""
+
+from datetime import date, datetime
+
+from ong_domains import domain_filter_sql
+from case_search import search_condition
+
+
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 50
+
+
+def encode_cursor(case):
+    """Build the opaque cursor pointing just after `case`."""
+    pub_date = case.get('date_publication')
+    if isinstance(pub_date, (date, datetime)):
+        pub_date = pub_date.strftime('%Y-%m-%d')
+    return f"{pub_date or ''}_{case['id_cas_social']}"
+
+
+def decode_cursor(value):
+    """Parse a cursor into (date_publication or None, id). Returns None if invalid."""
+    if not value or '_' not in value:
+        return None
+    pub_date, _, case_id = value.rpartition('_')
+    try:
+        case_id = int(case_id)
+        pub_date = datetime.strptime(pub_date, '%Y-%m-%d').date() if pub_date else None
+    except ValueError:
+        return None
+    return pub_date, case_id
+
+
+def filters_from_args(args):
+    """Extract the supported dashboard filters from request args."""
+    return {
+        'search': (args.get('search') or '').strip(),
+        'status': args.get('status') or '',
+        'ong_id': args.get('ong_id', type=int),
+        'domain': (args.get('domain') or '').strip(),
+    }
+
+
+def _where_clause(filters):
+    where = ["c.statut_approbation = 'approuvé'"]
+    params = []
+
+    if filters.get('search'):
+        condition, search_params = search_condition(filters['search'])
+        if condition:
+            where.append(condition)
+            params.extend(search_params)
+    if filters.get('status'):
+        where.append("c.statut = %s")
+        params.append(filters['status'])
+    if filters.get('ong_id'):
+        where.append("c.id_ong = %s")
+        params.append(filters['ong_id'])
+    if filters.get('domain'):
+        where.append(domain_filter_sql('c'))
+        params.append(filters['domain'])
+
+    return where, params
+
+
+def count_cases(cursor, filters):
+    """Count approved cases matching `filters`."""
+    where, params = _where_clause(filters)
+    cursor.execute(f"""
+        SELECT COUNT(*) as count
+        FROM cas_social c
+        LEFT JOIN ong o ON c.id_ong = o.id_ong
+        WHERE {' AND '.join(where)}
+    """, params)
+    return cursor.fetchone()['count']
+
+
+def fetch_case_page(cursor, filters, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of approved cases, newest first.
+
+    `after` is a decoded cursor (see decode_cursor). Returns (cases, next_cursor),
+    next_cursor being None on the last page.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    where, params = _where_clause(filters)
+
+    if after:
+        after_date, after_id = after
+        # DESC order puts NULL dates last, so they follow every dated row
+        if after_date is None:
+            where.append("(c.date_publication IS NULL AND c.id_cas_social < %s)")
+            params.append(after_id)
+        else:
+            where.append("""(c.date_publication < %s OR c.date_publication IS NULL
+                              OR (c.date_publication = %s AND c.id_cas_social < %s))""")
+            params.extend([after_date, after_date, after_id])
+
+    cursor.execute(f"""
+        SELECT c.*, o.nom_ong, o.logo_url, o.domaine_intervation, COALESCE(c.cover_thumb_url, c.cover_url) as file_url
+        FROM cas_social c
+        LEFT JOIN ong o ON c.id_ong = o.id_ong
+        WHERE {' AND '.join(where)}
+        ORDER BY c.date_publication DESC, c.id_cas_social DESC
+        LIMIT %s
+    """, params + [limit + 1])
+    rows = cursor.fetchall()
+
+    cases = rows[:limit]
+    next_cursor = encode_cursor(cases[-1]) if len(rows) > limit else None
+    return cases, next_cursor
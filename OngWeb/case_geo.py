@@ -0,0 +1,92 @@
+"""
+Radius queries over social cases for ONG Connect.
+
+Cases are located by cas_social.latitude / longitude (degrees). A radius
+query first restricts the rows to the bounding box of the circle, which the
+(statut_approbation, latitude, longitude) index answers as a range scan, then
+applies the exact great-circle (haversine) distance to that small set and
+sorts by it.
+
+- bounding_box(): the lat/lon rectangle enclosing a circle
+- distance_sql(): SQL expression of the distance in km to a point
+- radius_filter(): (conditions, params) selecting the cases within a radius
+- haversine_km(): the same distance in Python
+"""
+
+import math
+
+
+EARTH_RADIUS_KM = 6371.0
+
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 500.0
+
+
+def valid_point(lat, lon):
+    """True for finite coordinates within the WGS84 ranges."""
+    return (lat is not None and lon is not None
+            and math.isfinite(lat) and math.isfinite(lon)
+            and -90 <= lat <= 90 and -180 <= lon <= 180)
+
+
+def clamp_radius(radius_km):
+    """Radius in km bounded to (0, MAX_RADIUS_KM], DEFAULT_RADIUS_KM if unusable."""
+    if radius_km is None or not math.isfinite(radius_km) or radius_km <= 0:
+        return DEFAULT_RADIUS_KM
+    return min(radius_km, MAX_RADIUS_KM)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the circle."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - d_lat, lat + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole: every longitude is in range
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    d_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM)
+                                       / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180 or max_lon > 180:
+        # Crossing the antimeridian: keep the latitude band only
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def distance_sql(lat, lon, alias='c'):
+    """
+    SQL expression of the distance in km from `alias`'s case to (lat, lon).
+
+    The coordinates are inlined as float literals so the expression can sit in
+    a select list ahead of other placeholders; pass only validated floats.
+    """
+    lat, lon = float(lat), float(lon)
+    return f"""({2 * EARTH_RADIUS_KM} * ASIN(LEAST(1, SQRT(
+        POWER(SIN(RADIANS({alias}.latitude - {lat!r}) / 2), 2)
+        + COS(RADIANS({lat!r})) * COS(RADIANS({alias}.latitude))
+          * POWER(SIN(RADIANS({alias}.longitude - {lon!r}) / 2), 2)
+    ))))"""
+
+
+def radius_filter(lat, lon, radius_km, alias='c'):
+    """(conditions, params) selecting the cases within `radius_km` of (lat, lon)."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    conditions = [f"{alias}.latitude BETWEEN %s AND %s"]
+    params = [min_lat, max_lat]
+    if (min_lon, max_lon) != (-180.0, 180.0):
+        conditions.append(f"{alias}.longitude BETWEEN %s AND %s")
+        params.extend([min_lon, max_lon])
+    else:
+        conditions.append(f"{alias}.longitude IS NOT NULL")
+    # The box corners lie outside the circle: exact check on the prefiltered rows
+    conditions.append(f"{distance_sql(lat, lon, alias)} <= %s")
+    params.append(radius_km)
+    return conditions, params
@@ -0,0 +1,97 @@
+"""
+Case media helpers for ONG Connect.
+
+`cas_social.cover_media_id` / `cover_url` / `cover_thumb_url` hold the case's
+cover image (its first uploaded media) and its thumbnail, so list queries read
+it from the case row instead of running a media subquery per row. This module
+keeps those columns in sync:
+- insert_media() to record an upload stored by media_store.store_media()
+- set_cover_if_missing() after a media INSERT
+- refresh_case_cover() after a media DELETE
+- backfill_cover_media() to (re)compute every case, also runnable as a script
+"""
+
+from jobs import enqueue
+
+
+def insert_media(cursor, case_id, file_url, description=None):
+    """
+    Insert a media row for a file stored by media_store.store_media() and
+    update the cover. A file already processed for another media reuses its
+    renditions; otherwise the 'process_media' job fills them in later.
+    """
+    cursor.execute("""
+        SELECT thumb_url, medium_url, width, height FROM media
+        WHERE file_url = %s AND thumb_url IS NOT NULL LIMIT 1
+    """, (file_url,))
+    processed = cursor.fetchone() or {}
+    cursor.execute("""
+        INSERT INTO media (id_cas_social, file_url, description_media,
+                           thumb_url, medium_url, width, height)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (case_id, file_url, description, processed.get('thumb_url'),
+          processed.get('medium_url'), processed.get('width'), processed.get('height')))
+    media_id = cursor.lastrowid
+    set_cover_if_missing(cursor, case_id, media_id, file_url, processed.get('thumb_url'))
+    if not processed:
+        enqueue(cursor, 'process_media', {'media_id': media_id})
+    return media_id
+
+
+def set_cover_if_missing(cursor, case_id, media_id, file_url, thumb_url=None):
+    """Use a newly inserted media as cover when the case has none yet."""
+    cursor.execute("""
+        UPDATE cas_social SET cover_media_id = %s, cover_url = %s, cover_thumb_url = %s
+        WHERE id_cas_social = %s AND cover_media_id IS NULL
+    """, (media_id, file_url, thumb_url, case_id))
+
+
+def refresh_case_cover(cursor, case_id):
+    """Recompute the cover of one case from its remaining media."""
+    cursor.execute("""
+        UPDATE cas_social c
+        LEFT JOIN (
+            SELECT id_media, file_url, thumb_url FROM media
+            WHERE id_cas_social = %s
+            ORDER BY id_media LIMIT 1
+        ) m ON 1 = 1
+        SET c.cover_media_id = m.id_media, c.cover_url = m.file_url, c.cover_thumb_url = m.thumb_url
+        WHERE c.id_cas_social = %s
+    """, (case_id, case_id))
+
+
+def backfill_cover_media(conn, batch_size=1000):
+    """Recompute cover columns for every case, committing per id range."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id_cas_social), 0) as max_id FROM cas_social")
+        max_id = cursor.fetchone()['max_id']
+
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            cursor.execute("""
+                UPDATE cas_social c
+                LEFT JOIN (
+                    SELECT id_cas_social, MIN(id_media) as id_media
+                    FROM media
+                    WHERE id_cas_social > %s AND id_cas_social <= %s
+                    GROUP BY id_cas_social
+                ) first_media ON first_media.id_cas_social = c.id_cas_social
+                LEFT JOIN media m ON m.id_media = first_media.id_media
+                SET c.cover_media_id = m.id_media, c.cover_url = m.file_url,
+                    c.cover_thumb_url = m.thumb_url
+                WHERE c.id_cas_social > %s AND c.id_cas_social <= %s
+            """, (start, start + batch_size, start, start + batch_size))
+            updated += cursor.rowcount
+            conn.commit()
+
+    print(f"Cover media backfilled ({updated} cases changed).")
+    return updated
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config, get_db
+
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        backfill_cover_media(conn)
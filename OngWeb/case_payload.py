@@ -0,0 +1,86 @@
+"""
+JSON shapes of the /api/cases mobile feed.
+
+The full shape embeds, in every case, the ONG block (name, logo, phone,
+email) and absolute image URLs: with N cases from a few ONGs most of the
+payload is the same ONG blocks and the same host prefix repeated.
+
+The compact shape (`?format=compact`) sends each ONG and category once in
+lookup tables keyed by id; cases reference them by `ong_id` / `category_id`
+and carry file paths relative to `base_url`:
+
+    {"base_url": "https://host/static/",
+     "ongs": {"3": {"name": ..., "logo": "uploads/logos/..", "phone": .., "email": ..}},
+     "categories": {"2": "Santé"},
+     "data": [{"id": 7, ..., "ong_id": 3, "category_id": 2, "image": "uploads/media/.."}]}
+
+A case without category has `category_id: null` (shown as 'Autre').
+See bench_case_payload.py for the size and serialization time of both.
+
+- full_cases(): the original shape, one self-contained object per case
+- compact_cases(): cases plus the `ongs` / `categories` lookup tables
+"""
+
+
+def _date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def _location(case):
+    return {
+        'lat': float(case['latitude']) if case['latitude'] else None,
+        'lng': float(case['longitude']) if case['longitude'] else None,
+        'wilaya': case['wilaya'],
+        'moughataa': case['moughataa'],
+        'distance_km': round(float(case['distance_km']), 2) if case.get('distance_km') is not None else None
+    }
+
+
+def full_cases(cases, static_url):
+    """Cases with their ONG embedded and absolute URLs under `static_url`."""
+    return [{
+        'id': case['id_cas_social'],
+        'title': case['titre'],
+        'description': case['description'],
+        'address': case['adresse'],
+        'date': _date(case['date_publication']),
+        'status': case['statut'],
+        'location': _location(case),
+        'ong': {
+            'id': case['id_ong'],
+            'name': case['nom_ong'],
+            'logo': f"{static_url}{case['logo_url']}" if case.get('logo_url') else None,
+            'phone': case['ong_phone'],
+            'email': case['ong_email']
+        },
+        'category': case['categorie_nom'],
+        'image': f"{static_url}{case['main_image']}" if case.get('main_image') else None,
+    } for case in cases]
+
+
+def compact_cases(cases):
+    """Returns (cases, ongs, categories): cases point to the lookup tables by id."""
+    results, ongs, categories = [], {}, {}
+    for case in cases:
+        if case['id_ong'] is not None and case['id_ong'] not in ongs:
+            ongs[case['id_ong']] = {
+                'name': case['nom_ong'],
+                'logo': case.get('logo_url') or None,
+                'phone': case['ong_phone'],
+                'email': case['ong_email']
+            }
+        if case['category_id'] is not None:
+            categories[case['category_id']] = case['categorie_nom']
+        results.append({
+            'id': case['id_cas_social'],
+            'title': case['titre'],
+            'description': case['description'],
+            'address': case['adresse'],
+            'date': _date(case['date_publication']),
+            'status': case['statut'],
+            'location': _location(case),
+            'ong_id': case['id_ong'],
+            'category_id': case['category_id'],
+            'image': case.get('main_image') or None,
+        })
+    return results, ongs, categories
@@ -0,0 +1,195 @@
+"""
+Full-text search over social cases for ONG Connect.
+
+Titles and descriptions are normalized in Python (Arabic diacritics, tatweel
+and letter variants, French accents, case) into the `search_title` and
+`search_body` columns of cas_social, which carry InnoDB FULLTEXT indexes built
+with the ngram parser (Arabic has no word spacing a whitespace parser could
+rely on). Queries are normalized the same way, so both sides compare equal.
+
+- normalize_text(): the shared normalization
+- index_cases(): refresh the search columns after a case INSERT/UPDATE
+- search_condition(): WHERE condition for the filtered feeds
+- search_cases(): relevance-ranked results for /api/search
+- reindex_all(): rebuild every row, also runnable as a script
+"""
+
+import re
+import unicodedata
+
+
+# MySQL ngram_token_size (default 2): shorter words are not indexed
+NGRAM_TOKEN_SIZE = 2
+
+# Title matches weigh more than description matches
+TITLE_WEIGHT = 2
+
+REINDEX_BATCH_SIZE = 500
+
+_ARABIC_LETTERS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    'ـ': None,  # tatweel
+})
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_text(text):
+    """Lowercase, strip accents/harakat/tatweel, unify Arabic letter variants."""
+    if not text:
+        return ''
+    # Letter variants first: NFKD would split أ/إ/آ into alef + combining mark
+    text = str(text).translate(_ARABIC_LETTERS)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_WORD.sub(' ', text.casefold().replace('_', ' '))
+    return ' '.join(text.split())
+
+
+def search_terms(query):
+    """Normalized query words."""
+    return normalize_text(query).split()
+
+
+def _boolean_query(terms):
+    # Each word must appear; ngram turns a quoted word into a phrase of ngrams
+    return ' '.join(f'+"{term}"' for term in terms)
+
+
+def _split_terms(query):
+    terms = search_terms(query)
+    indexed = [term for term in terms if len(term) >= NGRAM_TOKEN_SIZE]
+    return indexed, [term for term in terms if len(term) < NGRAM_TOKEN_SIZE]
+
+
+def search_condition(query, alias='c'):
+    """
+    (sql, params) restricting `alias` to cases matching every query word,
+    or (None, []) when the query holds no word.
+    """
+    indexed, short = _split_terms(query)
+    conditions = []
+    params = []
+    if indexed:
+        conditions.append(f"MATCH({alias}.search_title, {alias}.search_body) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(_boolean_query(indexed))
+    # Single letters are below the ngram size: the index cannot answer them
+    for term in short:
+        conditions.append(f"({alias}.search_title LIKE %s OR {alias}.search_body LIKE %s)")
+        params.extend([f"%{term}%"] * 2)
+    if not conditions:
+        return None, []
+    return ' AND '.join(conditions), params
+
+
+def search_cases(cursor, query, limit=20, offset=0, category=None, ong_id=None, status=None):
+    """
+    Approved cases matching `query`, best match first.
+
+    Returns (cases, total). The score weighs title matches TITLE_WEIGHT times
+    more than description matches; ties go to the most recent case.
+    """
+    condition, params = search_condition(query)
+    if condition is None:
+        return [], 0
+
+    where = ["c.statut_approbation = 'approuvé'", condition]
+    if category:
+        where.append("cat.nomCategorie = %s")
+        params.append(category)
+    if ong_id:
+        where.append("c.id_ong = %s")
+        params.append(ong_id)
+    if status:
+        where.append("c.statut = %s")
+        params.append(status)
+    where = ' AND '.join(where)
+
+    cursor.execute(f"""
+        SELECT COUNT(*) as count
+        FROM cas_social c
+        LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
+        WHERE {where}
+    """, params)
+    total = cursor.fetchone()['count']
+    if not total:
+        return [], 0
+
+    indexed, _ = _split_terms(query)
+    if indexed:
+        score = f"""(MATCH(c.search_title) AGAINST (%s IN BOOLEAN MODE) * {TITLE_WEIGHT}
+                     + MATCH(c.search_title, c.search_body) AGAINST (%s IN BOOLEAN MODE))"""
+        score_params = [_boolean_query(indexed)] * 2
+    else:
+        score, score_params = "0", []
+
+    cursor.execute(f"""
+        SELECT c.id_cas_social, c.titre, c.description, c.adresse, c.statut,
+               c.date_publication, c.latitude, c.longitude,
+               o.id_ong, o.nom_ong, o.logo_url,
+               cat.nomCategorie as category,
+               COALESCE(c.cover_thumb_url, c.cover_url) as image,
+               {score} as score
+        FROM cas_social c
+        LEFT JOIN ong o ON c.id_ong = o.id_ong
+        LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
+        WHERE {where}
+        ORDER BY score DESC, c.date_publication DESC, c.id_cas_social DESC
+        LIMIT %s OFFSET %s
+    """, score_params + params + [int(limit), int(offset)])
+    return cursor.fetchall(), total
+
+
+def _write_search_columns(cursor, cases):
+    # updated_at = updated_at: reindexing alone is not a change for delta sync
+    cursor.executemany("""
+        UPDATE cas_social SET search_title = %s, search_body = %s, updated_at = updated_at
+        WHERE id_cas_social = %s
+    """, [(normalize_text(case['titre']), normalize_text(case['description']),
+           case['id_cas_social']) for case in cases])
+
+
+def index_cases(cursor, case_ids):
+    """Refresh the search columns of `case_ids` (after INSERT or UPDATE)."""
+    case_ids = [i for i in case_ids if i is not None]
+    if not case_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(case_ids))
+    cursor.execute(
+        f"SELECT id_cas_social, titre, description FROM cas_social WHERE id_cas_social IN ({placeholders})",
+        case_ids
+    )
+    _write_search_columns(cursor, cursor.fetchall())
+
+
+def reindex_all(conn):
+    """Recompute the search columns of every case, in batches."""
+    last_id = 0
+    indexed = 0
+    with conn.cursor() as cursor:
+        while True:
+            cursor.execute("""
+                SELECT id_cas_social, titre, description FROM cas_social
+                WHERE id_cas_social > %s ORDER BY id_cas_social LIMIT %s
+            """, (last_id, REINDEX_BATCH_SIZE))
+            cases = cursor.fetchall()
+            if not cases:
+                break
+            _write_search_columns(cursor, cases)
+            conn.commit()
+            indexed += len(cases)
+            last_id = cases[-1]['id_cas_social']
+    print(f"Search index rebuilt ({indexed} cases).")
+    return indexed
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config, get_db
+
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        reindex_all(conn)
@@ -0,0 +1,108 @@
+"""
+EXPLAIN-based index check for ONG Connect hot queries.
+
+Runs EXPLAIN on the query shapes the public pages and mobile API execute on
+every request and fails if one of them has to scan a whole table.
+
+Usage:
+    python check_indexes.py
+
+Exit code 1 means at least one hot query does a full scan with no usable
+index. A full scan the optimizer *chose* although an index exists (typical on
+a nearly empty development database) is only reported as a warning.
+"""
+
+import sys
+
+from config import Config
+from database import init_config, get_db
+
+
+# (name, sql, params, tables that must not be fully scanned)
+HOT_QUERIES = [
+    ('public feed page', """
+        SELECT c.id_cas_social FROM cas_social c
+        WHERE c.statut_approbation = %s
+        ORDER BY c.date_publication DESC, c.id_cas_social DESC
+        LIMIT 13
+    """, ('approuvé',), ['c']),
+    ('pending cases', """
+        SELECT c.id_cas_social FROM cas_social c
+        WHERE c.statut_approbation = %s
+        ORDER BY c.date_publication DESC
+    """, ('en_attente',), ['c']),
+    ('cases by status', """
+        SELECT COUNT(*) FROM cas_social
+        WHERE statut_approbation = %s AND statut = %s
+    """, ('approuvé', 'Urgent'), ['cas_social']),
+    ('stats by wilaya', """
+        SELECT wilaya, COUNT(*) FROM cas_social
+        WHERE statut_approbation = %s GROUP BY wilaya
+    """, ('approuvé',), ['cas_social']),
+    ('stats by moughataa', """
+        SELECT moughataa, COUNT(*) FROM cas_social
+        WHERE statut_approbation = %s GROUP BY moughataa
+    """, ('approuvé',), ['cas_social']),
+    ('cases by category', """
+        SELECT c.id_cas_social FROM cas_social c
+        WHERE c.statut_approbation = %s AND c.category_id = %s
+    """, ('approuvé', 1), ['c']),
+    ('resolved cases', """
+        SELECT COUNT(*) FROM cas_social WHERE statut = %s
+    """, ('Résolu',), ['cas_social']),
+    ('ONG cases', """
+        SELECT c.id_cas_social FROM cas_social c
+        WHERE c.id_ong = %s ORDER BY c.date_publication DESC
+    """, (1,), ['c']),
+    ('first case image', """
+        SELECT file_url FROM media
+        WHERE id_cas_social = %s ORDER BY id_media LIMIT 1
+    """, (1,), ['media']),
+    ('notification feed', """
+        SELECT id_notification FROM notifications
+        ORDER BY date_notification DESC LIMIT 50
+    """, (), ['notifications']),
+    ('validated ONGs', """
+        SELECT id_ong FROM ong WHERE statut_de_validation = %s ORDER BY nom_ong
+    """, ('validé',), ['ong']),
+    ('pending ONGs', """
+        SELECT id_ong FROM ong WHERE statut_de_validation = %s ORDER BY update_at DESC
+    """, ('enattente',), ['ong']),
+]
+
+
+def explain_hot_queries(cursor):
+    """Return (failures, warnings) as lists of human-readable messages."""
+    failures = []
+    warnings = []
+    for name, sql, params, tables in HOT_QUERIES:
+        cursor.execute("EXPLAIN " + sql, params)
+        for row in cursor.fetchall():
+            if row.get('table') not in tables or row.get('type') != 'ALL':
+                continue
+            message = f"{name}: full scan on {row['table']} (rows={row.get('rows')})"
+            if row.get('possible_keys'):
+                warnings.append(f"{message}, optimizer skipped {row['possible_keys']}")
+            else:
+                failures.append(message)
+    return failures, warnings
+
+
+def main():
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            failures, warnings = explain_hot_queries(cursor)
+
+    for message in warnings:
+        print(f"WARNING  {message}")
+    for message in failures:
+        print(f"FAIL     {message}")
+    if failures:
+        return 1
+    print(f"OK       {len(HOT_QUERIES)} hot queries use an index")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
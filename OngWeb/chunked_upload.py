@@ -0,0 +1,251 @@
+"""
+Resumable chunked media uploads for the mobile app.
+
+A large file (video) is sent in chunks instead of one multipart request, so
+a dropped connection only costs the chunk in flight:
+
+    POST /api/uploads                   {filename, size, sha256} -> {upload_id, offset, chunk_size}
+    PUT  /api/uploads/<id>?offset=N     raw chunk bytes          -> {offset}
+    GET  /api/uploads/<id>                                       -> {offset, size, status}
+    POST /api/uploads/<id>/finalize                              -> checksum verified
+
+then the upload id is passed as `upload_ids` to /api/cases/add or
+/api/cases/edit/<id>, which attach it to the case like a multipart file.
+
+Chunks are streamed to a staging file outside static/ in fixed-size reads,
+so memory stays bounded whatever the file size; sizes are checked against the
+declared size and the caps (UPLOAD_MAX_FILE_BYTES per file,
+UPLOAD_CHUNK_BYTES per chunk request) before any byte is read.
+
+- create_upload(), write_chunk(), finalize_upload(), get_upload(), upload_status()
+- attach_uploads(): add finished uploads to media storage for a case
+- remove_staged_files(): delete the staged bytes of attached uploads, once
+  the caller's transaction has committed
+- purge_expired_uploads(): drop uploads abandoned for UPLOAD_EXPIRY_HOURS
+"""
+
+import hashlib
+import os
+import re
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from case_media import insert_media
+from media_renditions import strip_metadata
+from media_store import CHUNK_SIZE, add_blob, file_digest
+
+
+class UploadError(Exception):
+    """Rejected upload request; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+_settings = {
+    'UPLOAD_STAGING_FOLDER': 'upload_staging',
+    'UPLOAD_MAX_FILE_BYTES': 200 * 1024 * 1024,
+    'UPLOAD_CHUNK_BYTES': 5 * 1024 * 1024,
+    'UPLOAD_EXPIRY_HOURS': 24,
+}
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def init_uploads(config):
+    """Read the UPLOAD_* settings from a Flask/Config mapping."""
+    for key in _settings:
+        if config.get(key) is not None:
+            _settings[key] = config.get(key)
+
+
+def _staging_path(upload_id):
+    return os.path.join(_settings['UPLOAD_STAGING_FOLDER'], upload_id)
+
+
+def _load(cursor, upload_id, ong_id, lock=False):
+    cursor.execute(f"""
+        SELECT id, id_ong, filename, size_bytes, received_bytes, sha256, status
+        FROM media_upload WHERE id = %s{' FOR UPDATE' if lock else ''}
+    """, (upload_id,))
+    upload = cursor.fetchone()
+    if not upload or upload['id_ong'] != ong_id:
+        raise UploadError('Upload not found', 404)
+    return upload
+
+
+def upload_status(upload):
+    """Client view of an upload row."""
+    return {
+        'upload_id': upload['id'],
+        'offset': upload['received_bytes'],
+        'size': upload['size_bytes'],
+        'status': upload['status'],
+        'chunk_size': _settings['UPLOAD_CHUNK_BYTES'],
+    }
+
+
+def create_upload(cursor, ong_id, filename, size, sha256):
+    """Open an upload session for a file of `size` bytes. Returns its status."""
+    filename = secure_filename(filename or '')
+    sha256 = (sha256 or '').lower()
+    if not filename:
+        raise UploadError('filename required')
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError('size must be a positive number of bytes')
+    if size > _settings['UPLOAD_MAX_FILE_BYTES']:
+        raise UploadError(f"File too large (max {_settings['UPLOAD_MAX_FILE_BYTES']} bytes)", 413)
+    if not _SHA256_RE.match(sha256):
+        raise UploadError('sha256 must be the hex SHA-256 of the file')
+
+    purge_expired_uploads(cursor)
+    upload_id = uuid.uuid4().hex
+    os.makedirs(_settings['UPLOAD_STAGING_FOLDER'], exist_ok=True)
+    open(_staging_path(upload_id), 'wb').close()
+    cursor.execute("""
+        INSERT INTO media_upload (id, id_ong, filename, size_bytes, sha256)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (upload_id, ong_id, filename, size, sha256))
+    return upload_status({'id': upload_id, 'size_bytes': size, 'received_bytes': 0,
+                          'status': 'uploading'})
+
+
+def write_chunk(cursor, upload_id, ong_id, offset, stream, length):
+    """
+    Append `length` bytes read from `stream` at `offset`, which must be the
+    current end of the upload. Returns the status (with the new offset).
+    """
+    if offset is None:
+        raise UploadError('offset required')
+    if length is None:
+        raise UploadError('Content-Length required', 411)
+    if length <= 0:
+        raise UploadError('Empty chunk')
+    if length > _settings['UPLOAD_CHUNK_BYTES']:
+        raise UploadError(f"Chunk too large (max {_settings['UPLOAD_CHUNK_BYTES']} bytes)", 413)
+
+    upload = _load(cursor, upload_id, ong_id, lock=True)
+    if upload['status'] != 'uploading':
+        raise UploadError('Upload already finalized', 409)
+    if offset != upload['received_bytes']:
+        # Resent or out-of-order chunk: the client resumes from the real offset
+        raise UploadError(f"Expected offset {upload['received_bytes']}", 409)
+    if offset + length > upload['size_bytes']:
+        raise UploadError('Chunk goes past the declared size', 413)
+
+    written = 0
+    with open(_staging_path(upload_id), 'r+b') as out:
+        out.seek(offset)
+        while written < length:
+            data = stream.read(min(CHUNK_SIZE, length - written))
+            if not data:
+                break  # client went away: keep what arrived
+            out.write(data)
+            written += len(data)
+        out.truncate(offset + written)
+
+    cursor.execute("""
+        UPDATE media_upload SET received_bytes = %s WHERE id = %s
+    """, (offset + written, upload_id))
+    upload['received_bytes'] = offset + written
+    return upload_status(upload)
+
+
+def finalize_upload(cursor, upload_id, ong_id):
+    """Check that the whole file arrived and matches its SHA-256."""
+    upload = _load(cursor, upload_id, ong_id, lock=True)
+    if upload['status'] == 'complete':
+        return upload_status(upload)
+    if upload['received_bytes'] != upload['size_bytes']:
+        raise UploadError(f"Incomplete upload ({upload['received_bytes']}/{upload['size_bytes']} bytes)", 409)
+
+    digest = hashlib.sha256()
+    with open(_staging_path(upload_id), 'rb') as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(data)
+    if digest.hexdigest() != upload['sha256']:
+        # Corrupted on the way: start over
+        _discard(cursor, [upload_id])
+        raise UploadError('Checksum mismatch, upload discarded', 422)
+
+    cursor.execute("UPDATE media_upload SET status = 'complete' WHERE id = %s", (upload_id,))
+    upload['status'] = 'complete'
+    return upload_status(upload)
+
+
+def get_upload(cursor, upload_id, ong_id):
+    """Status of an upload of `ong_id` (offset to resume from)."""
+    return upload_status(_load(cursor, upload_id, ong_id))
+
+
+def parse_upload_ids(value):
+    """Distinct upload ids from a comma-separated form field, in order."""
+    return list(dict.fromkeys(part.strip() for part in (value or '').split(',') if part.strip()))
+
+
+def attach_uploads(cursor, ong_id, case_id, upload_ids, folder, web_dir):
+    """
+    Store finalized uploads of `ong_id` as media of `case_id`. Raises
+    UploadError if one of them is unknown or not finalized.
+
+    The staged files are linked into the store (images with metadata: a
+    stripped copy is stored), never moved or modified: if the transaction
+    rolls back, the uploads are still complete and can be attached again.
+    Call remove_staged_files() with the same ids after the commit.
+    """
+    upload_ids = list(dict.fromkeys(upload_ids))
+    uploads = [_load(cursor, upload_id, ong_id, lock=True) for upload_id in upload_ids]
+    for upload in uploads:
+        if upload['status'] != 'complete':
+            raise UploadError(f"Upload {upload['id']} is not finalized", 409)
+
+    os.makedirs(folder, exist_ok=True)
+    for upload in uploads:
+        extension = os.path.splitext(upload['filename'])[1].lower()
+        staged = _staging_path(upload['id'])
+        stripped = os.path.join(folder, f".upload-{uuid.uuid4().hex}")
+        try:
+            if strip_metadata(staged, stripped):
+                sha256, size = file_digest(stripped)
+                file_url = add_blob(cursor, stripped, sha256, size, folder, web_dir, extension)
+            else:
+                file_url = add_blob(cursor, staged, upload['sha256'], upload['size_bytes'],
+                                    folder, web_dir, extension, keep_source=True)
+        finally:
+            if os.path.exists(stripped):
+                os.remove(stripped)
+        insert_media(cursor, case_id, file_url)
+        cursor.execute("DELETE FROM media_upload WHERE id = %s", (upload['id'],))
+    return len(uploads)
+
+
+def remove_staged_files(upload_ids):
+    """Delete the staged bytes of uploads whose rows are gone (after commit)."""
+    for upload_id in upload_ids:
+        path = _staging_path(upload_id)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Could not delete staged upload {path}: {e}")
+
+
+def _discard(cursor, upload_ids):
+    if not upload_ids:
+        return
+    cursor.execute(f"""
+        DELETE FROM media_upload WHERE id IN ({', '.join(['%s'] * len(upload_ids))})
+    """, upload_ids)
+    remove_staged_files(upload_ids)
+
+
+def purge_expired_uploads(cursor):
+    """Drop uploads (and their staged bytes) untouched for UPLOAD_EXPIRY_HOURS."""
+    cursor.execute("""
+        SELECT id FROM media_upload
+        WHERE updated_at < NOW() - INTERVAL %s HOUR
+        LIMIT 100
+    """, (_settings['UPLOAD_EXPIRY_HOURS'],))
+    _discard(cursor, [row['id'] for row in cursor.fetchall()])
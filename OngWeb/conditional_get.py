@@ -0,0 +1,80 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the mobile list endpoints.
+
+Each collection is summarized by one cheap query: COUNT(*) and the newest
+update timestamp of every table the payload is built from. The summary is
+hashed into a weak ETag; when the client's If-None-Match matches, the view is
+skipped entirely and a bodiless 304 is returned. The timestamps are
+DATETIME(6) (migration 15): two writes within the same second still change
+the ETag.
+
+- COLLECTION_SOURCES: (table, timestamp column) pairs behind each collection
+- collection_validator(): computes (etag, last_modified) for a collection
+- conditional(): view decorator returning 304 Not Modified on a match
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+
+from db_pool import get_connection
+
+
+# Row counts catch deletions, timestamps catch inserts and updates
+COLLECTION_SOURCES = {
+    'cases': [('cas_social', 'updated_at'), ('media', 'updated_at'),
+              ('ong', 'update_at'), ('categorie', 'updated_at'),
+              ('sync_tombstone', 'deleted_at')],
+    'ongs': [('ong', 'update_at'), ('sync_tombstone', 'deleted_at')],
+    'notifications': [('notifications', 'date_notification'), ('cas_social', 'updated_at')],
+    'statistics': [('cas_social', 'updated_at'), ('ong', 'update_at')],
+}
+
+
+def collection_validator(cursor, collection):
+    """Return (etag, last_modified) summarizing the tables behind `collection`."""
+    sources = COLLECTION_SOURCES[collection]
+    cursor.execute(" UNION ALL ".join(
+        f"SELECT COUNT(*) as row_count, MAX({column}) as last_change FROM {table}"
+        for table, column in sources
+    ))
+    rows = cursor.fetchall()
+
+    summary = "|".join(f"{row['row_count']}:{row['last_change']}" for row in rows)
+    etag = hashlib.sha1(f"{collection}|{summary}".encode('utf-8')).hexdigest()[:20]
+    changes = [row['last_change'] for row in rows if row['last_change'] is not None]
+    return etag, max(changes) if changes else None
+
+
+def conditional(collection):
+    """Answer GET requests with 304 when the client's ETag is still current."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+
+            try:
+                with get_connection() as conn:
+                    with conn.cursor() as cursor:
+                        etag, last_modified = collection_validator(cursor, collection)
+            except Exception as e:
+                print(f"Validator error for {collection}: {e}")
+                return f(*args, **kwargs)
+
+            # If-Modified-Since alone is not trusted: a deletion moves no timestamp
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated
+    return decorator
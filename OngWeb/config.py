@@ -8,6 +8,43 @@ class Config:
     DB_USER = os.environ.get('DB_USER') or 'root'
     DB_PASSWORD = os.environ.get('DB_PASSWORD') or 'sidimedtop1'
     DB_NAME = os.environ.get('DB_NAME') or 'ong_connecte'
+
+    # Connection pool (sized per worker process)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_POOL_MAX_IDLE = int(os.environ.get('DB_POOL_MAX_IDLE') or 300)  # seconds
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 10)  # seconds to wait for a free connection
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() == 'true'
+
+    # Public API response cache (see response_cache.py)
+    RESPONSE_CACHE_ENABLED = (os.environ.get('RESPONSE_CACHE_ENABLED') or 'true').lower() == 'true'
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL') or 60)  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES') or 512)
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL')  # shared cache for multi-worker deployments
+
+    # Background jobs (see jobs.py)
+    JOB_WORKER_THREAD = (os.environ.get('JOB_WORKER_THREAD') or 'true').lower() == 'true'  # false when running `python jobs.py`
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 2)  # seconds
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 5)
+    JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT') or 600)  # seconds before a running job is retried
+    
+    # Mobile API tokens (see api_tokens.py)
+    AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE') or 10000)  # verified tokens kept per worker
+    AUTH_REVOCATION_SYNC_INTERVAL = float(os.environ.get('AUTH_REVOCATION_SYNC_INTERVAL') or 5)  # seconds before other workers see a revocation
+    
+    # Password hashing (see passwords.py); stored hashes are upgraded at login when the method changes
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'  # or e.g. 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)  # concurrent hashes per worker process
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 16)  # logins waiting for a hashing thread
+    PASSWORD_HASH_WAIT = float(os.environ.get('PASSWORD_HASH_WAIT') or 2)  # seconds to wait for room before answering 503
+
+    # Login / password reset rate limits, 'N/seconds' per client IP and per account (see rate_limit.py)
+    RATE_LIMIT_ENABLED = (os.environ.get('RATE_LIMIT_ENABLED') or 'true').lower() == 'true'
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP') or '20/60'
+    RATE_LIMIT_LOGIN_ACCOUNT = os.environ.get('RATE_LIMIT_LOGIN_ACCOUNT') or '5/60'
+    RATE_LIMIT_RESET_IP = os.environ.get('RATE_LIMIT_RESET_IP') or '10/3600'
+    RATE_LIMIT_RESET_ACCOUNT = os.environ.get('RATE_LIMIT_RESET_ACCOUNT') or '3/3600'
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS') or 100000)  # in-process buckets kept per worker
+    RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')  # shared limits for multi-worker deployments
     
     # JSON Configuration - Ensure Arabic characters are NOT escaped
     JSON_AS_ASCII = False
@@ -18,12 +55,34 @@ class Config:
     LOGO_FOLDER = os.path.join('static', 'uploads', 'logos')
     DOCS_FOLDER = os.path.join('static', 'uploads', 'docs')
 
+    # Upload limits, checked on Content-Length before the body is read
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH') or 64 * 1024 * 1024)  # any single request
+    # Resumable uploads (see chunked_upload.py); staging stays outside static/
+    UPLOAD_STAGING_FOLDER = os.environ.get('UPLOAD_STAGING_FOLDER') or 'upload_staging'
+    UPLOAD_MAX_FILE_BYTES = int(os.environ.get('UPLOAD_MAX_FILE_BYTES') or 200 * 1024 * 1024)
+    UPLOAD_CHUNK_BYTES = int(os.environ.get('UPLOAD_CHUNK_BYTES') or 5 * 1024 * 1024)
+    UPLOAD_EXPIRY_HOURS = int(os.environ.get('UPLOAD_EXPIRY_HOURS') or 24)
+
+    # Fingerprinted css/js (see static_assets.py); false to serve a build made by `python static_assets.py`
+    ASSET_BUILD_ON_STARTUP = (os.environ.get('ASSET_BUILD_ON_STARTUP') or 'true').lower() == 'true'
+
+    # Gzip/brotli compression of HTML and JSON responses (see response_compression.py)
+    COMPRESSION_ENABLED = (os.environ.get('COMPRESSION_ENABLED') or 'true').lower() == 'true'  # false behind a compressing proxy
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 500)  # bytes
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or 6)  # gzip, 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY') or 4)  # 0-11
+
     # Mail Settings (Mock by default)
     # Mail Settings
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
-    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') or True
+    MAIL_USE_TLS = (os.environ.get('MAIL_USE_TLS') or 'true').lower() == 'true'
+    MAIL_USE_AUTH = (os.environ.get('MAIL_USE_AUTH') or 'true').lower() == 'true'  # false for mail_debug_server.py
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME') or 'ongconnecte@gmail.com'
     # SECURITY NOTE: Replace 'YOUR_APP_PASSWORD_HERE' with your actual generated App Password.
     # Do NOT use your main Google account password.
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD') or 'lzir xipo lhil ynae'
+    # Persistent SMTP connection (see mailer.py)
+    MAIL_KEEPALIVE = float(os.environ.get('MAIL_KEEPALIVE') or 30)  # seconds idle before a NOOP check on reuse
+    MAIL_IDLE_TIMEOUT = float(os.environ.get('MAIL_IDLE_TIMEOUT') or 120)  # seconds idle before the connection is closed
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION') or 100)
@@ -10,7 +10,10 @@ This module contains all database-related functions including:
 import pymysql
 import pymysql.cursors
 from contextlib import contextmanager
-from werkzeug.security import generate_password_hash, check_password_hash
+
+from db_pool import init_pool, get_connection
+from migrations import run_migrations
+from passwords import verify_password
 
 
 # Database configuration - imported from config at runtime
@@ -27,19 +30,13 @@ def init_config(config):
     DB_USER = config['DB_USER']
     DB_PASSWORD = config['DB_PASSWORD']
     DB_NAME = config['DB_NAME']
+    init_pool(config)
 
 
 @contextmanager
 def get_db():
-    """Context manager for database connections."""
-    conn = pymysql.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    """Context manager for pooled database connections."""
+    conn = get_connection()
     try:
         yield conn
     finally:
@@ -47,38 +44,33 @@ def get_db():
 
 
 def get_db_connection():
-    """Legacy wrapper for database connections."""
-    return pymysql.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
-
-def check_and_migrate_password(conn, table, id_column, id_value, plain_password, db_password_value):
+    """Legacy wrapper: returns a pooled connection, close() gives it back."""
+    return get_connection()
+
+
+def check_user_password(conn, user, plain_password):
     """
-    Checks password against DB value.
-    If DB value is plain text and matches, it generates a hash, updates DB, and returns True.
-    If DB value is a hash, it verifies it and returns result.
+    Checks a password against a `users` row (id, password_hash).
+    Plain-text and outdated hashes are upgraded on success (see passwords.py).
     """
-    # 1. Check if it looks like a hash (Werkzeug hashes start with method:)
-    if db_password_value.startswith('scrypt:') or db_password_value.startswith('pbkdf2:'):
-        return check_password_hash(db_password_value, plain_password)
-    
-    # 2. Fallback: Check as plaintext (Legacy)
-    if db_password_value == plain_password:
-        # Migrate to Hash
-        print(f"Migrating password for {table} {id_value}")
-        new_hash = generate_password_hash(plain_password)
+    valid, new_hash = verify_password(user['password_hash'], plain_password)
+    if new_hash:
         with conn.cursor() as cursor:
-            cursor.execute(f"UPDATE {table} SET mot_de_passe=%s WHERE {id_column}=%s", (new_hash, id_value))
+            cursor.execute("UPDATE users SET password_hash=%s WHERE id=%s", (new_hash, user['id']))
         conn.commit()
-        return True
-        
-    return False
+    return valid
+
+
+def check_account_password(conn, table, id_column, id_value, plain_password):
+    """Checks the password of the `users` account linked to a row of `table` (ong / administrateur)."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT u.id, u.password_hash FROM users u
+            JOIN {table} t ON t.user_id = u.id
+            WHERE t.{id_column} = %s
+        """, (id_value,))
+        user = cursor.fetchone()
+    return bool(user) and check_user_password(conn, user, plain_password)
 
 
 def init_db():
@@ -113,8 +105,6 @@ def init_db():
                     id_admin INT AUTO_INCREMENT PRIMARY KEY,
                     nom VARCHAR(100) NOT NULL,
                     email VARCHAR(150) UNIQUE NOT NULL,
-                    mot_de_passe VARCHAR(255) NOT NULL,
-                    must_change_password BOOLEAN DEFAULT FALSE,
                     user_id INT,
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
                 )
@@ -133,8 +123,6 @@ def init_db():
                     update_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     logo_url VARCHAR(255),
                     verification_doc_url VARCHAR(255),
-                    mot_de_passe VARCHAR(255) NOT NULL,
-                    must_change_password BOOLEAN DEFAULT FALSE,
                     user_id INT,
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
                 )
@@ -251,17 +239,6 @@ def init_db():
                 except Exception as e:
                     print(f"Warning: Could not add location columns. Error: {e}")
 
-            # Add must_change_password column if not exists (legacy tables)
-            for table in ['ong', 'administrateur']:
-                try:
-                    cursor.execute(f"SELECT must_change_password FROM {table} LIMIT 1")
-                except Exception:
-                    try:
-                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN must_change_password BOOLEAN DEFAULT FALSE")
-                        print(f"Added must_change_password column to {table} table.")
-                    except Exception as e:
-                        print(f"Warning: Could not add must_change_password column to {table}. Error: {e}")
-            
             # --- NEW: Add category_id to cas_social ---
             try:
                 cursor.execute("SELECT category_id FROM cas_social LIMIT 1")
@@ -331,45 +308,8 @@ def init_db():
                     except Exception as e:
                         print(f"Warning: Could not add user_id column to {table}. Error: {e}")
 
-            # --- NEW: Migrate existing accounts to users table ---
-            cursor.execute("SELECT id_admin, email, mot_de_passe, must_change_password FROM administrateur WHERE user_id IS NULL")
-            admins_to_migrate = cursor.fetchall()
-            for admin in admins_to_migrate:
-                try:
-                    cursor.execute("SELECT id FROM users WHERE email = %s", (admin['email'],))
-                    existing_user = cursor.fetchone()
-                    if existing_user:
-                        cursor.execute("UPDATE administrateur SET user_id = %s WHERE id_admin = %s", (existing_user['id'], admin['id_admin']))
-                    else:
-                        cursor.execute(
-                            "INSERT INTO users (email, password_hash, role, must_change_password) VALUES (%s, %s, 'admin', %s)",
-                            (admin['email'], admin['mot_de_passe'], admin.get('must_change_password', False))
-                        )
-                        new_user_id = cursor.lastrowid
-                        cursor.execute("UPDATE administrateur SET user_id = %s WHERE id_admin = %s", (new_user_id, admin['id_admin']))
-                    print(f"Migrated admin {admin['email']} to users table.")
-                except Exception as e:
-                    print(f"Warning: Could not migrate admin {admin['email']}. Error: {e}")
-
-            # Migrate ONGs
-            cursor.execute("SELECT id_ong, email, mot_de_passe, must_change_password FROM ong WHERE user_id IS NULL")
-            ongs_to_migrate = cursor.fetchall()
-            for ong in ongs_to_migrate:
-                try:
-                    cursor.execute("SELECT id FROM users WHERE email = %s", (ong['email'],))
-                    existing_user = cursor.fetchone()
-                    if existing_user:
-                        cursor.execute("UPDATE ong SET user_id = %s WHERE id_ong = %s", (existing_user['id'], ong['id_ong']))
-                    else:
-                        cursor.execute(
-                            "INSERT INTO users (email, password_hash, role, must_change_password) VALUES (%s, %s, 'ong', %s)",
-                            (ong['email'], ong['mot_de_passe'], ong.get('must_change_password', False))
-                        )
-                        new_user_id = cursor.lastrowid
-                        cursor.execute("UPDATE ong SET user_id = %s WHERE id_ong = %s", (new_user_id, ong['id_ong']))
-                    print(f"Migrated ONG {ong['email']} to users table.")
-                except Exception as e:
-                    print(f"Warning: Could not migrate ONG {ong['email']}. Error: {e}")
+            # Accounts still in the legacy ong / administrateur password
+            # columns are moved to `users` by migration 14 (migrations.py)
 
             # Seed Default Categories if empty
             cursor.execute("SELECT COUNT(*) as count FROM categorie")
@@ -385,5 +325,8 @@ def init_db():
                 print("Default categories seeded.")
 
         conn.commit()
+
+        # Versioned migrations (indexes, later schema changes)
+        run_migrations(conn)
     finally:
         conn.close()
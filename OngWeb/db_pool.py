@@ -0,0 +1,262 @@
+"""
+MySQL connection pooling for ONG Connect.
+
+Every worker process keeps a bounded set of authenticated pymysql connections
+and hands them out to requests instead of opening a new TCP + auth session
+each time. This module contains:
+- The thread-safe connection pool (ping on checkout, idle eviction)
+- The wrapper returned to callers, whose close() gives the connection back
+- Pool metrics (in-use, waits, checkout latency)
+"""
+
+import os
+import threading
+import time
+
+import pymysql
+import pymysql.cursors
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PooledConnection:
+    """
+    Proxy around a pymysql connection borrowed from the pool.
+
+    It behaves like the underlying connection, except that close() (and
+    leaving a `with` block) returns the connection to the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise pymysql.err.InterfaceError("Connection already returned to the pool")
+        return getattr(conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymysql connections for one worker process."""
+
+    def __init__(self, connect_kwargs, max_size=10, max_idle=300, timeout=10, pre_ping=True):
+        self._connect_kwargs = connect_kwargs
+        self.max_size = max(1, int(max_size))
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+
+        self._cond = threading.Condition()
+        self._idle = []  # (connection, released_at), most recently used last
+        self._in_use = 0
+        self._pid = os.getpid()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'closed': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'ping_failures': 0,
+            'checkout_time_total': 0.0,
+            'checkout_time_max': 0.0,
+        }
+
+    def _connect(self):
+        conn = pymysql.connect(**self._connect_kwargs)
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['closed'] += 1
+
+    def _check_pid_locked(self):
+        # After a fork the child must not reuse sockets owned by the parent.
+        # They are dropped without COM_QUIT so the parent's sessions survive.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._in_use = 0
+            self._reset_stats()
+
+    def _evict_idle_locked(self, now):
+        if not self.max_idle:
+            return []
+        expired = [conn for conn, released_at in self._idle if now - released_at > self.max_idle]
+        if expired:
+            self._idle = [(c, t) for c, t in self._idle if now - t <= self.max_idle]
+        return expired
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to `timeout` seconds if the pool is full."""
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        conn = None
+        waited = False
+
+        with self._cond:
+            self._check_pid_locked()
+            while True:
+                expired = self._evict_idle_locked(time.monotonic())
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    break
+
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        for stale in expired:
+            self._close_quietly(stale)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif self.pre_ping:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self._stats['ping_failures'] += 1
+                    self._close_quietly(conn)
+                    conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['checkout_time_total'] += elapsed
+            self._stats['checkout_time_max'] = max(self._stats['checkout_time_max'], elapsed)
+
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work."""
+        try:
+            conn.rollback()
+            healthy = conn.open
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            if self._pid != os.getpid():
+                # Borrowed before a fork; it is not ours to pool.
+                return
+            self._in_use = max(0, self._in_use - 1)
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if not healthy:
+            self._close_quietly(conn)
+
+    def close_idle(self):
+        """Close every idle connection (in-use ones are closed when released)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Return a snapshot of the pool metrics."""
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': checkouts,
+                'created': self._stats['created'],
+                'closed': self._stats['closed'],
+                'waits': self._stats['waits'],
+                'timeouts': self._stats['timeouts'],
+                'ping_failures': self._stats['ping_failures'],
+                'checkout_ms_avg': round(self._stats['checkout_time_total'] * 1000 / checkouts, 3) if checkouts else 0.0,
+                'checkout_ms_max': round(self._stats['checkout_time_max'] * 1000, 3),
+            }
+
+
+# Process-wide pool, created by init_pool()
+_pool = None
+
+
+def init_pool(config):
+    """Create (or replace) the process pool from a Flask/Config mapping."""
+    global _pool
+    connect_kwargs = {
+        'host': config['DB_HOST'],
+        'user': config['DB_USER'],
+        'password': config['DB_PASSWORD'],
+        'database': config['DB_NAME'],
+        'charset': 'utf8mb4',
+        'cursorclass': pymysql.cursors.DictCursor,
+    }
+    if _pool is not None:
+        if _pool._connect_kwargs == connect_kwargs:
+            return _pool
+        _pool.close_idle()
+
+    _pool = ConnectionPool(
+        connect_kwargs,
+        max_size=config.get('DB_POOL_SIZE', 10),
+        max_idle=config.get('DB_POOL_MAX_IDLE', 300),
+        timeout=config.get('DB_POOL_TIMEOUT', 10),
+        pre_ping=config.get('DB_POOL_PRE_PING', True),
+    )
+    return _pool
+
+
+def get_pool():
+    """Return the process pool, raising if init_pool() was never called."""
+    if _pool is None:
+        raise RuntimeError("Database pool is not initialized; call init_pool() first")
+    return _pool
+
+
+def get_connection():
+    """Check out a pooled connection. Call close() on it to give it back."""
+    return get_pool().acquire()
+
+
+def pool_stats():
+    """Return the current pool metrics, or an empty dict before initialization."""
+    return _pool.stats() if _pool is not None else {}
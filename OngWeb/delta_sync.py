@@ -0,0 +1,110 @@
+"""
+Incremental (delta) sync for the mobile case feed.
+
+Clients keep the `watermark` returned by /api/cases and send it back as
+`updated_since`; the server then answers with only the cases created,
+modified or approved since, plus tombstones for cases that were deleted or
+left the public feed.
+
+- record_deletion(): write tombstones, inside the same transaction as the
+  DELETE (cascade_delete.py does it for case and ONG deletions)
+- server_watermark() / parse_watermark(): the opaque sync position
+- fetch_case_changes(): changed rows and deleted ids since a watermark
+- prune_tombstones(): drop tombstones older than the retention window, also
+  runnable as a script
+"""
+
+from datetime import datetime, timedelta
+
+
+WATERMARK_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Margin for transactions that stamped updated_at but had not committed yet
+# when the watermark was taken; clients may receive a row twice, never miss one
+WATERMARK_LAG_SECONDS = 5
+
+TOMBSTONE_RETENTION_DAYS = 30
+
+
+def record_deletion(cursor, entity, ids):
+    """Log deleted `entity` rows ('case', 'ong', 'media') for delta clients."""
+    ids = [i for i in ids if i is not None]
+    if ids:
+        cursor.executemany(
+            "INSERT INTO sync_tombstone (entity, entity_id) VALUES (%s, %s)",
+            [(entity, i) for i in ids]
+        )
+
+
+def server_watermark(cursor):
+    """Current sync position, taken from the database clock."""
+    cursor.execute("SELECT NOW() - INTERVAL %s SECOND as watermark", (WATERMARK_LAG_SECONDS,))
+    return cursor.fetchone()['watermark'].strftime(WATERMARK_FORMAT)
+
+
+def parse_watermark(value):
+    """Parse an `updated_since` value. Returns None if invalid."""
+    try:
+        return datetime.strptime(value, WATERMARK_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def watermark_expired(since):
+    """True when tombstones older than `since` may already have been pruned."""
+    return since < datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+
+def fetch_case_changes(cursor, since, columns, conditions, params=()):
+    """
+    Return (changed_cases, deleted_ids) since `since`.
+
+    `columns` is the feed's select list over cas_social c, ong o and
+    categorie cat; `conditions`/`params` are the feed's WHERE conditions.
+    Changed cases that no longer match them are reported as deleted.
+    """
+    cursor.execute(f"""
+        SELECT {columns}, ({' AND '.join(conditions)}) as in_feed
+        FROM cas_social c
+        LEFT JOIN ong o ON c.id_ong = o.id_ong
+        LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
+        WHERE c.updated_at >= %s OR o.update_at >= %s OR cat.updated_at >= %s
+        ORDER BY c.date_publication DESC
+    """, tuple(params) + (since, since, since))
+
+    changed = []
+    deleted = set()
+    for case in cursor.fetchall():
+        if case['in_feed']:
+            changed.append(case)
+        else:
+            deleted.add(case['id_cas_social'])
+
+    cursor.execute("""
+        SELECT DISTINCT entity_id FROM sync_tombstone
+        WHERE entity = 'case' AND deleted_at >= %s
+    """, (since,))
+    deleted.update(row['entity_id'] for row in cursor.fetchall())
+    return changed, sorted(deleted)
+
+
+def prune_tombstones(conn, retention_days=TOMBSTONE_RETENTION_DAYS):
+    """Delete tombstones older than the retention window."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM sync_tombstone WHERE deleted_at < NOW() - INTERVAL %s DAY",
+            (retention_days,)
+        )
+        removed = cursor.rowcount
+    conn.commit()
+    print(f"Pruned {removed} sync tombstones.")
+    return removed
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config, get_db
+
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        prune_tombstones(conn)
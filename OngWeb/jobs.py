@@ -0,0 +1,288 @@
+"""
+Background job queue for ONG Connect.
+
+Slow side effects (image processing, outgoing mail, removing files from disk)
+are not run in the request thread: the route inserts a row in `job_queue`
+with the same cursor as its own writes, so the job exists if and only if the
+request's transaction commits, and returns right after the commit. A worker
+claims pending jobs, runs them and deletes them; a failing job is retried with
+exponential backoff and kept as 'failed' (with its last error) once it has
+used its attempts.
+
+- enqueue(): queue a job inside the caller's transaction
+- job_handler(): register the function running a job type
+- batch_job_handler(): same, for a type whose claimed jobs run in one call
+- run_pending(): claim and run one batch of due jobs
+- start_worker_thread(): run the worker in a daemon thread of the web process
+  (JOB_WORKER_THREAD), or run this module as a separate worker process:
+      python jobs.py
+
+Job types:
+- 'send_email' {to, subject, html}: the mails claimed together are sent as one
+  batch on the worker's persistent SMTP connection (mailer.send_batch())
+- 'reset_password' {user_id, to}: set and mail a temporary password, which
+  exists only in the worker (never in the queue)
+- 'delete_files' {files: [web paths]}: files and their renditions
+- 'process_media' {media_id}: write the renditions of a media
+- 'process_logo' {ong_id, logo_url}: replace an uploaded logo by its WEBP rendition
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+
+from api_tokens import revoke_user_tokens, apply_revocation
+from db_pool import get_connection
+from mailer import send_mail, send_batch, close_idle, password_reset_message
+from media_renditions import (RENDITIONS, LOGO_RENDITIONS, STATIC_DIR, process_image,
+                              record_renditions, delete_media_files)
+from media_store import referenced_files
+from passwords import hash_password
+from response_cache import invalidate_cache
+
+
+_settings = {
+    'JOB_POLL_INTERVAL': 2,
+    'JOB_MAX_ATTEMPTS': 5,
+    'JOB_LOCK_TIMEOUT': 600,
+}
+_handlers = {}
+_batch_handlers = {}
+
+MAX_BACKOFF = 3600  # seconds
+
+
+def init_jobs(config):
+    """Read the JOB_* settings from a Flask/Config mapping."""
+    for key in _settings:
+        if config.get(key) is not None:
+            _settings[key] = config.get(key)
+
+
+def enqueue(cursor, job_type, payload, max_attempts=None):
+    """Queue a job; it becomes visible to the worker when the caller commits."""
+    cursor.execute("""
+        INSERT INTO job_queue (job_type, payload, max_attempts)
+        VALUES (%s, %s, %s)
+    """, (job_type, json.dumps(payload), max_attempts or _settings['JOB_MAX_ATTEMPTS']))
+    return cursor.lastrowid
+
+
+def job_handler(job_type):
+    """Decorator registering fn(conn, payload) as the runner of `job_type`."""
+    def register(fn):
+        _handlers[job_type] = fn
+        return fn
+    return register
+
+
+def batch_job_handler(job_type):
+    """
+    Decorator registering fn(conn, payloads) as the runner of `job_type`: the
+    jobs of that type claimed together are run in one call, which returns one
+    entry per payload, None on success or the exception of that job.
+    """
+    def register(fn):
+        _batch_handlers[job_type] = fn
+        return fn
+    return register
+
+
+def _run_batches(conn, claimed):
+    # {job id: None or exception} for the jobs that have a batch handler
+    outcomes = {}
+    for job_type, handler in _batch_handlers.items():
+        batch = [job for job in claimed if job['job_type'] == job_type]
+        if not batch:
+            continue
+        try:
+            errors = handler(conn, [json.loads(job['payload']) for job in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+        outcomes.update((job['id'], error) for job, error in zip(batch, errors))
+    return outcomes
+
+
+def _backoff(attempts):
+    return min(30 * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+def run_pending(conn, limit=10):
+    """Claim up to `limit` due jobs and run them. Returns the number run."""
+    worker_id = uuid.uuid4().hex
+    with conn.cursor() as cursor:
+        # Jobs of a worker that died mid-run go back to the queue
+        cursor.execute("""
+            UPDATE job_queue SET status = 'pending', locked_by = NULL
+            WHERE status = 'running' AND locked_at < NOW() - INTERVAL %s SECOND
+        """, (_settings['JOB_LOCK_TIMEOUT'],))
+        cursor.execute("""
+            UPDATE job_queue
+            SET status = 'running', locked_by = %s, locked_at = NOW(), attempts = attempts + 1
+            WHERE status = 'pending' AND run_after <= NOW()
+            ORDER BY id LIMIT %s
+        """, (worker_id, limit))
+        cursor.execute("""
+            SELECT id, job_type, payload, attempts, max_attempts FROM job_queue
+            WHERE locked_by = %s AND status = 'running'
+            ORDER BY id
+        """, (worker_id,))
+        claimed = cursor.fetchall()
+    conn.commit()
+
+    outcomes = _run_batches(conn, claimed)
+    for job in claimed:
+        try:
+            if job['id'] in outcomes:
+                if outcomes[job['id']] is not None:
+                    raise outcomes[job['id']]
+            else:
+                handler = _handlers.get(job['job_type'])
+                if handler is None:
+                    raise ValueError(f"Unknown job type '{job['job_type']}'")
+                handler(conn, json.loads(job['payload']))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Job {job['id']} ({job['job_type']}) failed, attempt {job['attempts']}: {e}")
+            with conn.cursor() as cursor:
+                if job['attempts'] >= job['max_attempts']:
+                    cursor.execute("""
+                        UPDATE job_queue SET status = 'failed', locked_by = NULL, last_error = %s
+                        WHERE id = %s
+                    """, (str(e)[:1000], job['id']))
+                else:
+                    cursor.execute("""
+                        UPDATE job_queue
+                        SET status = 'pending', locked_by = NULL, last_error = %s,
+                            run_after = NOW() + INTERVAL %s SECOND
+                        WHERE id = %s
+                    """, (str(e)[:1000], _backoff(job['attempts']), job['id']))
+            conn.commit()
+            continue
+
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM job_queue WHERE id = %s", (job['id'],))
+        conn.commit()
+    return len(claimed)
+
+
+def work(stop_event=None):
+    """Poll the queue until `stop_event` is set (forever by default)."""
+    while stop_event is None or not stop_event.is_set():
+        try:
+            conn = get_connection()
+            try:
+                ran = run_pending(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Job worker error: {e}")
+            ran = 0
+        if not ran:
+            # The SMTP connection is kept between batches, up to MAIL_IDLE_TIMEOUT
+            close_idle()
+            time.sleep(_settings['JOB_POLL_INTERVAL'])
+
+
+def start_worker_thread(config):
+    """Run the worker in a daemon thread of the current process."""
+    init_jobs(config)
+    thread = threading.Thread(target=work, name='job-worker', daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Handlers ---
+
+@batch_job_handler('send_email')
+def _send_emails(conn, payloads):
+    return send_batch([(payload['to'], payload['subject'], payload['html']) for payload in payloads])
+
+
+@job_handler('reset_password')
+def _reset_password(conn, payload):
+    # 8-digit temporary password; it is not committed unless the mail went out
+    new_password = ''.join(secrets.choice('0123456789') for _ in range(8))
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE users SET password_hash = %s, must_change_password = 1 WHERE id = %s
+        """, (hash_password(new_password), payload['user_id']))
+        if not cursor.rowcount:
+            return  # account deleted in the meantime
+        # Log out the mobile sessions opened with the old password
+        generation = revoke_user_tokens(cursor, payload['user_id'])
+    subject, html_body = password_reset_message(new_password)
+    send_mail(payload['to'], subject, html_body)
+    conn.commit()
+    apply_revocation(payload['user_id'], generation)
+
+
+@job_handler('delete_files')
+def _delete_files(conn, payload):
+    with conn.cursor() as cursor:
+        # A blob uploaded again since it was released is kept; the lock holds
+        # off a concurrent upload of the same content until the files are gone
+        kept = referenced_files(cursor, payload['files'])
+        for file_url in payload['files']:
+            if file_url not in kept:
+                delete_media_files(file_url, RENDITIONS + LOGO_RENDITIONS)
+    conn.commit()
+
+
+@job_handler('process_media')
+def _process_media(conn, payload):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT file_url, thumb_url FROM media WHERE id_media = %s", (payload['media_id'],))
+        media = cursor.fetchone()
+        # Deleted (with its files) before the worker got to it, or a shared
+        # file already processed for another media
+        if (not media or media['thumb_url']
+                or not os.path.isfile(os.path.join(STATIC_DIR, media['file_url']))):
+            return
+        record_renditions(cursor, media['file_url'], process_image(media['file_url']))
+    conn.commit()
+    invalidate_cache('case', 'media')
+
+
+@job_handler('process_logo')
+def _process_logo(conn, payload):
+    logo_url = payload['logo_url']
+    if not os.path.isfile(os.path.join(STATIC_DIR, logo_url)):
+        return
+    processed = process_image(logo_url, LOGO_RENDITIONS)
+    if not processed['logo_url']:
+        return  # not an image Pillow can read: keep the upload as-is
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE ong SET logo_url = %s WHERE id_ong = %s AND logo_url = %s
+        """, (processed['logo_url'], payload['ong_id'], logo_url))
+        replaced = cursor.rowcount
+    conn.commit()
+    # The upload is no longer referenced either way; the rendition only if
+    # the logo was changed or the ONG deleted in the meantime
+    delete_media_files(logo_url, ())
+    if replaced:
+        invalidate_cache('ong')
+    else:
+        delete_media_files(processed['logo_url'], ())
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config
+    from mailer import init_mailer
+    from passwords import init_passwords
+    from response_cache import init_cache
+
+    settings = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+    init_config(settings)
+    init_cache(settings)
+    init_mailer(settings)
+    init_passwords(settings)
+    init_jobs(settings)
+    print("Job worker started.")
+    work()
@@ -0,0 +1,131 @@
+"""
+Local SMTP server for development and tests: accepts every message, keeps it
+in memory and prints it, sends nothing on. Supports the commands mailer.py
+uses (EHLO/HELO, MAIL, RCPT, DATA, NOOP, RSET, QUIT), without STARTTLS or
+AUTH, so run the app with:
+
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=false MAIL_USE_AUTH=false
+
+In tests, start it on a free port and read what was delivered:
+
+    with DebugSMTPServer(port=0, quiet=True) as server:
+        init_mailer({..., 'MAIL_SERVER': 'localhost', 'MAIL_PORT': server.port})
+        send_mail(...)
+        server.messages  # [{'from', 'to', 'data'}], connections in server.connections
+
+Usage:
+    python mail_debug_server.py [--host localhost] [--port 1025]
+"""
+
+import argparse
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        envelope = {'from': None, 'to': []}
+        self.reply('220 localhost ONG Connect debug SMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if command == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250-8BITMIME')
+                self.reply('250 SMTPUTF8')
+            elif command == 'HELO':
+                self.reply('250 localhost')
+            elif command == 'MAIL':
+                envelope = {'from': argument.partition(':')[2].split()[0].strip('<>'), 'to': []}
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                envelope['to'].append(argument.partition(':')[2].split()[0].strip('<>'))
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self._read_data()
+                server.deliver(dict(envelope, data=data))
+                envelope = {'from': None, 'to': []}
+                self.reply('250 OK')
+            elif command in ('NOOP', 'RSET'):
+                if command == 'RSET':
+                    envelope = {'from': None, 'to': []}
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                break
+            # Dot-stuffing
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server keeping received messages in `messages`."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='localhost', port=1025, quiet=False):
+        super().__init__((host, port), _SMTPHandler)
+        self.port = self.server_address[1]
+        self.quiet = quiet
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def deliver(self, message):
+        with self.lock:
+            self.messages.append(message)
+        if not self.quiet:
+            parsed = message_from_bytes(message['data'], policy=policy.default)
+            print(f"--- {message['from']} -> {', '.join(message['to'])}: {parsed['Subject']}")
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='debug-smtp', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+
+    server = DebugSMTPServer(args.host, args.port)
+    print(f"Debug SMTP server listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
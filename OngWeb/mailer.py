@@ -0,0 +1,223 @@
+"""
+Outgoing email for ONG Connect.
+
+Mail is sent by the background worker (job type 'send_email', see jobs.py),
+never from a request thread.
+
+Messages share one authenticated SMTP connection per process instead of
+paying the connect + STARTTLS + login round trips for each of them: the
+'send_email' jobs claimed together by the worker go out as one send_batch()
+on it, and it stays open between batches. Before reuse, a connection idle for MAIL_KEEPALIVE seconds is
+checked with a NOOP; one idle for MAIL_IDLE_TIMEOUT seconds is closed (the
+worker calls close_idle() between polls). A send failing because the server
+dropped the connection is retried once on a new one. A connection is
+renewed after MAIL_MAX_MESSAGES_PER_CONNECTION messages.
+
+For development and tests, mail_debug_server.py is a local SMTP server
+printing what it receives (MAIL_SERVER=localhost, MAIL_PORT=1025,
+MAIL_USE_TLS=false, MAIL_USE_AUTH=false).
+
+- init_mailer(): read the MAIL_* settings
+- send_mail(): deliver one HTML message over SMTP (raises MailError)
+- send_batch(): deliver several messages over the same connection ('send_email' jobs)
+- close_idle(): close the connection once idle for MAIL_IDLE_TIMEOUT
+- mail_stats(): sent / failed messages and connection counters
+- password_reset_message(): subject and body of the temporary password mail
+"""
+
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+
+
+class MailError(Exception):
+    """Raised when a message could not be delivered."""
+
+
+_settings = {
+    'MAIL_USE_AUTH': True,
+    'MAIL_KEEPALIVE': 30,
+    'MAIL_IDLE_TIMEOUT': 120,
+    'MAIL_MAX_MESSAGES_PER_CONNECTION': 100,
+}
+
+# Process-wide connection, used under _lock
+_conn = {'smtp': None, 'used_at': 0, 'messages': 0}
+_lock = threading.Lock()
+
+_stats = {'sent': 0, 'failed': 0, 'connections': 0, 'reconnects': 0, 'noops': 0}
+
+# Errors meaning the connection itself is gone, not that the message was refused
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def init_mailer(config):
+    """Configure SMTP access from a Flask/Config mapping."""
+    for key in ('MAIL_SERVER', 'MAIL_PORT', 'MAIL_USE_TLS', 'MAIL_USERNAME', 'MAIL_PASSWORD'):
+        _settings[key] = config.get(key)
+    for key in ('MAIL_USE_AUTH', 'MAIL_KEEPALIVE', 'MAIL_IDLE_TIMEOUT', 'MAIL_MAX_MESSAGES_PER_CONNECTION'):
+        if config.get(key) is not None:
+            _settings[key] = config.get(key)
+
+
+def _close():
+    smtp, _conn['smtp'] = _conn['smtp'], None
+    if smtp is not None:
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+
+def _connect():
+    smtp = smtplib.SMTP(_settings['MAIL_SERVER'], _settings['MAIL_PORT'], timeout=30)
+    try:
+        if _settings.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if _settings['MAIL_USE_AUTH']:
+            smtp.login(_settings['MAIL_USERNAME'], _settings['MAIL_PASSWORD'])
+    except BaseException:
+        smtp.close()
+        raise
+    _conn.update(smtp=smtp, used_at=time.monotonic(), messages=0)
+    _stats['connections'] += 1
+    return smtp
+
+
+def _connection():
+    """The open connection, checked or renewed as needed (caller holds _lock)."""
+    idle = time.monotonic() - _conn['used_at']
+    if _conn['smtp'] is not None:
+        if idle >= _settings['MAIL_IDLE_TIMEOUT'] or \
+                _conn['messages'] >= _settings['MAIL_MAX_MESSAGES_PER_CONNECTION']:
+            _close()
+        elif idle >= _settings['MAIL_KEEPALIVE']:
+            _stats['noops'] += 1
+            try:
+                if _conn['smtp'].noop()[0] != 250:
+                    _close()
+            except (smtplib.SMTPException, OSError):
+                _close()
+    if _conn['smtp'] is None:
+        return _connect(), False
+    return _conn['smtp'], True
+
+
+def _message(to_email, subject, html_body):
+    msg = MIMEText(html_body, 'html', 'utf-8')
+    msg['Subject'] = subject
+    msg['From'] = _settings['MAIL_USERNAME']
+    msg['To'] = to_email
+    return msg
+
+
+def _deliver(msg):
+    # Caller holds _lock
+    smtp, reused = _connection()
+    try:
+        smtp.send_message(msg)
+    except _CONNECTION_ERRORS:
+        _close()
+        if not reused:
+            raise
+        # The server dropped a connection it had accepted: one retry on a new one
+        _stats['reconnects'] += 1
+        smtp, _ = _connection()
+        smtp.send_message(msg)
+    _conn['used_at'] = time.monotonic()
+    _conn['messages'] += 1
+
+
+def _check_configured():
+    password = _settings.get('MAIL_PASSWORD')
+    # Guard clause for placeholder password
+    if _settings['MAIL_USE_AUTH'] and (password == 'YOUR_APP_PASSWORD_HERE' or not password):
+        raise MailError("Email password not configured in config.py")
+
+
+def send_mail(to_email, subject, html_body):
+    """Send an HTML email. Raises MailError on any failure."""
+    _check_configured()
+    msg = _message(to_email, subject, html_body)
+    with _lock:
+        try:
+            _deliver(msg)
+        except (smtplib.SMTPException, OSError) as e:
+            _stats['failed'] += 1
+            if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                _close()
+            raise MailError(str(e)) from e
+        _stats['sent'] += 1
+    print(f"✅ Email sent successfully to {to_email}")
+
+
+def send_batch(messages):
+    """
+    Send (to_email, subject, html_body) messages over one connection.
+    Returns one entry per message: None when sent, else its MailError.
+    """
+    _check_configured()
+    results = []
+    with _lock:
+        for to_email, subject, html_body in messages:
+            try:
+                _deliver(_message(to_email, subject, html_body))
+                _stats['sent'] += 1
+                results.append(None)
+                print(f"✅ Email sent successfully to {to_email}")
+            except (smtplib.SMTPException, OSError) as e:
+                _stats['failed'] += 1
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    _close()
+                results.append(MailError(str(e)))
+    return results
+
+
+def close_idle():
+    """Close the connection if unused for MAIL_IDLE_TIMEOUT seconds."""
+    # Skipped while a message is being sent
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        if _conn['smtp'] is not None and \
+                time.monotonic() - _conn['used_at'] >= _settings['MAIL_IDLE_TIMEOUT']:
+            _close()
+    finally:
+        _lock.release()
+
+
+def mail_stats():
+    """Sent / failed messages, connections opened, reconnects and keepalive NOOPs."""
+    # Read without _lock, which is held for the whole of a send
+    stats = dict(_stats)
+    stats['connected'] = _conn['smtp'] is not None
+    return stats
+
+
+def password_reset_message(new_password):
+    """(subject, html_body) announcing a temporary password (French and Arabic)."""
+    subject = "Renouvellement de mot de passe / إعادة تعيين كلمة المرور - ONG Connect"
+
+    html_body = f"""
+    <html>
+    <body>
+        <div style="font-family: Arial, sans-serif; direction: ltr;">
+            <p>Bonjour,</p>
+            <p>Votre mot de passe a été réinitialisé par un administrateur.</p>
+            <p>Voici votre nouveau mot de passe temporaire : <b style="font-size: 16px;">{new_password}</b></p>
+            <p>Veuillez vous connecter et changer ce mot de passe dès que possible.</p>
+            <p>Cordialement,<br>Équipe ONG Connect</p>
+        </div>
+        <hr>
+        <div style="font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; direction: rtl; text-align: right;">
+            <p>مرحباً،</p>
+            <p>تم إعادة تعيين كلمة المرور الخاصة بك بنجاح.</p>
+            <p>كلمة المرور المؤقتة الجديدة هي: <b style="font-size: 16px;">{new_password}</b></p>
+            <p>يرجى تسجيل الدخول وتغيير كلمة المرور في أقرب وقت ممكن.</p>
+            <p>مع تحيات،<br>فريق ONG Connect</p>
+        </div>
+    </body>
+    </html>
+    """
+    return subject, html_body
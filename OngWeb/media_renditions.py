@@ -0,0 +1,235 @@
+"""
+Image renditions for uploaded media and logos.
+
+Uploaded images carrying metadata (EXIF: GPS position, camera serial...)
+are re-encoded without it, upright, before being hashed and stored
+(media_store.py), so the stored bytes match their SHA-256 name and are never
+rewritten. Resized WEBP renditions are written next to the original:
+    uploads/media/<name>.jpg -> <name>.thumb.webp, <name>.medium.webp
+
+Lists and cards use the thumbnail, detail views the medium rendition, and the
+original stays available for download. Requires Pillow; without it (or for
+files that are not images) uploads are stored as-is.
+
+Requests only write the upload to disk (store_upload(), or stripped by
+store_media()); the renditions are made by the background worker (jobs
+'process_media' / 'process_logo', see jobs.py).
+
+- store_upload(): write an uploaded file as-is
+- strip_metadata(): re-encode an image without its metadata, atomically
+- process_image(): write the renditions of a stored image
+- delete_media_files(): remove an original and its renditions from disk
+- rendition_urls(): web paths of the renditions of a stored file
+- backfill_renditions(): process media uploaded before renditions existed,
+  also runnable as a script
+"""
+
+import io
+import os
+import uuid
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# (name, longest edge in px): thumb for cards and lists, medium for detail views
+RENDITIONS = (('thumb', 480), ('medium', 1280))
+LOGO_RENDITIONS = (('logo', 512),)
+
+WEBP_QUALITY = 80
+ORIGINAL_QUALITY = 90
+
+# Formats re-encoded to drop metadata; others are stored byte for byte
+_REENCODED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+_METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp')
+
+
+def rendition_urls(file_url, renditions=RENDITIONS):
+    """{name: web path} of the renditions derived from `file_url`."""
+    stem = os.path.splitext(file_url)[0]
+    return {name: f"{stem}.{name}.webp" for name, _ in renditions}
+
+
+def _open_image(data):
+    if Image is None:
+        return None
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        return None
+    return image
+
+
+def strip_metadata(path, dest=None):
+    """
+    Re-encode the image at `path` upright and without its metadata into
+    `dest` (default: in place), through a temporary file renamed over it.
+    Returns False, writing nothing, when `path` is not an image Pillow
+    re-encodes (videos, GIF...) or carries no metadata: re-encoding it again
+    would only lose quality.
+    """
+    if Image is None:
+        return False
+    try:
+        with Image.open(path) as image:
+            fmt = image.format
+            if fmt not in _REENCODED_FORMATS or getattr(image, 'is_animated', False):
+                return False
+            if not image.getexif() and not any(key in image.info for key in _METADATA_KEYS):
+                return False
+            # Rotated as the camera intended, since the orientation tag goes away
+            upright = ImageOps.exif_transpose(image)
+    except Exception:
+        return False
+
+    options = {'optimize': True}
+    if fmt in ('JPEG', 'WEBP'):
+        options['quality'] = ORIGINAL_QUALITY
+    if fmt == 'JPEG' and upright.mode not in ('RGB', 'L', 'CMYK'):
+        upright = upright.convert('RGB')
+    dest = dest or path
+    tmp_path = os.path.join(os.path.dirname(dest), f".strip-{uuid.uuid4().hex}")
+    try:
+        # No exif= argument: the metadata is not carried over
+        upright.save(tmp_path, format=fmt, **options)
+        os.replace(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def _save_rendition(upright, size, path):
+    rendition = upright.copy()
+    if rendition.mode not in ('RGB', 'RGBA'):
+        rendition = rendition.convert('RGBA' if 'A' in rendition.getbands() else 'RGB')
+    rendition.thumbnail((size, size))
+    rendition.save(path, format='WEBP', quality=WEBP_QUALITY, method=4)
+
+
+def store_upload(file, folder, web_dir, filename):
+    """Write an uploaded file under `folder` (served as `web_dir`). Returns its web path."""
+    os.makedirs(folder, exist_ok=True)
+    file.save(os.path.join(folder, filename))
+    return f"{web_dir}/{filename}"
+
+
+def process_image(file_url, renditions=RENDITIONS):
+    """
+    Write the renditions of the stored file `file_url`; the file itself is
+    left untouched.
+
+    Returns {'width', 'height', '<rendition>_url'...}, all None when the file
+    is not a readable image.
+    """
+    result = {'width': None, 'height': None}
+    for name, _ in renditions:
+        result[f"{name}_url"] = None
+
+    path = os.path.join(STATIC_DIR, file_url)
+    with open(path, 'rb') as f:
+        data = f.read()
+    image = _open_image(data)
+    if image is None:
+        return result
+
+    # Legacy originals may still carry an orientation tag
+    upright = ImageOps.exif_transpose(image)
+    result['width'], result['height'] = upright.size
+
+    folder = os.path.dirname(path)
+    for name, url in rendition_urls(file_url, renditions).items():
+        size = dict(renditions)[name]
+        _save_rendition(upright, size, os.path.join(folder, os.path.basename(url)))
+        result[f"{name}_url"] = url
+    return result
+
+
+def delete_media_files(file_url, renditions=RENDITIONS):
+    """Remove a stored file and its renditions (missing files are ignored)."""
+    if not file_url:
+        return
+    for url in [file_url] + list(rendition_urls(file_url, renditions).values()):
+        path = os.path.join(STATIC_DIR, url)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Could not delete file {path}: {e}")
+
+
+def backfill_renditions(conn, batch_size=100):
+    """
+    Write renditions for media rows that have none yet, and strip the
+    metadata of files stored before it was done at upload. Content-addressed
+    files (media_blob) are named after their bytes and left as they are.
+    """
+    from case_media import backfill_cover_media
+
+    if Image is None:
+        print("Pillow is not installed: no renditions generated.")
+        return 0
+    processed = 0
+    last_id = 0
+    seen = set()
+    with conn.cursor() as cursor:
+        while True:
+            cursor.execute("""
+                SELECT id_media, file_url FROM media
+                WHERE thumb_url IS NULL AND id_media > %s
+                ORDER BY id_media LIMIT %s
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for row in rows:
+                last_id = row['id_media']
+                # Shared files (media_store.py) are processed once for all their rows
+                if (not row['file_url'] or row['file_url'] in seen
+                        or not os.path.isfile(os.path.join(STATIC_DIR, row['file_url']))):
+                    continue
+                seen.add(row['file_url'])
+                cursor.execute("SELECT 1 FROM media_blob WHERE file_url = %s", (row['file_url'],))
+                if not cursor.fetchone():
+                    strip_metadata(os.path.join(STATIC_DIR, row['file_url']))
+                processed += record_renditions(cursor, row['file_url'], process_image(row['file_url']))
+            conn.commit()
+
+    print(f"Renditions generated for {processed} media.")
+    backfill_cover_media(conn)
+    return processed
+
+
+def record_renditions(cursor, file_url, processed):
+    """
+    Store a process_image() result on every media row of `file_url` (and on
+    the covers using them). Returns 1 if it had renditions.
+    """
+    if not processed['thumb_url']:
+        return 0
+    cursor.execute("""
+        UPDATE media SET thumb_url = %s, medium_url = %s, width = %s, height = %s
+        WHERE file_url = %s
+    """, (processed['thumb_url'], processed['medium_url'], processed['width'],
+          processed['height'], file_url))
+    cursor.execute("""
+        UPDATE cas_social c
+        JOIN media m ON m.id_media = c.cover_media_id
+        SET c.cover_thumb_url = %s
+        WHERE m.file_url = %s
+    """, (processed['thumb_url'], file_url))
+    return 1
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config, get_db
+
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        backfill_renditions(conn)
@@ -0,0 +1,236 @@
+"""
+Content-addressed storage for case media.
+
+An uploaded file is stored once per content, as uploads/media/<sha256>.<ext>
+(SHA-256 of the uploaded bytes), and `media_blob` counts the media rows that
+point to it. Uploading the same image again, for the same or another case,
+adds a reference instead of a copy, and names no longer depend on the upload
+time (two uploads in the same second used to collide).
+
+- store_media(): write an upload without its image metadata, hash it and
+  take a reference
+- file_digest(): SHA-256 and size of a file
+- release_media(): drop references, returns the files nobody uses anymore
+- referenced_files(): files referenced again since they were released (the
+  'delete_files' job keeps them)
+- backfill_media_blobs(): register files uploaded before this scheme and
+  merge byte-identical duplicates, also runnable as a script
+
+Files created before the table existed and never backfilled have no
+`media_blob` row: they are treated as single-reference files.
+"""
+
+import hashlib
+import os
+import shutil
+import uuid
+from collections import Counter
+
+from werkzeug.utils import secure_filename
+
+from media_renditions import STATIC_DIR, delete_media_files, strip_metadata
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _in_list(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _extension(filename):
+    return os.path.splitext(secure_filename(filename or ''))[1].lower()
+
+
+def file_digest(path):
+    """(hex SHA-256, size in bytes) of the file at `path`."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _link_or_copy(path, stored_path):
+    # Through a temporary name, so the stored copy never appears half-written
+    tmp_path = os.path.join(os.path.dirname(stored_path), f".upload-{uuid.uuid4().hex}")
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, stored_path)
+
+
+def add_blob(cursor, path, sha256, size, folder, web_dir, extension, keep_source=False):
+    """
+    Take a reference on the blob `sha256` for a file written at `path`: the
+    file becomes the stored copy if the content is new, otherwise it is
+    discarded. With `keep_source`, `path` is left in place (hard-linked or
+    copied into the store) for the caller to delete after its commit.
+    Returns the blob's web path.
+    """
+    file_url = f"{web_dir}/{sha256}{extension}"
+    # Row first: it locks the blob against a concurrent 'delete_files' job
+    cursor.execute("""
+        INSERT INTO media_blob (sha256, file_url, size_bytes, ref_count)
+        VALUES (%s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE ref_count = ref_count + 1
+    """, (sha256, file_url, size))
+    cursor.execute("SELECT file_url FROM media_blob WHERE sha256 = %s", (sha256,))
+    stored_url = cursor.fetchone()['file_url']
+
+    stored_path = os.path.join(folder, os.path.basename(stored_url))
+    if stored_url == file_url and not os.path.exists(stored_path):
+        if keep_source:
+            _link_or_copy(path, stored_path)
+        else:
+            os.replace(path, stored_path)
+    elif not keep_source:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return stored_url
+
+
+def store_media(cursor, file, folder, web_dir):
+    """
+    Store an uploaded file (werkzeug FileStorage) by content, images without
+    their metadata (hashed after stripping). Returns its web path.
+    """
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f".upload-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+                out.write(chunk)
+        sha256 = digest.hexdigest()
+        if strip_metadata(tmp_path):
+            sha256, size = file_digest(tmp_path)
+        return add_blob(cursor, tmp_path, sha256, size, folder, web_dir,
+                        _extension(file.filename))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def release_media(cursor, file_urls):
+    """
+    Drop one reference per entry of `file_urls` (media rows being deleted).
+    Returns the files whose last reference went away, to remove after commit.
+    """
+    counts = Counter(url for url in file_urls if url)
+    if not counts:
+        return []
+    urls = list(counts)
+
+    cursor.execute(f"""
+        SELECT file_url FROM media_blob WHERE file_url IN ({_in_list(urls)}) FOR UPDATE
+    """, urls)
+    tracked = {row['file_url'] for row in cursor.fetchall()}
+    if tracked:
+        cursor.executemany(
+            "UPDATE media_blob SET ref_count = GREATEST(ref_count - %s, 0) WHERE file_url = %s",
+            [(counts[url], url) for url in tracked]
+        )
+        cursor.execute(f"""
+            SELECT file_url FROM media_blob
+            WHERE file_url IN ({_in_list(list(tracked))}) AND ref_count = 0
+        """, list(tracked))
+        unused = [row['file_url'] for row in cursor.fetchall()]
+        if unused:
+            cursor.execute(f"DELETE FROM media_blob WHERE file_url IN ({_in_list(unused)})", unused)
+    else:
+        unused = []
+    return [url for url in urls if url not in tracked] + unused
+
+
+def referenced_files(cursor, file_urls):
+    """Subset of `file_urls` with a live blob, locked until the caller commits."""
+    if not file_urls:
+        return set()
+    cursor.execute(f"""
+        SELECT file_url FROM media_blob WHERE file_url IN ({_in_list(file_urls)}) FOR UPDATE
+    """, list(file_urls))
+    return {row['file_url'] for row in cursor.fetchall()}
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def backfill_media_blobs(conn):
+    """
+    Register every media file without a blob, pointing the media rows of
+    byte-identical files to a single copy and removing the others.
+    """
+    from case_media import backfill_cover_media
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT m.file_url, COUNT(*) as refs
+            FROM media m
+            LEFT JOIN media_blob b ON b.file_url = m.file_url
+            WHERE b.sha256 IS NULL AND m.file_url IS NOT NULL
+            GROUP BY m.file_url
+            ORDER BY MIN(m.id_media)
+        """)
+        files = cursor.fetchall()
+
+    registered = merged = 0
+    for row in files:
+        path = os.path.join(STATIC_DIR, row['file_url'])
+        if not os.path.isfile(path):
+            continue
+        sha256 = _file_sha256(path)
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO media_blob (sha256, file_url, size_bytes, ref_count)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE ref_count = ref_count + %s
+            """, (sha256, row['file_url'], os.path.getsize(path), row['refs'], row['refs']))
+            cursor.execute("SELECT file_url FROM media_blob WHERE sha256 = %s", (sha256,))
+            stored_url = cursor.fetchone()['file_url']
+            if stored_url == row['file_url']:
+                registered += 1
+                conn.commit()
+                continue
+
+            # Same bytes as an already registered file: use that copy
+            cursor.execute("""
+                SELECT thumb_url, medium_url, width, height FROM media
+                WHERE file_url = %s LIMIT 1
+            """, (stored_url,))
+            stored = cursor.fetchone() or {}
+            cursor.execute("""
+                UPDATE media SET file_url = %s, thumb_url = %s, medium_url = %s, width = %s, height = %s
+                WHERE file_url = %s
+            """, (stored_url, stored.get('thumb_url'), stored.get('medium_url'),
+                  stored.get('width'), stored.get('height'), row['file_url']))
+        conn.commit()
+        delete_media_files(row['file_url'])
+        merged += 1
+
+    print(f"Media blobs: {registered} files registered, {merged} duplicates merged.")
+    if merged:
+        backfill_cover_media(conn)
+    return registered, merged
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config, get_db
+
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        backfill_media_blobs(conn)
@@ -0,0 +1,342 @@
+"""
+Versioned schema migrations for ONG Connect.
+
+init_db() creates the base tables; everything that changes an existing schema
+afterwards is listed here as a numbered migration. Applied versions are
+recorded in `schema_migrations`, so each one runs exactly once per database.
+
+Each migration is (version, description, function(cursor)).
+"""
+
+from case_media import backfill_cover_media
+from stats_summary import rebuild_summary
+from ong_domains import backfill_ong_domains
+from case_search import reindex_all
+
+
+def index_exists(cursor, table, index_name):
+    """Check information_schema for an index on the current database."""
+    cursor.execute("""
+        SELECT COUNT(*) as count FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index_name))
+    return cursor.fetchone()['count'] > 0
+
+
+def column_exists(cursor, table, column):
+    """Check information_schema for a column on the current database."""
+    cursor.execute("""
+        SELECT COUNT(*) as count FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()['count'] > 0
+
+
+def add_column(cursor, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    if not column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"Added {column} column to {table} table.")
+
+
+def create_index(cursor, table, index_name, columns):
+    """CREATE INDEX unless it already exists (MySQL has no IF NOT EXISTS for indexes)."""
+    if not index_exists(cursor, table, index_name):
+        cursor.execute(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})")
+        print(f"Created index {index_name} on {table}.")
+
+
+# --- Migrations ---
+
+def _001_hot_filter_indexes(cursor):
+    # Public feeds: WHERE statut_approbation = ... ORDER BY date_publication DESC, id DESC
+    create_index(cursor, 'cas_social', 'idx_cas_approbation_date',
+                 ['statut_approbation', 'date_publication', 'id_cas_social'])
+    # Statistics and filters on the approved subset
+    create_index(cursor, 'cas_social', 'idx_cas_approbation_statut', ['statut_approbation', 'statut'])
+    create_index(cursor, 'cas_social', 'idx_cas_approbation_wilaya', ['statut_approbation', 'wilaya', 'moughataa'])
+    create_index(cursor, 'cas_social', 'idx_cas_approbation_moughataa', ['statut_approbation', 'moughataa'])
+    create_index(cursor, 'cas_social', 'idx_cas_approbation_category', ['statut_approbation', 'category_id'])
+    # Resolved-case counts (beneficiaries) filter on statut alone
+    create_index(cursor, 'cas_social', 'idx_cas_statut', ['statut'])
+    # ONG dashboards/profiles: WHERE id_ong = ... ORDER BY date_publication DESC
+    create_index(cursor, 'cas_social', 'idx_cas_ong_date', ['id_ong', 'date_publication'])
+
+    # First/last image of a case: WHERE id_cas_social = ... ORDER BY id_media LIMIT 1
+    create_index(cursor, 'media', 'idx_media_case', ['id_cas_social', 'id_media'])
+
+    # Notification feed: ORDER BY date_notification DESC LIMIT 50
+    create_index(cursor, 'notifications', 'idx_notifications_date', ['date_notification'])
+
+    # ONG lists: validated ONGs by name, pending ONGs by update date
+    create_index(cursor, 'ong', 'idx_ong_validation_nom', ['statut_de_validation', 'nom_ong'])
+    create_index(cursor, 'ong', 'idx_ong_validation_update', ['statut_de_validation', 'update_at'])
+    create_index(cursor, 'ong', 'idx_ong_update', ['update_at'])
+
+
+def _002_case_cover_media(cursor):
+    add_column(cursor, 'cas_social', 'cover_media_id', 'INT NULL')
+    add_column(cursor, 'cas_social', 'cover_url', 'VARCHAR(255) NULL')
+    # Filled by migration 9, once the rendition columns exist
+
+
+def _003_update_timestamps(cursor):
+    # Change validators for conditional GET (see conditional_get.py)
+    for table in ('cas_social', 'media', 'categorie'):
+        add_column(cursor, table, 'updated_at',
+                   'DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')
+    cursor.execute("""
+        ALTER TABLE ong MODIFY update_at DATETIME
+        DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    """)
+    # MAX(updated_at) reads one index entry instead of scanning the table
+    create_index(cursor, 'cas_social', 'idx_cas_updated', ['updated_at'])
+    create_index(cursor, 'media', 'idx_media_updated', ['updated_at'])
+
+
+def _004_sync_tombstones(cursor):
+    # Deletion log for delta sync (see delta_sync.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_tombstone (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entity VARCHAR(20) NOT NULL,
+            entity_id INT NOT NULL,
+            deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_tombstone_entity_date (entity, deleted_at),
+            INDEX idx_tombstone_date (deleted_at)
+        )
+    """)
+
+
+def _005_stats_counters(cursor):
+    # Materialized statistics (see stats_summary.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counter (
+            dimension VARCHAR(30) NOT NULL,
+            status VARCHAR(30) NOT NULL DEFAULT '',
+            bucket VARCHAR(191) NOT NULL DEFAULT '',
+            total INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, status, bucket)
+        )
+    """)
+    # Filled by migration 6, once ong_domain exists
+
+
+def _006_ong_domains(cursor):
+    # ONG domains as a join table instead of the comma-separated
+    # ong.domaine_intervation (kept as display text)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ong_domain (
+            id_ong INT NOT NULL,
+            idCategorie INT NOT NULL,
+            PRIMARY KEY (id_ong, idCategorie),
+            INDEX idx_ong_domain_category (idCategorie, id_ong),
+            FOREIGN KEY (id_ong) REFERENCES ong(id_ong) ON DELETE CASCADE,
+            FOREIGN KEY (idCategorie) REFERENCES categorie(idCategorie) ON DELETE CASCADE
+        )
+    """)
+    backfill_ong_domains(cursor.connection)
+    # ong_domain counters are now bucketed by category id
+    rebuild_summary(cursor.connection)
+
+
+def _007_case_search(cursor):
+    # Normalized text + ngram FULLTEXT indexes (see case_search.py)
+    add_column(cursor, 'cas_social', 'search_title', 'VARCHAR(255) NULL')
+    add_column(cursor, 'cas_social', 'search_body', 'TEXT NULL')
+    reindex_all(cursor.connection)
+    # The default stopword list would drop every ngram containing 'a', 'i',
+    # 'de'... from French text; the setting is captured when the index is built
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = 0")
+    for index_name, columns in (('ft_cas_search', 'search_title, search_body'),
+                                ('ft_cas_search_title', 'search_title')):
+        if not index_exists(cursor, 'cas_social', index_name):
+            cursor.execute(f"ALTER TABLE cas_social ADD FULLTEXT INDEX {index_name} ({columns}) WITH PARSER ngram")
+            print(f"Created full-text index {index_name} on cas_social.")
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = 1")
+
+
+def _008_case_geo_index(cursor):
+    # Case coordinates (written by the mobile API, see case_geo.py)
+    add_column(cursor, 'cas_social', 'latitude', 'DECIMAL(9,6) NULL')
+    add_column(cursor, 'cas_social', 'longitude', 'DECIMAL(9,6) NULL')
+    # Radius queries: bounding-box range scan on the approved subset
+    create_index(cursor, 'cas_social', 'idx_cas_approbation_geo',
+                 ['statut_approbation', 'latitude', 'longitude'])
+
+
+def _009_media_renditions(cursor):
+    # Resized WEBP renditions and dimensions (see media_renditions.py)
+    add_column(cursor, 'media', 'thumb_url', 'VARCHAR(255) NULL')
+    add_column(cursor, 'media', 'medium_url', 'VARCHAR(255) NULL')
+    add_column(cursor, 'media', 'width', 'INT NULL')
+    add_column(cursor, 'media', 'height', 'INT NULL')
+    add_column(cursor, 'cas_social', 'cover_thumb_url', 'VARCHAR(255) NULL')
+    backfill_cover_media(cursor.connection)
+
+
+def _010_job_queue(cursor):
+    # Background jobs (see jobs.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_queue (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            job_type VARCHAR(50) NOT NULL,
+            payload TEXT NOT NULL,
+            status ENUM('pending', 'running', 'failed') NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            max_attempts INT NOT NULL DEFAULT 5,
+            run_after DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_by CHAR(32) NULL,
+            locked_at DATETIME NULL,
+            last_error TEXT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_job_due (status, run_after, id),
+            INDEX idx_job_locked (locked_by)
+        )
+    """)
+
+
+def _011_media_blobs(cursor):
+    # Content-addressed media files with reference counts (see media_store.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS media_blob (
+            sha256 CHAR(64) PRIMARY KEY,
+            file_url VARCHAR(255) NOT NULL,
+            size_bytes BIGINT NOT NULL,
+            ref_count INT NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_media_blob_file (file_url)
+        )
+    """)
+
+
+def _012_media_uploads(cursor):
+    # Resumable chunked uploads in progress (see chunked_upload.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS media_upload (
+            id CHAR(32) PRIMARY KEY,
+            id_ong INT NOT NULL,
+            filename VARCHAR(255) NOT NULL,
+            size_bytes BIGINT NOT NULL,
+            received_bytes BIGINT NOT NULL DEFAULT 0,
+            sha256 CHAR(64) NOT NULL,
+            status ENUM('uploading', 'complete') NOT NULL DEFAULT 'uploading',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_media_upload_updated (updated_at),
+            FOREIGN KEY (id_ong) REFERENCES ong(id_ong) ON DELETE CASCADE
+        )
+    """)
+
+
+def _013_auth_token_generations(cursor):
+    # Per-user token generation, bumped to revoke API tokens (see api_tokens.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS auth_token_generation (
+            user_id INT PRIMARY KEY,
+            generation INT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_auth_token_generation_updated (updated_at),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+
+def _014_single_credential_store(cursor):
+    # `users` becomes the only credential store: accounts still only in the
+    # legacy ong / administrateur password columns are moved there (one-time
+    # backfill), then the columns are dropped so nothing writes them twice
+    for table, id_column, role in (('administrateur', 'id_admin', 'admin'), ('ong', 'id_ong', 'ong')):
+        if not column_exists(cursor, table, 'mot_de_passe'):
+            continue
+        has_must_change = column_exists(cursor, table, 'must_change_password')
+        link_accounts = f"""
+            UPDATE {table} t JOIN users u ON u.email = t.email
+            SET t.user_id = u.id
+            WHERE t.user_id IS NULL
+        """
+        cursor.execute(link_accounts)
+        # Rows sharing an email get the account of the first one (INSERT IGNORE)
+        cursor.execute(f"""
+            INSERT IGNORE INTO users (email, password_hash, role, must_change_password)
+            SELECT t.email, t.mot_de_passe, '{role}',
+                   {'COALESCE(t.must_change_password, FALSE)' if has_must_change else 'FALSE'}
+            FROM {table} t
+            WHERE t.user_id IS NULL
+            ORDER BY t.{id_column}
+        """)
+        if cursor.rowcount:
+            print(f"Moved {cursor.rowcount} {table} accounts to the users table.")
+        cursor.execute(link_accounts)
+
+        cursor.execute(f"ALTER TABLE {table} DROP COLUMN mot_de_passe"
+                       + (", DROP COLUMN must_change_password" if has_must_change else ""))
+
+
+def _015_microsecond_timestamps(cursor):
+    # Two writes in the same second left COUNT(*) and MAX() of a second-level
+    # DATETIME unchanged, so the ETag (conditional_get.py) did not move
+    for table, column in (('cas_social', 'updated_at'), ('media', 'updated_at'),
+                          ('categorie', 'updated_at'), ('ong', 'update_at')):
+        cursor.execute(f"""
+            ALTER TABLE {table} MODIFY {column} DATETIME(6)
+            DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        """)
+    cursor.execute("""
+        ALTER TABLE sync_tombstone MODIFY deleted_at DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6)
+    """)
+
+
+def _016_scrub_reset_mails(cursor):
+    # Reset mails used to be queued rendered, temporary password included, and
+    # failed jobs are kept: drop those ('reset_password' jobs carry no secret)
+    cursor.execute("""
+        DELETE FROM job_queue
+        WHERE job_type = 'send_email' AND status = 'failed'
+          AND payload LIKE '%Renouvellement de mot de passe%'
+    """)
+
+
+MIGRATIONS = [
+    (1, 'Composite indexes for hot filter and sort columns', _001_hot_filter_indexes),
+    (2, 'Denormalized cover image on cas_social', _002_case_cover_media),
+    (3, 'Update timestamps for change detection', _003_update_timestamps),
+    (4, 'Deletion log for delta sync', _004_sync_tombstones),
+    (5, 'Materialized statistics counters', _005_stats_counters),
+    (6, 'ONG domain join table', _006_ong_domains),
+    (7, 'Full-text search on social cases', _007_case_search),
+    (8, 'Geographic index on social cases', _008_case_geo_index),
+    (9, 'Image renditions for media', _009_media_renditions),
+    (10, 'Background job queue', _010_job_queue),
+    (11, 'Content-addressed media storage', _011_media_blobs),
+    (12, 'Resumable media uploads', _012_media_uploads),
+    (13, 'API token revocation', _013_auth_token_generations),
+    (14, 'Users table as the only credential store', _014_single_credential_store),
+    (15, 'Microsecond update timestamps', _015_microsecond_timestamps),
+    (16, 'Drop failed reset mails holding temporary passwords', _016_scrub_reset_mails),
+]
+
+
+def run_migrations(conn):
+    """Apply every migration newer than the recorded schema version."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row['version'] for row in cursor.fetchall()}
+
+        for version, description, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"Applying migration {version}: {description}")
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            conn.commit()
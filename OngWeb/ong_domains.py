@@ -0,0 +1,103 @@
+"""
+ONG intervention domains for ONG Connect.
+
+An ONG's domains are categories: `ong_domain(id_ong, idCategorie)` is the
+source of truth for statistics and filters. `ong.domaine_intervation` is kept
+as the comma-separated display string the templates render.
+
+- parse_domains(): normalize a form list or comma-separated string
+- set_ong_domains(): replace an ONG's domains (names that match no category
+  are kept in the display string only)
+- domain_filter_sql(): indexed EXISTS condition "ONG works in domain X"
+- ong_domain_names(): {id_ong: [names]} for a set of ONGs
+- backfill_ong_domains(): build the table from the existing strings
+"""
+
+
+def parse_domains(value):
+    """Return a de-duplicated list of domain names from a list or a 'a,b' string."""
+    if value is None:
+        return []
+    items = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    names = []
+    for item in items:
+        for name in str(item).split(','):
+            name = name.strip()
+            if name and name.lower() not in (n.lower() for n in names):
+                names.append(name)
+    return names
+
+
+def set_ong_domains(cursor, ong_id, names):
+    """Replace the ong_domain rows of `ong_id` with the categories named `names`."""
+    cursor.execute("DELETE FROM ong_domain WHERE id_ong = %s", (ong_id,))
+    if not names:
+        return []
+    placeholders = ', '.join(['%s'] * len(names))
+    # nomCategorie compares case/accent-insensitively under utf8mb4_unicode_ci
+    cursor.execute(
+        f"SELECT idCategorie FROM categorie WHERE nomCategorie IN ({placeholders})",
+        list(names)
+    )
+    category_ids = [row['idCategorie'] for row in cursor.fetchall()]
+    if category_ids:
+        cursor.executemany(
+            "INSERT IGNORE INTO ong_domain (id_ong, idCategorie) VALUES (%s, %s)",
+            [(ong_id, category_id) for category_id in category_ids]
+        )
+    return category_ids
+
+
+def domain_filter_sql(ong_alias='o'):
+    """WHERE condition (one %s: category name) matching ONGs working in that domain."""
+    return f"""EXISTS (
+        SELECT 1 FROM ong_domain od_f
+        JOIN categorie cat_f ON cat_f.idCategorie = od_f.idCategorie
+        WHERE od_f.id_ong = {ong_alias}.id_ong AND cat_f.nomCategorie = %s
+    )"""
+
+
+def ong_domain_names(cursor, ong_ids):
+    """{id_ong: [category names]} for `ong_ids`."""
+    ong_ids = list(ong_ids)
+    if not ong_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(ong_ids))
+    cursor.execute(f"""
+        SELECT od.id_ong, cat.nomCategorie
+        FROM ong_domain od
+        JOIN categorie cat ON cat.idCategorie = od.idCategorie
+        WHERE od.id_ong IN ({placeholders})
+    """, ong_ids)
+    names = {}
+    for row in cursor.fetchall():
+        names.setdefault(row['id_ong'], []).append(row['nomCategorie'])
+    return names
+
+
+def backfill_ong_domains(conn):
+    """Fill ong_domain from every ong.domaine_intervation string."""
+    unmatched = set()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT idCategorie, nomCategorie FROM categorie")
+        categories = {row['nomCategorie'].strip().lower(): row['idCategorie'] for row in cursor.fetchall()}
+
+        cursor.execute("SELECT id_ong, domaine_intervation FROM ong")
+        rows = []
+        for ong in cursor.fetchall():
+            for name in parse_domains(ong['domaine_intervation']):
+                category_id = categories.get(name.lower())
+                if category_id:
+                    rows.append((ong['id_ong'], category_id))
+                else:
+                    unmatched.add(name)
+        if rows:
+            cursor.executemany(
+                "INSERT IGNORE INTO ong_domain (id_ong, idCategorie) VALUES (%s, %s)", rows
+            )
+    conn.commit()
+
+    print(f"ONG domains backfilled ({len(rows)} links).")
+    if unmatched:
+        print(f"Warning: domains matching no category (display only): {', '.join(sorted(unmatched))}")
+    return len(rows)
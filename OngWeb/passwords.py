@@ -0,0 +1,169 @@
+"""
+Password hashing service for ONG Connect.
+
+Hashing and checking passwords is deliberately slow (scrypt by default), and
+a login burst (every mobile client logging in again when its token expires)
+used to run that many hashes at once on the request threads. Here:
+- the work runs in a pool of PASSWORD_HASH_WORKERS threads (hashlib's
+  scrypt / pbkdf2 release the GIL), so at most that many cores hash at a
+  time and the other requests keep being served
+- at most PASSWORD_HASH_QUEUE more wait for a worker; beyond that a caller
+  waits PASSWORD_HASH_WAIT seconds for room, then gets PasswordHashBusyError
+  (answered with 503)
+- PASSWORD_HASH_METHOD sets the algorithm and its cost, in werkzeug's
+  notation ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'); a stored hash made
+  with other parameters, or a legacy plain-text password, is replaced on the
+  next successful login (verify_password() returns the new hash)
+- queue wait and hashing time are sampled for password_stats()
+
+Without init_passwords() (scripts), hashing runs inline on the caller.
+
+- hash_password(): hash a new password with the configured method
+- verify_password(): check a password, with the upgraded hash when needed
+- needs_rehash(): whether a stored hash uses other parameters
+- password_stats(): counters and timing percentiles
+"""
+
+import hmac
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class PasswordHashBusyError(Exception):
+    """Every hashing slot is taken; the caller should ask the client to retry."""
+
+
+_settings = {
+    'PASSWORD_HASH_METHOD': 'scrypt:32768:8:1',
+    'PASSWORD_HASH_WORKERS': 2,
+    'PASSWORD_HASH_QUEUE': 16,
+    'PASSWORD_HASH_WAIT': 2,
+}
+
+# Prefixes of werkzeug hashes; anything else is a legacy plain-text value
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+_pool = None
+_slots = None
+
+_stats = {'hashes': 0, 'verifications': 0, 'failures': 0, 'rehashes': 0, 'busy': 0}
+_samples = {'hash_ms': deque(maxlen=1000), 'wait_ms': deque(maxlen=1000)}
+_stats_lock = threading.Lock()
+
+
+def _normalized_method(method):
+    # 'scrypt' and 'scrypt:32768:8:1' hash alike: compare the full form
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        raise ValueError(f"Unsupported password hash method '{method}'")
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+def init_passwords(config):
+    """Read the PASSWORD_HASH_* settings and start the hashing pool."""
+    global _pool, _slots
+    for key in _settings:
+        if config.get(key) is not None:
+            _settings[key] = config.get(key)
+    _settings['PASSWORD_HASH_METHOD'] = _normalized_method(_settings['PASSWORD_HASH_METHOD'])
+
+    workers = max(1, _settings['PASSWORD_HASH_WORKERS'])
+    _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    _slots = threading.BoundedSemaphore(workers + max(0, _settings['PASSWORD_HASH_QUEUE']))
+
+
+def _record(counter, wait, elapsed):
+    with _stats_lock:
+        _stats[counter] += 1
+        _samples['wait_ms'].append(wait * 1000)
+        _samples['hash_ms'].append(elapsed * 1000)
+
+
+def _timed(fn, args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, start, time.perf_counter() - start
+
+
+def _run(counter, fn, *args):
+    queued = time.perf_counter()
+    if _pool is None:
+        result, start, elapsed = _timed(fn, args)
+    else:
+        if not _slots.acquire(timeout=_settings['PASSWORD_HASH_WAIT']):
+            with _stats_lock:
+                _stats['busy'] += 1
+            raise PasswordHashBusyError('Too many logins in progress, retry shortly')
+        try:
+            result, start, elapsed = _pool.submit(_timed, fn, args).result()
+        finally:
+            _slots.release()
+    _record(counter, start - queued, elapsed)
+    return result
+
+
+def hash_password(password):
+    """Hash of `password` with the configured method and cost."""
+    return _run('hashes', generate_password_hash, password, _settings['PASSWORD_HASH_METHOD'])
+
+
+def needs_rehash(stored):
+    """Whether `stored` is not a hash made with the configured parameters."""
+    return not stored.startswith(HASH_PREFIXES) or \
+        stored.split('$', 1)[0] != _settings['PASSWORD_HASH_METHOD']
+
+
+def verify_password(stored, password):
+    """
+    Check `password` against the stored value. Returns (valid, new_hash):
+    new_hash is set when the stored value is plain text or uses outdated
+    parameters, and should replace it.
+    """
+    if not stored or not password:
+        return False, None
+
+    if stored.startswith(HASH_PREFIXES):
+        valid = _run('verifications', check_password_hash, stored, password)
+    else:
+        # Legacy plain-text value
+        valid = hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+
+    if not valid:
+        with _stats_lock:
+            _stats['failures'] += 1
+        return False, None
+    if needs_rehash(stored):
+        with _stats_lock:
+            _stats['rehashes'] += 1
+        return True, hash_password(password)
+    return True, None
+
+
+def _percentiles(samples):
+    if not samples:
+        return {'p50': None, 'p95': None, 'max': None}
+    ordered = sorted(samples)
+    return {
+        'p50': round(ordered[len(ordered) // 2], 1),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'max': round(ordered[-1], 1),
+    }
+
+
+def password_stats():
+    """Counters, and wait / hashing time percentiles (ms) over the last 1000 operations."""
+    with _stats_lock:
+        stats = dict(_stats)
+        stats['hash_ms'] = _percentiles(_samples['hash_ms'])
+        stats['wait_ms'] = _percentiles(_samples['wait_ms'])
+    stats['method'] = _settings['PASSWORD_HASH_METHOD']
+    stats['workers'] = _settings['PASSWORD_HASH_WORKERS']
+    return stats
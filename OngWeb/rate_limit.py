@@ -0,0 +1,216 @@
+"""
+Rate limiting of the login and password reset endpoints.
+
+Each of these calls costs a password hash check (see passwords.py) or an
+email, so a burst of bad requests used to burn CPU and mail quota unchecked.
+Every decorated call now takes one token from two buckets: one for the client
+IP and one for the account it targets (email, ONG id). A bucket holds up to N
+tokens and refills continuously at N per period, so it allows at most N calls
+in any sliding window of that length, plus the refill within it. The limits
+come from the RATE_LIMIT_* settings, written 'N/seconds' ('5/60').
+
+When either bucket is empty the call is refused with RateLimitExceeded
+(answered with 429 and Retry-After) before the view runs.
+
+Backends:
+- MemoryBackend: in-process buckets, LRU-bounded (default, one per worker:
+  with W workers a client gets up to W times the limit)
+- RedisBackend: shared Redis-compatible server (RATE_LIMIT_REDIS_URL), one
+  atomic script per bucket, so the limits hold across workers
+
+- rate_limited(): decorator for a view, with the account extractor
+- request_field(): account extractor reading a form or JSON field
+- rate_limit_stats(): allowed / limited counters per scope
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request
+
+
+class RateLimitExceeded(Exception):
+    """Too many calls from the client or for the account; retry after `retry_after` seconds."""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many attempts, retry in {retry_after} seconds")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def parse_limit(value):
+    """'N/seconds' -> (N, seconds); None or '' disables the limit."""
+    if not value:
+        return None
+    count, _, period = str(value).partition('/')
+    count, period = int(count), float(period or 60)
+    if count <= 0 or period <= 0:
+        raise ValueError(f"Invalid rate limit '{value}'")
+    return count, period
+
+
+class MemoryBackend:
+    """Thread-safe in-process token buckets, the least recently used dropped beyond max_keys."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        """Take a token; returns 0 when allowed, else the seconds until one is back."""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def size(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+# KEYS[1] bucket; ARGV capacity, period, now (seconds). Returns the wait as a string.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local rate = capacity / period
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(period))
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Shared buckets on a Redis-compatible server (requires the `redis` package)."""
+
+    def __init__(self, url, prefix='ongconnect:ratelimit:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key, capacity, period):
+        # Wall clock: shared by the workers, unlike time.monotonic()
+        return float(self._take(keys=[self._prefix + key], args=[capacity, period, time.time()]))
+
+    def size(self):
+        return None
+
+
+_settings = {
+    'RATE_LIMIT_ENABLED': True,
+    'RATE_LIMIT_LOGIN_IP': '20/60',
+    'RATE_LIMIT_LOGIN_ACCOUNT': '5/60',
+    'RATE_LIMIT_RESET_IP': '10/3600',
+    'RATE_LIMIT_RESET_ACCOUNT': '3/3600',
+    'RATE_LIMIT_MAX_KEYS': 100000,
+}
+
+# Process-wide state, configured by init_rate_limits()
+_backend = None
+_stats = {}  # scope -> {'allowed': n, 'limited': n}
+_stats_lock = threading.Lock()
+
+
+def init_rate_limits(config):
+    """Read the RATE_LIMIT_* settings and pick the backend."""
+    global _backend
+    for key in _settings:
+        if config.get(key) is not None:
+            _settings[key] = config.get(key)
+
+    redis_url = config.get('RATE_LIMIT_REDIS_URL')
+    _backend = None
+    if redis_url:
+        try:
+            _backend = RedisBackend(redis_url)
+        except Exception as e:
+            print(f"Warning: Redis rate limiter unavailable ({e}), using in-process buckets.")
+    if _backend is None:
+        _backend = MemoryBackend(_settings['RATE_LIMIT_MAX_KEYS'])
+
+
+def _count(scope, name):
+    with _stats_lock:
+        counters = _stats.setdefault(scope, {'allowed': 0, 'limited': 0})
+        counters[name] += 1
+
+
+def _check(scope, account):
+    buckets = [('ip', request.remote_addr or 'unknown')]
+    if account:
+        buckets.append(('account', str(account).strip().lower()))
+
+    wait = 0
+    for kind, value in buckets:
+        limit = parse_limit(_settings[f"RATE_LIMIT_{scope.upper()}_{kind.upper()}"])
+        if limit is None:
+            continue
+        try:
+            wait = max(wait, _backend.take(f"{scope}:{kind}:{value}", *limit))
+        except Exception as e:
+            # A backend outage must not lock everyone out
+            print(f"Rate limiter error: {e}")
+    if wait > 0:
+        _count(scope, 'limited')
+        raise RateLimitExceeded(scope, max(1, math.ceil(wait)))
+    _count(scope, 'allowed')
+
+
+def request_field(name):
+    """Account extractor returning the `name` field of the submitted form or JSON body."""
+    def extract():
+        if request.is_json:
+            value = (request.get_json(silent=True) or {}).get(name)
+        else:
+            value = request.form.get(name)
+        return value if isinstance(value, (str, int)) else None
+    return extract
+
+
+def rate_limited(scope, account=None):
+    """
+    Limit POST calls of a view in `scope` ('login' or 'reset'), per client IP
+    and per account returned by `account()` (see request_field()).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if _settings['RATE_LIMIT_ENABLED'] and _backend is not None and request.method == 'POST':
+                _check(scope, account() if account else None)
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
+def rate_limit_stats():
+    """Allowed and limited calls per scope, and the number of tracked buckets."""
+    with _stats_lock:
+        stats = {scope: dict(counters) for scope, counters in _stats.items()}
+    return {'scopes': stats, 'buckets': _backend.size() if _backend is not None else 0,
+            'enabled': _settings['RATE_LIMIT_ENABLED']}
@@ -0,0 +1,202 @@
+"""
+Response caching for the public read APIs of ONG Connect.
+
+GET responses of read-mostly endpoints are cached under a key built from the
+host, path and normalized query string. Each cached entry is tagged with the
+entities it was built from ('case', 'ong', 'category', 'media'); every write
+path calls invalidate_cache() with the tags it touched.
+
+Invalidation uses per-tag generation counters: an entry stores the generations
+of its tags at build time and is ignored as soon as one of them moved, so a
+read is never served stale after a write has committed.
+
+Backends:
+- MemoryBackend: in-process LRU with TTL (default, one cache per worker)
+- RedisBackend: shared Redis-compatible server (RESPONSE_CACHE_REDIS_URL),
+  needed for invalidation to reach every worker when running several processes
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tags):
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend on a Redis-compatible server (requires the `redis` package)."""
+
+    def __init__(self, url, prefix='ongconnect:cache:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._redis.get(self._prefix + key)
+        if raw is None:
+            return None
+        meta, _, body = raw.partition(b'\n')
+        entry = json.loads(meta)
+        entry['body'] = body
+        return entry
+
+    def set(self, key, entry, ttl):
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        raw = json.dumps(meta).encode('utf-8') + b'\n' + entry['body']
+        self._redis.set(self._prefix + key, raw, ex=max(1, int(ttl)))
+
+    def generations(self, tags):
+        values = self._redis.mget([f"{self._prefix}tag:{tag}" for tag in tags])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def bump(self, tags):
+        pipe = self._redis.pipeline()
+        for tag in tags:
+            pipe.incr(f"{self._prefix}tag:{tag}")
+        pipe.execute()
+
+    def size(self):
+        return None
+
+
+# Process-wide cache state, configured by init_cache()
+_backend = None
+_enabled = False
+_default_ttl = 60
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def init_cache(config):
+    """Configure the cache from a Flask/Config mapping."""
+    global _backend, _enabled, _default_ttl
+    _enabled = config.get('RESPONSE_CACHE_ENABLED', True)
+    _default_ttl = config.get('RESPONSE_CACHE_TTL', 60)
+
+    redis_url = config.get('RESPONSE_CACHE_REDIS_URL')
+    _backend = None
+    if redis_url:
+        try:
+            _backend = RedisBackend(redis_url)
+        except Exception as e:
+            print(f"Warning: Redis cache unavailable ({e}), using in-process cache.")
+    if _backend is None:
+        _backend = MemoryBackend(config.get('RESPONSE_CACHE_MAX_ENTRIES', 512))
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _cache_key():
+    # Query args are normalized: sorted, empty values dropped
+    args = sorted(
+        (k, v) for k, values in request.args.lists() for v in values if v != ''
+    )
+    query = '&'.join(f"{k}={v}" for k, v in args)
+    return f"{request.host}{request.path}?{query}"
+
+
+def cached(*tags, ttl=None):
+    """Cache successful GET responses of a view, invalidated by `tags`."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not _enabled or _backend is None or request.method != 'GET':
+                return f(*args, **kwargs)
+
+            key = _cache_key()
+            try:
+                generations = _backend.generations(tags)
+                entry = _backend.get(key)
+            except Exception as e:
+                print(f"Cache read error: {e}")
+                return f(*args, **kwargs)
+
+            if entry is not None and entry['generations'] == generations:
+                _count('hits')
+                response = make_response(entry['body'], entry['status'])
+                response.headers['Content-Type'] = entry['content_type']
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            _count('misses')
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                try:
+                    _backend.set(key, {
+                        'generations': generations,
+                        'status': response.status_code,
+                        'content_type': response.headers.get('Content-Type'),
+                        'body': response.get_data(),
+                    }, ttl or _default_ttl)
+                except Exception as e:
+                    print(f"Cache write error: {e}")
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated
+    return decorator
+
+
+def invalidate_cache(*tags):
+    """Invalidate every cached response tagged with one of `tags` (call after commit)."""
+    if _backend is None or not tags:
+        return
+    try:
+        _backend.bump(tags)
+        _count('invalidations')
+    except Exception as e:
+        print(f"Cache invalidation error: {e}")
+
+
+def cache_stats():
+    """Return hit/miss/invalidation counters and the current entry count."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['entries'] = _backend.size() if _backend is not None else 0
+    return stats
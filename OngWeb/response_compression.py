@@ -0,0 +1,96 @@
+"""
+Gzip / brotli compression of dynamic responses for ONG Connect.
+
+The case lists (/api/cases, /api/social-cases, /api/cases_legacy) and the
+public pages repeat the same URL prefixes, ONG contact blocks and markup for
+every case: they shrink by an order of magnitude when compressed. An
+after_request hook compresses a response when:
+- the client accepts it (Accept-Encoding: br preferred, then gzip)
+- its type is in COMPRESSION_MIMETYPES (HTML, JSON, text...)
+- it is at least COMPRESSION_MIN_SIZE bytes: below that the headers cost
+  more than what compression saves
+- it is not already encoded (pre-compressed assets, see static_assets.py),
+  streamed from a file, or marked `Cache-Control: no-transform`
+
+COMPRESSION_LEVEL is the gzip level (1-9), COMPRESSION_BROTLI_QUALITY the
+brotli quality (0-11); both trade CPU per request for bytes on the wire,
+see bench_compression.py. Brotli needs the `brotli` package; without it
+only gzip is used.
+
+- init_compression(): read the COMPRESSION_* settings and register the hook
+- compress(): encode a body, also used by the benchmark
+"""
+
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+_settings = {
+    'COMPRESSION_ENABLED': True,
+    'COMPRESSION_MIN_SIZE': 500,
+    'COMPRESSION_LEVEL': 6,
+    'COMPRESSION_BROTLI_QUALITY': 4,
+    'COMPRESSION_MIMETYPES': ('text/html', 'text/plain', 'text/css', 'text/csv',
+                              'application/json', 'application/javascript',
+                              'application/xml', 'image/svg+xml'),
+}
+
+
+def compress(data, encoding, level=None):
+    """`data` encoded with 'gzip' or 'br' at `level` (the configured one by default)."""
+    if encoding == 'br':
+        quality = _settings['COMPRESSION_BROTLI_QUALITY'] if level is None else level
+        return brotli.compress(data, quality=quality)
+    level = _settings['COMPRESSION_LEVEL'] if level is None else level
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _accepted_encoding():
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_response(response):
+    if (not _settings['COMPRESSION_ENABLED']
+            or request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in _settings['COMPRESSION_MIMETYPES']
+            or 'no-transform' in response.cache_control):
+        return response
+
+    # Same URL, body depending on Accept-Encoding: shared caches must key on it
+    response.vary.add('Accept-Encoding')
+    encoding = _accepted_encoding()
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < _settings['COMPRESSION_MIN_SIZE']:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # A strong ETag names exact bytes: the encoded body needs its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def init_compression(app):
+    """Read the COMPRESSION_* settings from the app config and register the hook."""
+    for key in _settings:
+        if app.config.get(key) is not None:
+            _settings[key] = app.config.get(key)
+    _settings['COMPRESSION_MIMETYPES'] = tuple(_settings['COMPRESSION_MIMETYPES'])
+    app.after_request(_compress_response)
@@ -10,14 +10,25 @@ import json
 import os
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
 
 # Import from our modules
-from database import get_db, get_db_connection, check_and_migrate_password
+from database import get_db, get_db_connection, check_user_password, check_account_password
+from passwords import hash_password
+from rate_limit import rate_limited, request_field
+from api_tokens import revoke_user_tokens, apply_revocation
 from translations import TRANSLATIONS
 from auth import admin_required
 from config import Config
 from locations_data import MAURITANIA_LOCATIONS
+from response_cache import invalidate_cache
+from delta_sync import record_deletion
+from stats_summary import (
+    add_case_counts, remove_case_counts, add_ong_counts, remove_ong_counts,
+    case_overview, case_breakdown, ong_status_counts
+)
+from beneficiaries import beneficiary_stats
+from jobs import enqueue
+from cascade_delete import delete_cases, delete_ongs
 
 # Helper function for session checking
 def get_current_lang():
@@ -10,7 +10,8 @@ are left in app.py for now but should be migrated here in future iterations.
 from routes import (
     Blueprint, render_template, request, redirect, url_for, flash, session,
     get_db, get_db_connection, admin_required, TRANSLATIONS, os,
-    check_and_migrate_password, generate_password_hash
+    hash_password, invalidate_cache, revoke_user_tokens, apply_revocation,
+    add_case_counts, remove_case_counts, delete_cases
 )
 
 # Create blueprint
@@ -61,8 +62,11 @@ def approve_case(id):
     """Approve a social case."""
     with get_db() as conn:
         with conn.cursor() as cursor:
+            remove_case_counts(cursor, [id])
             cursor.execute("UPDATE cas_social SET statut_approbation = 'approuvé' WHERE id_cas_social = %s", (id,))
+            add_case_counts(cursor, [id])
         conn.commit()
+        invalidate_cache('case')
     flash(TRANSLATIONS[session.get('lang', 'ar')]['case_approved'], 'success')
     return redirect(url_for('admin.dashboard'))
 
@@ -74,21 +78,10 @@ def reject_case(id):
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Clean media files
-            cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (id,))
-            media_files = cursor.fetchall()
-            for media in media_files:
-                if media['file_url']:
-                    file_path = os.path.join('static', media['file_url'])
-                    if os.path.exists(file_path):
-                        try: os.remove(file_path)
-                        except: pass
-            
-            # Delete records
-            cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (id,))
-            cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (id,))
-            cursor.execute("DELETE FROM cas_social WHERE id_cas_social = %s", (id,))
+            # Rows now, media files by the job worker once committed
+            delete_cases(cursor, [id])
         conn.commit()
+        invalidate_cache('case', 'media')
     finally:
         conn.close()
     flash('Cas social rejeté et supprimé avec succès.', 'success')
@@ -104,16 +97,23 @@ def reset_ong_password(id):
         flash("Mot de passe requis", "danger")
         return redirect(request.referrer)
     
-    hashed = generate_password_hash(new_password)
+    hashed = hash_password(new_password)
     
     with get_db() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("""
-                UPDATE ong 
-                SET mot_de_passe = %s, must_change_password = TRUE 
-                WHERE id_ong = %s
-            """, (hashed, id))
+            cursor.execute("SELECT user_id FROM ong WHERE id_ong = %s", (id,))
+            row = cursor.fetchone()
+            user_id = row['user_id'] if row else None
+            generation = None
+            if user_id:
+                cursor.execute("""
+                    UPDATE users SET password_hash = %s, must_change_password = TRUE
+                    WHERE id = %s
+                """, (hashed, user_id))
+                # Log out the mobile sessions opened with the old password
+                generation = revoke_user_tokens(cursor, user_id)
         conn.commit()
+        apply_revocation(user_id, generation)
     
     flash("Mot de passe réinitialisé avec succès", "success")
     return redirect(request.referrer or url_for('admin.dashboard'))
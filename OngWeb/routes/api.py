@@ -5,8 +5,10 @@ Handles all /api/*  routes for the mobile application.
 
 from routes import(
     Blueprint, request, jsonify, session, os, datetime,
-    get_db, get_db_connection, check_and_migrate_password,
-    TRANSLATIONS, check_api_auth, secure_filename, allowed_file
+    get_db, get_db_connection, check_user_password, check_account_password,
+    TRANSLATIONS, check_api_auth, secure_filename, allowed_file,
+    invalidate_cache, add_case_counts, remove_case_counts, add_ong_counts, remove_ong_counts,
+    delete_cases, delete_ongs, rate_limited, request_field
 )
 
 # Create blueprint
@@ -14,6 +16,7 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 
 @api_bp.route('/verify_ong_password', methods=['POST'])
+@rate_limited('login', account=request_field('ong_id'))
 def verify_ong_password():
     """Verify ONG password for mobile app."""
     data = request.get_json()
@@ -25,20 +28,17 @@ def verify_ong_password():
         
     conn = get_db_connection()
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT id_ong, mot_de_passe FROM ong WHERE id_ong=%s", (ong_id,))
-            result = cursor.fetchone()
-            
-            if result and check_and_migrate_password(conn, 'ong', 'id_ong', result['id_ong'], password, result['mot_de_passe']):
-                session['authorized_ong_id'] = int(ong_id)
-                return {'success': True}
-            else:
-                return {'success': False, 'message': 'Mot de passe incorrect'}, 401
+        if check_account_password(conn, 'ong', 'id_ong', ong_id, password):
+            session['authorized_ong_id'] = int(ong_id)
+            return {'success': True}
+        else:
+            return {'success': False, 'message': 'Mot de passe incorrect'}, 401
     finally:
         conn.close()
 
 
 @api_bp.route('/verify_admin_credentials', methods=['POST'])
+@rate_limited('login', account=request_field('email'))
 def verify_admin_credentials():
     """Verify admin credentials for mobile app."""
     data = request.get_json()
@@ -51,10 +51,10 @@ def verify_admin_credentials():
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM administrateur WHERE email=%s", (email,))
+            cursor.execute("SELECT id, password_hash FROM users WHERE email=%s AND role='admin'", (email,))
             admin = cursor.fetchone()
             
-            if admin and check_and_migrate_password(conn, 'administrateur', 'id_admin', admin['id_admin'], password, admin['mot_de_passe']):
+            if admin and check_user_password(conn, admin, password):
                 return {'success': True}
             else:
                 return {'success': False, 'message': 'Invalid credentials'}, 401
@@ -114,8 +114,7 @@ def admin_pending_cases():
                 cursor.execute("""
                     SELECT c.id_cas_social, c.titre, c.description, c.wilaya, c.moughataa,
                            c.adresse, c.date_publication, c.statut, c.category_id,
-                           o.nom_ong, cat.nomCategorie,
-                           (SELECT file_url FROM media WHERE id_cas_social = c.id_cas_social LIMIT 1) as first_image
+                           o.nom_ong, cat.nomCategorie, COALESCE(c.cover_thumb_url, c.cover_url) as first_image
                     FROM cas_social c
                     LEFT JOIN ong o ON c.id_ong = o.id_ong
                     LEFT JOIN categorie cat ON c.category_id = cat.idCategorie
@@ -155,8 +154,11 @@ def admin_approve_ong(id):
     try:
         with get_db() as conn:
             with conn.cursor() as cursor:
+                remove_ong_counts(cursor, [id])
                 cursor.execute("UPDATE ong SET statut_de_validation = 'validé' WHERE id_ong = %s", (id,))
+                add_ong_counts(cursor, [id])
             conn.commit()
+            invalidate_cache('ong')
         return jsonify({'success': True, 'message': 'ONG approved successfully'})
     except Exception as e:
         print(f"Error approving ONG: {e}")
@@ -173,44 +175,10 @@ def admin_reject_ong(id):
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Clean up cases and their media
-                cursor.execute("SELECT id_cas_social FROM cas_social WHERE id_ong=%s", (id,))
-                cases = cursor.fetchall()
-                
-                for case in cases:
-                    case_id = case['id_cas_social']
-                    
-                    # Delete media files
-                    cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (case_id,))
-                    media_files = cursor.fetchall()
-                    for media in media_files:
-                        if media['file_url']:
-                            file_path = os.path.join('static', media['file_url'])
-                            if os.path.exists(file_path):
-                                try: os.remove(file_path)
-                                except: pass
-                    cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (case_id,))
-                    cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (case_id,))
-                    cursor.execute("DELETE FROM cas_social WHERE id_cas_social=%s", (case_id,))
-                
-                # Clean up ONG files
-                cursor.execute("SELECT logo_url, verification_doc_url FROM ong WHERE id_ong=%s", (id,))
-                ong_data = cursor.fetchone()
-                if ong_data:
-                    if ong_data.get('logo_url'):
-                        logo_path = os.path.join('static', ong_data['logo_url'])
-                        if os.path.exists(logo_path):
-                            try: os.remove(logo_path)
-                            except: pass
-                    if ong_data.get('verification_doc_url'):
-                        doc_path = os.path.join('static', ong_data['verification_doc_url'])
-                        if os.path.exists(doc_path):
-                            try: os.remove(doc_path)
-                            except: pass
-                
-                # Delete ONG
-                cursor.execute("DELETE FROM ong WHERE id_ong=%s", (id,))
+                # ONG, cases, media and account; files removed after commit
+                delete_ongs(cursor, [id])
                 conn.commit()
+                invalidate_cache('ong', 'case', 'media')
             
             return jsonify({'success': True, 'message': 'ONG rejected and deleted'})
         finally:
@@ -229,7 +197,9 @@ def admin_approve_case(id):
     try:
         with get_db() as conn:
             with conn.cursor() as cursor:
+                remove_case_counts(cursor, [id])
                 cursor.execute("UPDATE cas_social SET statut_approbation = 'approuvé' WHERE id_cas_social = %s", (id,))
+                add_case_counts(cursor, [id])
                 
                 # Trigger Notification
                 cursor.execute("SELECT titre FROM cas_social WHERE id_cas_social = %s", (id,))
@@ -242,6 +212,7 @@ def admin_approve_case(id):
                     """, (id, f"Nouveau cas social publié : {case_title}", f"تم نشر حالة اجتماعية جديدة: {case_title}"))
                     
             conn.commit()
+            invalidate_cache('case')
         return jsonify({'success': True, 'message': 'Case approved successfully'})
     except Exception as e:
         print(f"Error approving case: {e}")
@@ -258,21 +229,10 @@ def admin_reject_case(id):
         conn = get_db_connection()
         try:
             with conn.cursor() as cursor:
-                # Clean media files
-                cursor.execute("SELECT file_url FROM media WHERE id_cas_social=%s", (id,))
-                media_files = cursor.fetchall()
-                for media in media_files:
-                    if media['file_url']:
-                        file_path = os.path.join('static', media['file_url'])
-                        if os.path.exists(file_path):
-                            try: os.remove(file_path)
-                            except: pass
-                
-                # Delete records
-                cursor.execute("DELETE FROM media WHERE id_cas_social=%s", (id,))
-                cursor.execute("DELETE FROM beneficier WHERE id_cas_social=%s", (id,))
-                cursor.execute("DELETE FROM cas_social WHERE id_cas_social = %s", (id,))
+                # Rows now, media files by the job worker once committed
+                delete_cases(cursor, [id])
                 conn.commit()
+                invalidate_cache('case', 'media')
             
             return jsonify({'success': True, 'message': 'Case rejected and deleted'})
         finally:
@@ -9,7 +9,7 @@ NOTE: This blueprint contains the core ONG routes. Additional routes from app.py
 from routes import (
     Blueprint, render_template, request, redirect, url_for, flash, session,
     get_db, get_db_connection, TRANSLATIONS, os, datetime, secure_filename,
-    allowed_file, generate_password_hash
+    allowed_file, hash_password
 )
 
 # Create blueprint
@@ -4,9 +4,11 @@ Handles all public routes like dashboard, statistics, case details, etc.
 """
 
 from routes import (
-    Blueprint, render_template, request, redirect, url_for, session,
-    get_db, get_db_connection, TRANSLATIONS, MAURITANIA_LOCATIONS
+    Blueprint, render_template, request, redirect, url_for, session, jsonify,
+    get_db, get_db_connection, TRANSLATIONS, MAURITANIA_LOCATIONS,
+    case_overview, case_breakdown, ong_status_counts, beneficiary_stats
 )
+from case_feed import DEFAULT_PAGE_SIZE, filters_from_args, decode_cursor, fetch_case_page, count_cases
 
 # Create blueprint
 public_bp = Blueprint('public', __name__, url_prefix='/public')
@@ -38,38 +40,18 @@ def get_pagination_iter(current_page, total_pages, left_edge=1, right_edge=1, le
 
 @public_bp.route('/dashboard')
 def dashboard():
-    """Public dashboard showing approved cases."""
-    page = request.args.get('page', 1, type=int)
-    per_page = 3
-    offset = (page - 1) * per_page
+    """Public dashboard showing the first page of approved cases."""
+    filters = filters_from_args(request.args)
     
     with get_db() as conn:
         with conn.cursor() as cursor:
             # Count total approved cases only
             cursor.execute("SELECT COUNT(*) as count FROM cas_social WHERE statut_approbation = 'approuvé'")
             total_cases = cursor.fetchone()['count']
-            total_pages = (total_cases + per_page - 1) // per_page
-            
-            if page < 1: page = 1
-            if total_pages > 0 and page > total_pages: page = total_pages
-            offset = (page - 1) * per_page
 
-            # Fetch approved cases for current page
-            sql = """
-                SELECT c.*, o.nom_ong, o.logo_url, o.domaine_intervation, m.file_url 
-                FROM cas_social c 
-                LEFT JOIN ong o ON c.id_ong = o.id_ong
-                LEFT JOIN (
-                    SELECT id_cas_social, MIN(file_url) as file_url 
-                    FROM media 
-                    GROUP BY id_cas_social
-                ) m ON c.id_cas_social = m.id_cas_social
-                WHERE c.statut_approbation = 'approuvé'
-                ORDER BY c.date_publication DESC
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(sql, (per_page, offset))
-            cases = cursor.fetchall()
+            # First page; later pages come from the cases feed
+            cases, next_cursor = fetch_case_page(cursor, filters)
+            filtered_total = count_cases(cursor, filters) if any(filters.values()) else total_cases
 
             # Fetch ONGs
             cursor.execute("SELECT * FROM ong ORDER BY update_at DESC LIMIT 6")
@@ -81,75 +63,70 @@ def dashboard():
             cursor.execute("SELECT * FROM categorie")
             categories = cursor.fetchall()
 
-            # All cases for client-side filtering
-            sql_all = """
-                SELECT c.*, o.nom_ong, o.logo_url, o.domaine_intervation, m.file_url 
-                FROM cas_social c 
-                LEFT JOIN ong o ON c.id_ong = o.id_ong
-                LEFT JOIN (
-                    SELECT id_cas_social, MIN(file_url) as file_url 
-                    FROM media 
-                    GROUP BY id_cas_social
-                ) m ON c.id_cas_social = m.id_cas_social
-                WHERE c.statut_approbation = 'approuvé'
-                ORDER BY c.date_publication DESC
-            """
-            cursor.execute(sql_all)
-            all_cases = cursor.fetchall()
-
             # Dashboard Statistics
             cursor.execute("SELECT COUNT(*) as count FROM ong")
             stats_nb_ongs = cursor.fetchone()['count']
 
             cursor.execute("SELECT COUNT(*) as count FROM cas_social WHERE statut='Résolu'")
             stats_resolved = cursor.fetchone()['count']
-    
-    pagination_iter = get_pagination_iter(page, total_pages)
 
     return render_template('public/dashboard.html', 
                          cases=cases,
-                         all_cases=all_cases,
+                         next_cursor=next_cursor,
+                         filtered_total=filtered_total,
                          all_ongs=all_ongs,
                          categories=categories,
-                         page=page, 
-                         current_page=page, 
-                         total_pages=total_pages,
-                         pagination_iter=pagination_iter,
                          ongs=ongs,
                          stats_nb_ongs=stats_nb_ongs,
                          stats_resolved=stats_resolved,
                          stats_total_cases=total_cases)
 
 
+@public_bp.route('/cases')
+def cases_feed():
+    """Filtered, keyset-paginated case cards for the dashboard."""
+    filters = filters_from_args(request.args)
+    after = decode_cursor(request.args.get('cursor'))
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            cases, next_cursor = fetch_case_page(cursor, filters, after=after, limit=limit)
+            total = None if after else count_cases(cursor, filters)
+
+    return jsonify({
+        'html': render_template('public/_case_cards.html', cases=cases),
+        'count': len(cases),
+        'total': total,
+        'next_cursor': next_cursor
+    })
+
+
 @public_bp.route('/statistics')
 def statistics():
     """Public statistics page."""
     with get_db() as conn:
         with conn.cursor() as cursor:
-            sql = """
+            overview = case_overview(cursor)
+            total_ongs = ong_status_counts(cursor).get('validé', 0)
+            wilaya_stats = [{'wilaya': w, 'count': n} for w, n in case_breakdown(cursor, 'case_wilaya')]
+
+            cursor.execute("""
                 SELECT c.*, o.nom_ong, o.logo_url
                 FROM cas_social c 
                 LEFT JOIN ong o ON c.id_ong = o.id_ong
                 WHERE c.statut_approbation = 'approuvé'
-                ORDER BY c.date_publication DESC
-            """
-            cursor.execute(sql)
-            cases = cursor.fetchall()
-            
-            total_cases = len(cases)
-            urgent_cases = sum(1 for case in cases if case['statut'] == 'Urgent')
-            resolved_cases = sum(1 for case in cases if case['statut'] == 'Résolu')
-            
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM ong WHERE statut_de_validation = 'validé'
+                ORDER BY c.date_publication DESC, c.id_cas_social DESC
+                LIMIT 20
             """)
-            total_ongs = cursor.fetchone()['count']
+            cases = cursor.fetchall()
     
     return render_template('public/statistics.html', 
                           cases=cases,
-                          total_cases=total_cases,
-                          urgent_cases=urgent_cases,
-                          resolved_cases=resolved_cases,
+                          wilaya_stats=wilaya_stats,
+                          total_cases=overview['total_cases'],
+                          urgent_cases=overview['urgent_cases'],
+                          resolved_cases=overview['resolved_cases'],
                           total_ongs=total_ongs)
 
 
@@ -158,18 +135,7 @@ def beneficiaries():
     """Public beneficiaries page."""
     with get_db() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    (SELECT COUNT(*) 
-                     FROM beneficier b 
-                     JOIN cas_social c ON b.id_cas_social = c.id_cas_social 
-                     WHERE c.statut = 'Résolu') + 
-                    (SELECT COUNT(*) FROM cas_social 
-                     WHERE statut = 'Résolu' 
-                     AND id_cas_social NOT IN (SELECT DISTINCT id_cas_social FROM beneficier)) 
-                as count
-            """)
-            total_beneficiaries = cursor.fetchone()['count']
+            total_beneficiaries = beneficiary_stats(cursor, breakdown=False)['total']
             
             cursor.execute("SELECT id_ong, nom_ong FROM ong ORDER BY nom_ong")
             ongs = cursor.fetchall()
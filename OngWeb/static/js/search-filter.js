@@ -1,4 +1,6 @@
 // Search and Filter Functionality for Dashboard
+// Filtering and pagination happen on the server (/public/cases); this script
+// only requests result pages and appends the returned cards.
 (function () {
     'use strict';
 
@@ -11,13 +13,13 @@
     const resultsCount = document.getElementById('resultsCount');
     const casesContainer = document.getElementById('casesContainer');
     const noResults = document.getElementById('noResults');
-    const caseCards = document.querySelectorAll('.case-card-wrapper');
+    const loadMoreBtn = document.getElementById('loadMore');
 
-    // Helper to normalize strings (remove accents and casing)
-    function normalizeString(str) {
-        if (!str) return '';
-        return str.normalize("NFD").replace(/[\u0300-\u036f]/g, "").toLowerCase().trim();
-    }
+    if (!casesContainer) return;
+
+    const feedUrl = casesContainer.dataset.feedUrl;
+    let nextCursor = casesContainer.dataset.nextCursor || null;
+    let requestSeq = 0; // Ignore responses to superseded requests
 
     // Debounce function for search input
     function debounce(func, wait) {
@@ -32,142 +34,62 @@
         };
     }
 
-    // Pagination constraints
-    const itemsPerPage = 10;
-    let currentPage = 1;
-    let filteredCards = []; // Store currently matching cards
-
-    // Filter function
-    function filterCases() {
-        const searchTerm = searchInput.value.toLowerCase().trim();
-        const selectedStatus = statusFilter.value;
-        const selectedOng = ongFilter.value;
-        const selectedDomain = domainFilter.value;
-
-        // Reset matching list
-        filteredCards = [];
-
-        caseCards.forEach(card => {
-            const title = card.dataset.title || '';
-            const description = card.dataset.description || '';
-            const status = card.dataset.status || '';
-            const ongId = card.dataset.ongId || '';
-            const domain = card.dataset.domain || '';
-
-            // Normalize strings for comparison
-            const normTitle = normalizeString(title);
-            const normDesc = normalizeString(description);
-            const normSearch = normalizeString(searchTerm);
-            const normDomain = normalizeString(domain);
-            const normSelectedDomain = normalizeString(selectedDomain);
-
-            // Check all filter conditions
-            const matchesSearch = !normSearch ||
-                normTitle.includes(normSearch) ||
-                normDesc.includes(normSearch);
-
-            const matchesStatus = !selectedStatus || status === selectedStatus;
-            const matchesOng = !selectedOng || ongId === selectedOng;
-            const matchesDomain = !normSelectedDomain || normDomain.includes(normSelectedDomain);
-
-            if (matchesSearch && matchesStatus && matchesOng && matchesDomain) {
-                filteredCards.push(card);
-            } else {
-                card.style.display = 'none';
-                card.classList.remove('fade-in');
-            }
-        });
-
-        // Reset to page 1 on filter change
-        currentPage = 1;
-        updateDisplay();
+    // Current filters as query parameters
+    function buildParams(cursor) {
+        const params = new URLSearchParams();
+        const search = searchInput.value.trim();
+        if (search) params.set('search', search);
+        if (statusFilter.value) params.set('status', statusFilter.value);
+        if (ongFilter.value) params.set('ong_id', ongFilter.value);
+        if (domainFilter.value) params.set('domain', domainFilter.value);
+        if (cursor) params.set('cursor', cursor);
+        return params;
     }
 
-    // Update Display (Pagination & Counts)
-    function updateDisplay() {
-        const totalItems = filteredCards.length;
-        const totalPages = Math.ceil(totalItems / itemsPerPage);
-
-        // Hide all first
-        caseCards.forEach(card => card.style.display = 'none');
+    // Fetch one page of cards; `append` keeps the cards already shown
+    function fetchPage(append) {
+        const seq = ++requestSeq;
+        const params = buildParams(append ? nextCursor : null);
 
-        // Show items for current page
-        const start = (currentPage - 1) * itemsPerPage;
-        const end = start + itemsPerPage;
-        const pageItems = filteredCards.slice(start, end);
+        if (loadMoreBtn) loadMoreBtn.disabled = true;
 
-        pageItems.forEach(card => {
-            card.style.display = '';
-            card.classList.add('fade-in');
-        });
+        return fetch(`${feedUrl}?${params.toString()}`, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json())
+            .then(data => {
+                if (seq !== requestSeq) return;
 
-        // Update UI elements
-        updateResultsCount(totalItems);
-        renderPagination(totalPages);
+                if (append) {
+                    casesContainer.insertAdjacentHTML('beforeend', data.html);
+                } else {
+                    casesContainer.innerHTML = data.html;
+                    updateResultsCount(data.total);
+                }
 
-        // Show/Hide container/no results
-        if (totalItems === 0) {
-            casesContainer.style.display = 'none';
-            noResults.style.display = 'block';
-            document.getElementById('paginationControls').style.display = 'none';
-        } else {
-            casesContainer.style.display = '';
-            noResults.style.display = 'none';
-            document.getElementById('paginationControls').style.display = totalPages > 1 ? 'block' : 'none';
-        }
+                nextCursor = data.next_cursor;
+                updateDisplay();
+            })
+            .catch(error => console.error('Error loading cases:', error))
+            .finally(() => {
+                if (loadMoreBtn) loadMoreBtn.disabled = false;
+            });
     }
 
-    // Render Pagination Controls
-    function renderPagination(totalPages) {
-        const paginationContainer = document.getElementById('paginationControls');
-        if (!paginationContainer) return;
-
-        let html = '<ul class="pagination justify-content-center">';
-
-        // Previous Button
-        html += `<li class="page-item ${currentPage === 1 ? 'disabled' : ''}">
-                    <a class="page-link" href="#" data-page="${currentPage - 1}">
-                        <i class="bi bi-chevron-left"></i>
-                    </a>
-                 </li>`;
-
-        // Page Numbers
-        for (let i = 1; i <= totalPages; i++) {
-            if (i === 1 || i === totalPages || (i >= currentPage - 1 && i <= currentPage + 1)) {
-                html += `<li class="page-item ${i === currentPage ? 'active' : ''}">
-                            <a class="page-link" href="#" data-page="${i}">${i}</a>
-                         </li>`;
-            } else if (i === currentPage - 2 || i === currentPage + 2) {
-                html += `<li class="page-item disabled"><span class="page-link">...</span></li>`;
-            }
-        }
+    // Filter function: restart from the first page with the new filters
+    function filterCases() {
+        fetchPage(false);
+    }
 
-        // Next Button
-        html += `<li class="page-item ${currentPage === totalPages ? 'disabled' : ''}">
-                    <a class="page-link" href="#" data-page="${currentPage + 1}">
-                        <i class="bi bi-chevron-right"></i>
-                    </a>
-                 </li>`;
-
-        html += '</ul>';
-        paginationContainer.innerHTML = html;
-
-        // Add click listeners
-        paginationContainer.querySelectorAll('.page-link').forEach(link => {
-            link.addEventListener('click', (e) => {
-                e.preventDefault();
-                const page = parseInt(e.currentTarget.dataset.page);
-                if (page && page > 0 && page <= totalPages && page !== currentPage) {
-                    currentPage = page;
-                    updateDisplay();
-                    window.scrollTo({ top: document.getElementById('casesContainer').offsetTop - 100, behavior: 'smooth' });
-                }
-            });
-        });
+    // Show/Hide container, no-results block and "load more"
+    function updateDisplay() {
+        const hasCards = casesContainer.children.length > 0;
+        casesContainer.style.display = hasCards ? '' : 'none';
+        if (noResults) noResults.style.display = hasCards ? 'none' : 'block';
+        if (loadMoreBtn) loadMoreBtn.style.display = nextCursor ? '' : 'none';
     }
 
     // Update results count message
     function updateResultsCount(count) {
+        if (count === null || count === undefined) return;
         const lang = document.documentElement.lang || 'fr';
         let message;
         if (lang === 'ar') {
@@ -184,7 +106,7 @@
         statusFilter.value = '';
         ongFilter.value = '';
         domainFilter.value = '';
-        filterCases(); // This resets page to 1 automatically
+        filterCases();
 
         // Add visual feedback
         clearBtn.classList.add('btn-success');
@@ -214,8 +136,15 @@
         clearBtn.addEventListener('click', clearFilters);
     }
 
-    // Initialize on page load
-    filterCases();
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', () => {
+            if (nextCursor) fetchPage(true);
+        });
+    }
+
+    // Initialize on page load (first page is rendered by the server)
+    updateResultsCount(resultsCount ? parseInt(resultsCount.dataset.count, 10) : null);
+    updateDisplay();
 
     // Keyboard shortcut: "/" to focus search
     document.addEventListener('keydown', (e) => {
@@ -0,0 +1,182 @@
+"""
+Fingerprinted, pre-compressed static assets for ONG Connect.
+
+The stylesheets and scripts under static/css and static/js are copied at
+startup (or ahead of time, `python static_assets.py`) to static/build under a
+name carrying a hash of their content, with gzip and brotli variants next to
+them:
+    css/style.css -> build/css/style.<hash>.css, .css.gz, .css.br
+
+A changed file gets a new name, so the built files are served with
+`Cache-Control: immutable` and a one-year max-age: browsers never revalidate
+them, and a deploy is picked up as soon as the HTML points to the new names.
+The variant matching the request's Accept-Encoding is sent as-is, nothing is
+compressed per request. Brotli variants need the `brotli` package; without it
+only gzip is built.
+
+Templates use asset_url() the way they use url_for():
+    {{ asset_url('static', filename='css/style.css') }}
+which gives the fingerprinted URL for built files and falls back to url_for()
+for anything else (uploads, unknown files).
+
+Content-addressed media renditions (uploads/media/<sha256>.thumb.webp, see
+media_store.py) never change either: the static route marks them immutable.
+
+- build_assets(): fingerprint and compress the asset folders, write the manifest
+- init_assets(): load or build the manifest and register the route and helper
+- asset_url(): url_for() replacement for templates
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import request, url_for, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+from media_renditions import STATIC_DIR
+
+
+ASSET_FOLDERS = ('css', 'js')
+BUILD_FOLDER = 'build'
+MANIFEST_NAME = 'manifest.json'
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# (Accept-Encoding token, file suffix), best first
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+_HASH_LENGTH = 12
+
+_CONTENT_ADDRESSED_RE = re.compile(r'^uploads/media/[0-9a-f]{64}\.[a-z]+\.webp$')
+
+# {source path: built path}, relative to static/ and build/
+_manifest = {}
+_built = set()
+
+
+def _fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:_HASH_LENGTH]
+
+
+def _write_if_missing(path, data):
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_assets(static_dir=STATIC_DIR):
+    """
+    Write the fingerprinted copy and compressed variants of every file of the
+    asset folders (existing builds are kept for pages still cached with the
+    old names). Returns the manifest {source: built name}.
+    """
+    build_dir = os.path.join(static_dir, BUILD_FOLDER)
+    manifest = {}
+    for folder in ASSET_FOLDERS:
+        for root, _, files in os.walk(os.path.join(static_dir, folder)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                source = os.path.relpath(path, static_dir).replace(os.sep, '/')
+                stem, extension = os.path.splitext(source)
+                built = f"{stem}.{_fingerprint(path)}{extension}"
+
+                target = os.path.join(build_dir, built)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                _write_if_missing(target, data)
+                # mtime=0: the same input always gives the same bytes
+                _write_if_missing(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write_if_missing(target + '.br', brotli.compress(data, quality=11))
+                manifest[source] = built
+
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Static assets: {len(manifest)} files built.")
+    return manifest
+
+
+def _load_manifest(static_dir):
+    try:
+        with open(os.path.join(static_dir, BUILD_FOLDER, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def asset_url(endpoint, **values):
+    """url_for() that points static files to their fingerprinted build."""
+    if endpoint == 'static' and values.get('filename') in _manifest:
+        values['filename'] = _manifest[values['filename']]
+        return url_for('asset', **values)
+    return url_for(endpoint, **values)
+
+
+def _serve_asset(filename):
+    if filename not in _built:
+        abort(404)
+    build_dir = os.path.join(STATIC_DIR, BUILD_FOLDER)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    variant, encoding = filename, None
+    for token, suffix in _ENCODINGS:
+        if request.accept_encodings[token] and os.path.exists(os.path.join(build_dir, filename + suffix)):
+            variant, encoding = filename + suffix, token
+            break
+
+    response = send_from_directory(build_dir, variant, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+
+def _cache_static(response):
+    if (request.endpoint == 'static' and response.status_code == 200
+            and _CONTENT_ADDRESSED_RE.match((request.view_args or {}).get('filename', ''))):
+        response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+
+def init_assets(app):
+    """
+    Build the assets (ASSET_BUILD_ON_STARTUP) or load the manifest written by
+    `python static_assets.py`, then register /assets/ and asset_url().
+    """
+    manifest = None
+    if not app.config.get('ASSET_BUILD_ON_STARTUP', True):
+        manifest = _load_manifest(STATIC_DIR)
+        if manifest is None:
+            print("Static assets: no manifest found, building.")
+    if manifest is None:
+        manifest = build_assets(STATIC_DIR)
+
+    _manifest.clear()
+    _manifest.update(manifest)
+    _built.clear()
+    _built.update(manifest.values())
+
+    app.add_url_rule('/assets/<path:filename>', 'asset', _serve_asset)
+    app.after_request(_cache_static)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+if __name__ == '__main__':
+    build_assets()
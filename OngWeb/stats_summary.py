@@ -0,0 +1,276 @@
+"""
+Materialized statistics for ONG Connect.
+
+Dashboards read pre-aggregated counters from `stats_counter` instead of
+running COUNT/GROUP BY over `cas_social` on every request. A counter row is
+(dimension, status, bucket) -> total, for example
+('case_wilaya', 'approuvé', 'Nouakchott Nord') -> 42.
+
+Counters are maintained inside the writing transaction:
+- remove_case_counts() / remove_ong_counts(): before an UPDATE or DELETE,
+  subtract the rows' current contribution
+- add_case_counts() / add_ong_counts(): after an INSERT or UPDATE, add it back
+- rebuild_summary(): recompute everything from scratch, also runnable as a
+  script (python stats_summary.py)
+
+Readers: case_overview(), case_breakdown(), ong_status_counts(),
+ong_domain_counts(), beneficiary_total().
+
+ONG domain counters are bucketed by category id (table `ong_domain`), so
+removing/adding an ONG's counts must surround any change of its domains.
+"""
+
+from collections import defaultdict
+
+
+# Case dimensions, counted per statut_approbation
+CASE_DIMENSIONS = {
+    'case_wilaya': 'wilaya',
+    'case_moughataa': 'moughataa',
+    'case_statut': 'statut',
+    'case_category': 'category_id',
+    'case_ong': 'id_ong',
+}
+
+
+def _bucket(value):
+    return '' if value is None else str(value)
+
+
+def _case_contributions(case):
+    status = _bucket(case['statut_approbation'])
+    yield 'case', status, ''
+    for dimension, column in CASE_DIMENSIONS.items():
+        yield dimension, status, _bucket(case[column])
+
+
+def _beneficiary_weight(case):
+    # Strict count: resolved cases only, a case without explicit
+    # beneficiaries counts as one beneficiary
+    if case['statut'] != 'Résolu':
+        return 0
+    return max(1, case['nb_beneficiaires'])
+
+
+def _apply(cursor, deltas):
+    rows = [(dim, status, bucket, n) for (dim, status, bucket), n in deltas.items() if n]
+    if rows:
+        cursor.executemany("""
+            INSERT INTO stats_counter (dimension, status, bucket, total)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+        """, rows)
+
+
+def _case_rows(cursor, case_ids):
+    if not case_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(case_ids))
+    # FOR UPDATE: concurrent writers of the same case apply their deltas in turn
+    cursor.execute(f"""
+        SELECT c.id_cas_social, c.statut_approbation, c.wilaya, c.moughataa, c.statut,
+               c.category_id, c.id_ong,
+               (SELECT COUNT(*) FROM beneficier b
+                WHERE b.id_cas_social = c.id_cas_social) as nb_beneficiaires
+        FROM cas_social c
+        WHERE c.id_cas_social IN ({placeholders})
+        FOR UPDATE
+    """, list(case_ids))
+    return cursor.fetchall()
+
+
+def _ong_rows(cursor, ong_ids):
+    if not ong_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(ong_ids))
+    cursor.execute(f"""
+        SELECT id_ong, statut_de_validation
+        FROM ong WHERE id_ong IN ({placeholders})
+        FOR UPDATE
+    """, list(ong_ids))
+    ongs = cursor.fetchall()
+    cursor.execute(
+        f"SELECT id_ong, idCategorie FROM ong_domain WHERE id_ong IN ({placeholders})",
+        list(ong_ids)
+    )
+    domains = defaultdict(list)
+    for row in cursor.fetchall():
+        domains[row['id_ong']].append(row['idCategorie'])
+    for ong in ongs:
+        ong['domains'] = domains[ong['id_ong']]
+    return ongs
+
+
+def _count_cases(cursor, case_ids, sign):
+    deltas = defaultdict(int)
+    for case in _case_rows(cursor, case_ids):
+        for key in _case_contributions(case):
+            deltas[key] += sign
+        deltas[('beneficiary', '', '')] += sign * _beneficiary_weight(case)
+    _apply(cursor, deltas)
+
+
+def _count_ongs(cursor, ong_ids, sign):
+    deltas = defaultdict(int)
+    for ong in _ong_rows(cursor, ong_ids):
+        status = _bucket(ong['statut_de_validation'])
+        deltas[('ong', status, '')] += sign
+        for category_id in ong['domains']:
+            deltas[('ong_domain', status, _bucket(category_id))] += sign
+    _apply(cursor, deltas)
+
+
+def add_case_counts(cursor, case_ids):
+    """Add the current contribution of `case_ids` (after INSERT/UPDATE)."""
+    _count_cases(cursor, [i for i in case_ids if i is not None], 1)
+
+
+def remove_case_counts(cursor, case_ids):
+    """Remove the current contribution of `case_ids` (before UPDATE/DELETE)."""
+    _count_cases(cursor, [i for i in case_ids if i is not None], -1)
+
+
+def add_ong_counts(cursor, ong_ids):
+    """Add the current contribution of `ong_ids` (after INSERT/UPDATE)."""
+    _count_ongs(cursor, [i for i in ong_ids if i is not None], 1)
+
+
+def remove_ong_counts(cursor, ong_ids):
+    """Remove the current contribution of `ong_ids` (before UPDATE/DELETE)."""
+    _count_ongs(cursor, [i for i in ong_ids if i is not None], -1)
+
+
+def category_case_ids(cursor, category_id):
+    """Ids of every case filed under a category."""
+    cursor.execute("SELECT id_cas_social FROM cas_social WHERE category_id = %s", (category_id,))
+    return [row['id_cas_social'] for row in cursor.fetchall()]
+
+
+def category_ong_ids(cursor, category_id):
+    """Ids of every ONG working in a category (domain)."""
+    cursor.execute("SELECT id_ong FROM ong_domain WHERE idCategorie = %s", (category_id,))
+    return [row['id_ong'] for row in cursor.fetchall()]
+
+
+# --- Readers ---
+
+def _counter_rows(cursor, dimension, status=None):
+    sql = "SELECT status, bucket, total FROM stats_counter WHERE dimension = %s AND total > 0"
+    params = [dimension]
+    if status is not None:
+        sql += " AND status = %s"
+        params.append(status)
+    cursor.execute(sql + " ORDER BY total DESC, bucket", params)
+    return cursor.fetchall()
+
+
+def case_overview(cursor, status='approuvé'):
+    """Total, urgent and resolved case counts (status=None: every approval status)."""
+    total = sum(row['total'] for row in _counter_rows(cursor, 'case', status))
+    by_statut = defaultdict(int)
+    for row in _counter_rows(cursor, 'case_statut', status):
+        by_statut[row['bucket']] += row['total']
+    return {
+        'total_cases': total,
+        'urgent_cases': by_statut['Urgent'],
+        'resolved_cases': by_statut['Résolu'],
+    }
+
+
+def case_breakdown(cursor, dimension, status='approuvé', limit=None):
+    """[(bucket or None, count)] for a case dimension, largest first."""
+    merged = defaultdict(int)
+    for row in _counter_rows(cursor, dimension, status):
+        merged[row['bucket'] or None] += row['total']
+    items = sorted(merged.items(), key=lambda item: item[1], reverse=True)
+    return items[:limit] if limit else items
+
+
+def ong_status_counts(cursor):
+    """{statut_de_validation: count} over every ONG."""
+    return {row['status']: row['total'] for row in _counter_rows(cursor, 'ong')}
+
+
+def ong_domain_counts(cursor, status=None):
+    """{domain: count of ONGs}, optionally for one validation status."""
+    # Buckets are category ids: names are resolved here so a renamed
+    # category needs no counter update
+    sql = """
+        SELECT cat.nomCategorie, SUM(s.total) as total
+        FROM stats_counter s
+        JOIN categorie cat ON s.bucket = CAST(cat.idCategorie AS CHAR)
+        WHERE s.dimension = 'ong_domain' AND s.total > 0
+    """
+    params = []
+    if status is not None:
+        sql += " AND s.status = %s"
+        params.append(status)
+    cursor.execute(sql + " GROUP BY cat.idCategorie, cat.nomCategorie", params)
+    return {row['nomCategorie']: int(row['total']) for row in cursor.fetchall()}
+
+
+def beneficiary_total(cursor):
+    """Strict beneficiary count (explicit + implicit, resolved cases only)."""
+    rows = _counter_rows(cursor, 'beneficiary', '')
+    return rows[0]['total'] if rows else 0
+
+
+# --- Rebuild ---
+
+def rebuild_summary(conn):
+    """Recompute every counter from the base tables in one transaction."""
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM stats_counter")
+
+        cursor.execute("""
+            INSERT INTO stats_counter (dimension, status, bucket, total)
+            SELECT 'case', COALESCE(statut_approbation, ''), '', COUNT(*)
+            FROM cas_social GROUP BY statut_approbation
+        """)
+        for dimension, column in CASE_DIMENSIONS.items():
+            cursor.execute(f"""
+                INSERT INTO stats_counter (dimension, status, bucket, total)
+                SELECT %s, approbation, bucket, COUNT(*) FROM (
+                    SELECT COALESCE(statut_approbation, '') as approbation,
+                           COALESCE({column}, '') as bucket
+                    FROM cas_social
+                ) grouped
+                GROUP BY approbation, bucket
+            """, (dimension,))
+
+        cursor.execute("""
+            INSERT INTO stats_counter (dimension, status, bucket, total)
+            SELECT 'beneficiary', '', '', COALESCE(SUM(GREATEST(1, COALESCE(b.nb, 0))), 0)
+            FROM cas_social c
+            LEFT JOIN (
+                SELECT id_cas_social, COUNT(*) as nb FROM beneficier GROUP BY id_cas_social
+            ) b ON b.id_cas_social = c.id_cas_social
+            WHERE c.statut = 'Résolu'
+        """)
+
+        cursor.execute("""
+            INSERT INTO stats_counter (dimension, status, bucket, total)
+            SELECT 'ong', COALESCE(statut_de_validation, ''), '', COUNT(*)
+            FROM ong GROUP BY statut_de_validation
+        """)
+        cursor.execute("""
+            INSERT INTO stats_counter (dimension, status, bucket, total)
+            SELECT 'ong_domain', approbation, bucket, COUNT(*) FROM (
+                SELECT COALESCE(o.statut_de_validation, '') as approbation,
+                       CAST(od.idCategorie AS CHAR) as bucket
+                FROM ong_domain od
+                JOIN ong o ON o.id_ong = od.id_ong
+            ) grouped
+            GROUP BY approbation, bucket
+        """)
+    conn.commit()
+    print("Statistics summary rebuilt.")
+
+
+if __name__ == '__main__':
+    from config import Config
+    from database import init_config, get_db
+
+    init_config({k: getattr(Config, k) for k in dir(Config) if k.isupper()})
+    with get_db() as conn:
+        rebuild_summary(conn)
@@ -148,6 +148,7 @@ TRANSLATIONS = {
         'clear_filters': 'مسح الفلاتر',
         'showing_results': 'عرض النتائج',
         'no_results_found': 'لم يتم العثور على نتائج',
+        'load_more': 'عرض المزيد',
         'change_password_title': 'تغيير كلمة المرور',
         'new_password': 'كلمة المرور الجديدة',
         'confirm_new_password': 'تأكيد كلمة المرور الجديدة',
@@ -299,6 +300,7 @@ TRANSLATIONS = {
         'clear_filters': 'Effacer les filtres',
         'showing_results': 'Affichage des résultats',
         'no_results_found': 'Aucun résultat trouvé',
+        'load_more': 'Voir plus',
         'change_password_title': 'Changer le mot de passe',
         'new_password': 'Nouveau mot de passe',
         'confirm_new_password': 'Confirmer le nouveau mot de passe',